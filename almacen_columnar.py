@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Almacén columnar binario del historial (junto a resultados_guacharo.csv).
+
+Cada columna es un archivo .bin con un arreglo NumPy plano que se abre con
+np.memmap (sin parsear texto). meta.json guarda la cantidad de filas y los
+diccionarios de los textos; se reemplaza de forma atómica, así que un lector
+nunca ve filas a medio escribir. También guarda el tamaño en bytes del CSV
+con las mismas filas (bytes_csv): si no coincide con el CSV actual, el almacén
+no está al día y los lectores usan el CSV (ver al_dia()).
+
+Columnas:
+    draw_ts      int64   fecha+hora del sorteo en ns (NAT = mínimo int64)
+    hour_slot    int8    hora del día 0-23 (-1 si no se pudo leer)
+    numero       uint8   número ganador (255 = sin resultado)
+    animal       int8+   código en el diccionario de Animal_Gan (-1 = vacío)
+    fecha, hora  int8+   códigos del texto original de Fecha / Hora
+
+Los códigos usan el entero más chico que admite su diccionario (el mismo que
+elige pandas para los códigos de un Categorical), así cargar() arma las
+columnas de texto sobre el archivo mapeado sin copiarlo. Si un diccionario
+crece hasta pasar ese límite, agregar() reescribe el almacén con códigos más
+anchos.
+
+Uso:
+    python almacen_columnar.py construir [--csv resultados_guacharo.csv]
+    python almacen_columnar.py exportar --salida resultados_guacharo.csv
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from normalizacion import columnas_tiempo
+
+CSV = "resultados_guacharo.csv"
+SIN_NUMERO = 255
+
+# Columnas de ancho fijo; las de TEXTOS dependen del tamaño de su diccionario
+COLUMNAS = {
+    "draw_ts": np.int64,
+    "hour_slot": np.int8,
+    "numero": np.uint8,
+}
+# Columna del CSV de la que sale cada diccionario
+TEXTOS = {"animal": "Animal_Gan", "fecha": "Fecha", "hora": "Hora"}
+
+
+def directorio_de(ruta_csv: str) -> str:
+    """Directorio del almacén que acompaña a un CSV"""
+    return os.path.splitext(ruta_csv)[0] + "_columnar"
+
+
+def _ruta_meta(directorio):
+    return os.path.join(directorio, "meta.json")
+
+
+def _ruta_columna(directorio, nombre, generacion):
+    return os.path.join(directorio, f"{nombre}.{generacion}.bin")
+
+
+def existe(directorio) -> bool:
+    return os.path.exists(_ruta_meta(directorio))
+
+
+def leer_meta(directorio) -> dict:
+    with open(_ruta_meta(directorio), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _escribir_meta(directorio, meta):
+    tmp = _ruta_meta(directorio) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, _ruta_meta(directorio))
+
+
+# ======================================================
+#   CODIFICACIÓN
+# ======================================================
+def _numeros(serie: pd.Series) -> np.ndarray:
+    valores = pd.to_numeric(serie, errors="coerce").astype(float).to_numpy()
+    validos = ~np.isnan(valores)
+    if (validos & ((valores < 0) | (valores >= SIN_NUMERO) | (valores % 1 != 0))).any():
+        raise ValueError("Num_Ganador fuera del rango representable en uint8")
+    return np.where(validos, valores, SIN_NUMERO).astype(np.uint8)
+
+
+def _codificar_texto(serie: pd.Series, diccionario: list) -> np.ndarray:
+    """Códigos de la columna en `diccionario` (lo amplía con los textos nuevos)"""
+    posiciones = {texto: i for i, texto in enumerate(diccionario)}
+    unicos = serie.dropna().astype(str).unique()
+    for texto in unicos:
+        if texto not in posiciones:
+            posiciones[texto] = len(diccionario)
+            diccionario.append(texto)
+    return serie.map(posiciones).fillna(-1).to_numpy(dtype=np.int32)
+
+
+def _tipo_codigos(diccionario: list) -> np.dtype:
+    """Entero más chico para los códigos de un diccionario (el que usa pandas en un Categorical)"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if len(diccionario) < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def tipos(diccionarios: dict) -> dict:
+    """dtype de cada columna del almacén con estos diccionarios"""
+    resultado = {nombre: np.dtype(dtype) for nombre, dtype in COLUMNAS.items()}
+    resultado.update({nombre: _tipo_codigos(diccionarios[nombre]) for nombre in TEXTOS})
+    return resultado
+
+
+def codificar(df: pd.DataFrame, diccionarios: dict) -> dict:
+    """Arreglos de columnas a partir de un DataFrame con el formato del CSV"""
+    draw_ts, slots = columnas_tiempo(df["Fecha"], df["Hora"])
+    columnas = {
+        "draw_ts": draw_ts,
+        "hour_slot": slots,
+        "numero": _numeros(df["Num_Ganador"]),
+    }
+    for nombre, columna_csv in TEXTOS.items():
+        columnas[nombre] = _codificar_texto(df[columna_csv], diccionarios[nombre])
+    return columnas
+
+
+# ======================================================
+#   ESCRITURA
+# ======================================================
+def escribir(df: pd.DataFrame, directorio: str, bytes_csv: int = None):
+    """
+    Reescribe el almacén completo (nueva generación de archivos).
+    `bytes_csv`: tamaño del CSV con estas mismas filas (None si no hay uno).
+    """
+    os.makedirs(directorio, exist_ok=True)
+    anterior = leer_meta(directorio) if existe(directorio) else None
+    generacion = anterior["generacion"] + 1 if anterior else 1
+
+    diccionarios = {nombre: [] for nombre in TEXTOS}
+    columnas = codificar(df, diccionarios)
+    dtypes = tipos(diccionarios)
+    for nombre, dtype in dtypes.items():
+        columnas[nombre].astype(dtype).tofile(_ruta_columna(directorio, nombre, generacion))
+
+    _escribir_meta(directorio, {
+        "generacion": generacion,
+        "filas": int(len(df)),
+        "columnas": {nombre: dtype.str for nombre, dtype in dtypes.items()},
+        "diccionarios": diccionarios,
+        "bytes_csv": bytes_csv,
+    })
+
+    # Los lectores que ya tienen mapeada la generación anterior conservan sus datos
+    if anterior:
+        for nombre in anterior["columnas"]:
+            try:
+                os.remove(_ruta_columna(directorio, nombre, anterior["generacion"]))
+            except OSError:
+                pass
+
+
+def agregar(df: pd.DataFrame, directorio: str, bytes_csv: int = None):
+    """
+    Agrega filas al final; las filas nuevas son visibles cuando se reemplaza meta.json.
+    `bytes_csv`: tamaño del CSV al que ya se le agregaron las mismas filas (None si no).
+    """
+    if not existe(directorio):
+        escribir(df, directorio, bytes_csv)
+        return
+    meta = leer_meta(directorio)
+    columnas = codificar(df, meta["diccionarios"])
+    dtypes = tipos(meta["diccionarios"])
+    if meta["columnas"] != {nombre: dtype.str for nombre, dtype in dtypes.items()}:
+        # Otro esquema, o un diccionario que ya no entra en sus códigos: reconstruir desde sus datos
+        previo, _ = cargar(directorio)
+        escribir(pd.concat([tipos_csv(previo), df], ignore_index=True), directorio, bytes_csv)
+        return
+    for nombre, dtype in dtypes.items():
+        ruta = _ruta_columna(directorio, nombre, meta["generacion"])
+        with open(ruta, "r+b") as f:
+            # Descartar restos de una escritura interrumpida
+            f.truncate(meta["filas"] * dtype.itemsize)
+            f.seek(0, os.SEEK_END)
+            columnas[nombre].astype(dtype).tofile(f)
+    meta["filas"] += int(len(df))
+    meta["bytes_csv"] = bytes_csv
+    _escribir_meta(directorio, meta)
+
+
+def csv_reflejado(directorio: str):
+    """Tamaño en bytes del CSV con las mismas filas que el almacén (None si no se sabe)"""
+    try:
+        return leer_meta(directorio).get("bytes_csv")
+    except (OSError, ValueError):
+        return None
+
+
+def al_dia(directorio: str, ruta_csv: str) -> bool:
+    """True si el almacén tiene las mismas filas que el CSV (según su tamaño en bytes)"""
+    try:
+        return csv_reflejado(directorio) == os.path.getsize(ruta_csv)
+    except OSError:
+        return False
+
+
+# ======================================================
+#   LECTURA
+# ======================================================
+def abrir(directorio: str, meta: dict = None) -> dict:
+    """Columnas mapeadas en memoria (solo lectura, sin copiar)"""
+    meta = meta or leer_meta(directorio)
+    columnas = {}
+    for nombre, dtype in meta["columnas"].items():
+        if meta["filas"] == 0:
+            columnas[nombre] = np.empty(0, dtype=dtype)
+            continue
+        columnas[nombre] = np.memmap(_ruta_columna(directorio, nombre, meta["generacion"]),
+                                     dtype=dtype, mode="r", shape=(meta["filas"],))
+    return columnas
+
+
+def cargar(directorio: str):
+    """
+    Retorna (df, columnas): el historial con las columnas del CSV y las columnas
+    del almacén mapeadas en memoria. El df no copia los archivos: Fecha, Hora y
+    Animal_Gan son Categorical sobre los códigos mapeados (-1 = vacío) y
+    Num_Ganador es UInt8 sobre `numero` con máscara en los 255. Para obtener
+    los tipos de pd.read_csv (al serializar) usar tipos_csv().
+    """
+    meta = leer_meta(directorio)
+    columnas = abrir(directorio, meta)
+    textos = {
+        columna_csv: pd.Categorical.from_codes(columnas[nombre], categories=meta["diccionarios"][nombre])
+        for nombre, columna_csv in TEXTOS.items()
+    }
+    numero = columnas["numero"]
+    df = pd.DataFrame({
+        "Fecha": textos["Fecha"],
+        "Hora": textos["Hora"],
+        "Animal_Gan": textos["Animal_Gan"],
+        "Num_Ganador": pd.arrays.IntegerArray(numero, numero == SIN_NUMERO),
+    }, copy=False)
+    return df, columnas
+
+
+def tipos_csv(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Filas de cargar() con los tipos de pd.read_csv: textos como object y
+    Num_Ganador float (NaN si no hay resultado). Un DataFrame leído del CSV
+    se retorna tal cual.
+    """
+    conversiones = {columna: object for columna in df.columns
+                    if isinstance(df[columna].dtype, pd.CategoricalDtype)}
+    if isinstance(df["Num_Ganador"].dtype, pd.UInt8Dtype):
+        conversiones["Num_Ganador"] = float
+    return df.astype(conversiones) if conversiones else df
+
+
+def exportar_csv(directorio: str, ruta_csv: str):
+    """Exporta el almacén al CSV de compatibilidad (si es su propio CSV, queda al día con él)"""
+    df = tipos_csv(cargar(directorio)[0])
+    tmp = ruta_csv + ".tmp"
+    df.to_csv(tmp, index=False, encoding="utf-8")
+    os.replace(tmp, ruta_csv)
+    if os.path.abspath(directorio_de(ruta_csv)) == os.path.abspath(directorio):
+        meta = leer_meta(directorio)
+        meta["bytes_csv"] = os.path.getsize(ruta_csv)
+        _escribir_meta(directorio, meta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Almacén columnar del historial Guácharo")
+    sub = parser.add_subparsers(dest="accion", required=True)
+    p_construir = sub.add_parser("construir", help="Construir el almacén desde el CSV")
+    p_construir.add_argument("--csv", default=CSV)
+    p_exportar = sub.add_parser("exportar", help="Exportar el almacén a CSV")
+    p_exportar.add_argument("--csv", default=CSV, help="CSV de origen del almacén")
+    p_exportar.add_argument("--salida", default=CSV)
+    args = parser.parse_args()
+
+    directorio = directorio_de(args.csv)
+    if args.accion == "construir":
+        df = pd.read_csv(args.csv)
+        escribir(df, directorio, os.path.getsize(args.csv))
+        print(f"✅ Almacén columnar: {directorio} ({len(df)} registros)")
+    else:
+        exportar_csv(directorio, args.salida)
+        print(f"✅ CSV exportado: {args.salida}")
+
+
+if __name__ == "__main__":
+    main()
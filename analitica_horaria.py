@@ -0,0 +1,162 @@
+# analitica_horaria.py - CONTEOS Y HUECOS POR HORA DE SORTEO
+"""
+Agregados por estado (77) y hora del sorteo (24) para /api/stats/by-hour
+y /api/predict?hora=.
+
+    conteos[estado, hora]     veces que salió el estado a esa hora
+    ultimo_dia[estado, hora]  último día (ordinal) en que salió a esa hora, -1 si nunca
+
+Ambos se pueden sumar por partes (suma y máximo), así que tras una ingesta
+que solo agrega sorteos se actualizan con las filas nuevas (ver
+Dataset.heredar) y cada consulta es una lectura de columnas de 77 valores.
+"""
+import numpy as np
+
+import normalizacion
+import ranking
+from predictor_model import N_ESTADOS, STATES, codificar_sorteos
+
+try:
+    from utils.utils_map import numero_a_nombre
+except ImportError:
+    from utils_map import numero_a_nombre
+
+N_HORAS = 24
+# Pesos del score de /api/predict?hora=
+PESOS_HORA = {"freq": 0.6, "recency": 0.4}
+
+
+def slot_de(texto):
+    """Hora 0-23 de un parámetro "20", "8:00 PM" o "08:00 PM"; None si no se puede leer"""
+    texto = (texto or "").strip()
+    if texto.isdigit():
+        hora = int(texto)
+        return hora if hora < N_HORAS else None
+    hora = int(normalizacion.hour_slot([texto])[0])
+    return hora if hora >= 0 else None
+
+
+def _escalar(a: np.ndarray) -> np.ndarray:
+    """Lleva los valores al rango 0-1 (ceros si son todos iguales)"""
+    a = a.astype(float)
+    rango = a.max() - a.min()
+    return (a - a.min()) / rango if rango else np.zeros(len(a))
+
+
+def etiqueta_hora(hora: int) -> str:
+    """"8:00 AM" / "1:00 PM", como en el historial"""
+    return f"{(hora % 12) or 12}:00 {'AM' if hora < 12 else 'PM'}"
+
+
+class AnaliticaHoraria:
+    """Tensor de conteos 77x24 y último día visto por estado y hora"""
+
+    def __init__(self):
+        self.conteos = np.zeros((N_ESTADOS, N_HORAS), dtype=np.int64)
+        self.ultimo_dia = np.full((N_ESTADOS, N_HORAS), -1, dtype=np.int64)
+        self.dia_max = -1
+
+    @classmethod
+    def desde_dataset(cls, dataset) -> "AnaliticaHoraria":
+        analitica = cls()
+        analitica.actualizar(*cls._sorteos(dataset, 0))
+        return analitica
+
+    @staticmethod
+    def _sorteos(dataset, desde: int):
+        """(códigos, días, horas) de las filas limpias de `crudo` a partir de la fila `desde`"""
+        posiciones = dataset.limpio.index.to_numpy()
+        nuevas = posiciones >= desde
+        codigos, dias = codificar_sorteos(dataset.limpio[nuevas], dataset.draw_ts[posiciones[nuevas]])
+        return codigos, dias, dataset.hour_slot[posiciones[nuevas]].astype(np.int64)
+
+    def extender(self, dataset, desde: int) -> "AnaliticaHoraria":
+        """Copia actualizada con las filas de `dataset` desde la fila `desde` (las anteriores ya están)"""
+        copia = AnaliticaHoraria()
+        copia.conteos = self.conteos.copy()
+        copia.ultimo_dia = self.ultimo_dia.copy()
+        copia.dia_max = self.dia_max
+        copia.actualizar(*self._sorteos(dataset, desde))
+        return copia
+
+    def actualizar(self, codigos: np.ndarray, dias: np.ndarray, horas: np.ndarray):
+        """Agrega sorteos codificados; se ignoran los de número u hora no válidos"""
+        validos = (codigos >= 0) & (horas >= 0)
+        celdas = codigos[validos] * N_HORAS + horas[validos]
+        self.conteos += np.bincount(celdas, minlength=N_ESTADOS * N_HORAS).reshape(N_ESTADOS, N_HORAS)
+
+        con_fecha = dias[validos] >= 0
+        np.maximum.at(self.ultimo_dia.reshape(-1), celdas[con_fecha], dias[validos][con_fecha])
+        if con_fecha.any():
+            self.dia_max = max(self.dia_max, int(dias[validos][con_fecha].max()))
+
+    # ------------------------------------------------------
+    #   Consultas (O(77) por hora)
+    # ------------------------------------------------------
+    def total(self, hora: int) -> int:
+        return int(self.conteos[:, hora].sum())
+
+    def dias_sin_salir(self, hora: int) -> np.ndarray:
+        """Días desde la última vez que salió cada estado a esa hora (-1 si nunca)"""
+        ultimo = self.ultimo_dia[:, hora]
+        return np.where(ultimo >= 0, self.dia_max - ultimo, -1)
+
+    def resumen(self, hora: int, top: int = 5) -> dict:
+        """Más frecuentes y más atrasados de una hora"""
+        conteos = self.conteos[:, hora]
+        total = int(conteos.sum())
+        huecos = self.dias_sin_salir(hora)
+
+        def registro(i):
+            return {
+                'numero': STATES[i],
+                'animal': numero_a_nombre(STATES[i]),
+                'frecuencia': int(conteos[i]),
+                'porcentaje': round(float(conteos[i]) / total * 100, 2) if total else 0.0,
+                'dias_sin_salir': int(huecos[i]) if huecos[i] >= 0 else None
+            }
+
+        vistos = np.flatnonzero(huecos >= 0)
+        return {
+            'hora': hora,
+            'etiqueta': etiqueta_hora(hora),
+            'total_sorteos': total,
+            'numeros_diferentes': len(vistos),
+            'top_frecuentes': [registro(i) for i in ranking.top_k(conteos, top).tolist() if conteos[i]],
+            'mas_atrasados': [registro(vistos[i]) for i in ranking.top_k(huecos[vistos], top).tolist()]
+        }
+
+    def horas_con_sorteos(self) -> list:
+        return np.flatnonzero(self.conteos.sum(axis=0)).tolist()
+
+    def predicciones(self, hora: int, top: int = 10, pesos: dict = None) -> list:
+        """
+        Ranking para una hora: frecuencia del número a esa hora y días sin salir a esa
+        hora (más días, más score; nunca visto cuenta como el mayor hueco).
+        """
+        if pesos is None:
+            pesos = PESOS_HORA
+        conteos = self.conteos[:, hora]
+        total = int(conteos.sum())
+        if total == 0:
+            return []
+
+        huecos = self.dias_sin_salir(hora)
+        score_frecuencia = _escalar(conteos)
+        score_recencia = _escalar(np.where(huecos >= 0, huecos, huecos.max() + 1))
+        score_total = pesos.get("freq", 0) * score_frecuencia + pesos.get("recency", 0) * score_recencia
+
+        predicciones = []
+        for i in ranking.top_k(score_total, top).tolist():
+            predicciones.append({
+                'Numero': STATES[i],
+                'Animal': numero_a_nombre(STATES[i]),
+                'Hora': etiqueta_hora(hora),
+                'Score_Total': round(float(score_total[i]), 3),
+                'Score_Frecuencia': round(float(score_frecuencia[i]), 3),
+                'Score_Recencia': round(float(score_recencia[i]), 3),
+                'Frecuencia_Hora': int(conteos[i]),
+                'Dias_Sin_Salir_Hora': int(huecos[i]) if huecos[i] >= 0 else None,
+                'Probabilidad_Porcentaje': round(float(conteos[i]) / total * 100, 2)
+            })
+        return predicciones
@@ -1,11 +1,19 @@
 # app.py - GUÁCHARO PREDICTOR API PARA RENDER
 import os
 import sys
-import importlib.util
 from datetime import datetime
 
-print("🚀 INICIANDO GUÁCHARO PREDICTOR API")
-print("=" * 50)
+# Mensajes de arranque solo si se piden (APP_BANNER=1); importar la app no imprime nada
+MOSTRAR_BANNER = os.environ.get('APP_BANNER', '0').lower() in ('1', 'true', 'yes')
+
+
+def log_arranque(mensaje):
+    if MOSTRAR_BANNER:
+        print(mensaje)
+
+
+log_arranque("🚀 INICIANDO GUÁCHARO PREDICTOR API")
+log_arranque("=" * 50)
 
 # ============================================
 # CONFIGURACIÓN DE RUTAS
@@ -14,243 +22,31 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 UTILS_DIR = os.path.join(BASE_DIR, 'utils')
 BACKEND_DIR = os.path.join(BASE_DIR, 'Backend')
 
-print(f"📁 Directorio base: {BASE_DIR}")
-print(f"📁 Carpeta utils: {UTILS_DIR}")
-print(f"📁 Carpeta Backend: {BACKEND_DIR}")
-
-# Agregar rutas al sys.path
-sys.path.insert(0, BASE_DIR)
-sys.path.insert(0, UTILS_DIR)
-sys.path.insert(0, BACKEND_DIR)
+log_arranque(f"📁 Directorio base: {BASE_DIR}")
 
 # ============================================
-# CARGAR MÓDULOS LOCALES (utils_map)
+# MÓDULOS LOCALES (utils_map)
 # ============================================
-def cargar_modulo_local(nombre_archivo):
-    """Carga un módulo Python desde archivo"""
-    # Buscar en utils/ primero, luego en Backend/utils/
-    rutas_posibles = [
-        os.path.join(UTILS_DIR, nombre_archivo),
-        os.path.join(BACKEND_DIR, 'utils', nombre_archivo),
-        os.path.join(BASE_DIR, nombre_archivo)
-    ]
-    
-    for ruta in rutas_posibles:
-        if os.path.exists(ruta):
-            try:
-                nombre_modulo = nombre_archivo.replace('.py', '')
-                spec = importlib.util.spec_from_file_location(nombre_modulo, ruta)
-                modulo = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(modulo)
-                print(f"✅ {nombre_archivo} cargado desde: {ruta}")
-                return modulo
-            except Exception as e:
-                print(f"❌ Error cargando {nombre_archivo} desde {ruta}: {e}")
-                continue
-    
-    print(f"⚠ {nombre_archivo} no encontrado en ninguna ubicación")
-    return None
-
-# Cargar utils_map
-utils_map = cargar_modulo_local('utils_map.py')
-
-if utils_map:
-    nombre_a_numero = utils_map.nombre_a_numero
-    numero_a_nombre = utils_map.numero_a_nombre
-    print(f"✅ utils_map.py cargado correctamente - 77 animales disponibles")
-else:
-    # Mapeo completo integrado - 77 animales del Guácharo Activo
-    print("✅ Usando mapeo completo integrado (77 animales)")
-    def nombre_a_numero(nombre):
-        """Convierte nombre de animal a número - Guácharo Activo (76 animales oficiales)"""
-        mapa = {
-            # 0-9
-            "delfin": 0, "delfín": 0,
-            "carnero": 1,
-            "toro": 2,
-            "ciempies": 3, "ciempiés": 3,
-            "alacrán": 4, "alacran": 4,
-            "león": 5, "leon": 5,
-            "rana": 6,
-            "perico": 7,
-            "ratón": 8, "raton": 8,
-            "águila": 9, "aguila": 9,
-            # 10-19
-            "tigre": 10,
-            "gato": 11,
-            "caballo": 12,
-            "mono": 13,
-            "paloma": 14,
-            "zorro": 15,
-            "oso": 16,
-            "pavo": 17,
-            "burro": 18,
-            "chivo": 19,
-            # 20-29
-            "cochino": 20,
-            "gallo": 21,
-            "camello": 22,
-            "cebra": 23,
-            "iguana": 24,
-            "gallina": 25,
-            "vaca": 26,
-            "perro": 27,
-            "zamuro": 28,
-            "elefante": 29,
-            # 30-39
-            "caimán": 30, "caiman": 30,
-            "lapa": 31,
-            "ardilla": 32,
-            "pescado": 33,
-            "venado": 34,
-            "jirafa": 35,
-            "culebra": 36,
-            "tortuga": 37,
-            "búfalo": 38, "bufalo": 38,
-            "lechuza": 39,
-            # 40-49
-            "avispa": 40,
-            "canguro": 41,
-            "tucán": 42, "tucan": 42,
-            "mariposa": 43,
-            "chigüire": 44, "chiguire": 44,
-            "garza": 45,
-            "puma": 46,
-            "pavo real": 47,
-            "puercoespín": 48, "puercoespin": 48,
-            "pereza": 49,
-            # 50-59
-            "canario": 50,
-            "pelícano": 51, "pelicano": 51,
-            "pulpo": 52,
-            "caracol": 53,
-            "grillo": 54,
-            "oso hormiguero": 55,
-            "tiburón": 56, "tiburon": 56,
-            "pato": 57,
-            "hormiga": 58,
-            "pantera": 59,
-            # 60-69
-            "camaleón": 60, "camaleon": 60,
-            "panda": 61,
-            "cachicamo": 62,
-            "cangrejo": 63,
-            "gavilán": 64, "gavilan": 64,
-            "araña": 65, "arana": 65,
-            "lobo": 66,
-            "avestruz": 67,
-            "jaguar": 68,
-            "conejo": 69,
-            # 70-75
-            "bisonte": 70,
-            "guacamaya": 71,
-            "gorila": 72,
-            "hipopótamo": 73, "hipopotamo": 73,
-            "turpial": 74,
-            "guácharo": 75, "guacharo": 75,
-            # Especial
-            "ballena": 100,
-            "00": 100
-        }
-        if nombre is None:
-            return None
-        texto_norm = str(nombre).lower().strip()
-        return mapa.get(texto_norm)
-    
-    def numero_a_nombre(numero):
-        """Convierte número a nombre de animal - Guácharo Activo (76 animales oficiales)"""
-        mapa = {
-            0: "Delfín",
-            1: "Carnero",
-            2: "Toro",
-            3: "Ciempiés",
-            4: "Alacrán",
-            5: "León",
-            6: "Rana",
-            7: "Perico",
-            8: "Ratón",
-            9: "Águila",
-            10: "Tigre",
-            11: "Gato",
-            12: "Caballo",
-            13: "Mono",
-            14: "Paloma",
-            15: "Zorro",
-            16: "Oso",
-            17: "Pavo",
-            18: "Burro",
-            19: "Chivo",
-            20: "Cochino",
-            21: "Gallo",
-            22: "Camello",
-            23: "Cebra",
-            24: "Iguana",
-            25: "Gallina",
-            26: "Vaca",
-            27: "Perro",
-            28: "Zamuro",
-            29: "Elefante",
-            30: "Caimán",
-            31: "Lapa",
-            32: "Ardilla",
-            33: "Pescado",
-            34: "Venado",
-            35: "Jirafa",
-            36: "Culebra",
-            37: "Tortuga",
-            38: "Búfalo",
-            39: "Lechuza",
-            40: "Avispa",
-            41: "Canguro",
-            42: "Tucán",
-            43: "Mariposa",
-            44: "Chigüire",
-            45: "Garza",
-            46: "Puma",
-            47: "Pavo Real",
-            48: "Puercoespín",
-            49: "Pereza",
-            50: "Canario",
-            51: "Pelícano",
-            52: "Pulpo",
-            53: "Caracol",
-            54: "Grillo",
-            55: "Oso Hormiguero",
-            56: "Tiburón",
-            57: "Pato",
-            58: "Hormiga",
-            59: "Pantera",
-            60: "Camaleón",
-            61: "Panda",
-            62: "Cachicamo",
-            63: "Cangrejo",
-            64: "Gavilán",
-            65: "Araña",
-            66: "Lobo",
-            67: "Avestruz",
-            68: "Jaguar",
-            69: "Conejo",
-            70: "Bisonte",
-            71: "Guacamaya",
-            72: "Gorila",
-            73: "Hipopótamo",
-            74: "Turpial",
-            75: "Guácharo",
-            100: "Ballena"
-        }
-        return mapa.get(numero, f"Animal-{numero}")
+# utils_map es la única tabla de animales: sin ella no hay mapeo confiable
+try:
+    from utils import utils_map
+except ImportError:
+    import utils_map
+
+nombre_a_numero = utils_map.nombre_a_numero
+numero_a_nombre = utils_map.numero_a_nombre
+log_arranque(f"✅ utils_map cargado - {len(utils_map.ESTADOS)} animales disponibles")
 
 # ============================================
 # CARGAR FLASK (dependencia externa)
 # ============================================
+# pandas/numpy y las dependencias de scraping se importan en el primer uso
 try:
-    from flask import Flask, jsonify, request
+    from flask import Flask, Response, jsonify, request
     from flask_cors import CORS
-    import pandas as pd
-    import numpy as np
     
     FLASK_AVAILABLE = True
-    print("✅ Flask y dependencias cargadas")
+    log_arranque("✅ Flask cargado")
     
 except ImportError as e:
     FLASK_AVAILABLE = False
@@ -263,9 +59,13 @@ except ImportError as e:
 app = Flask(__name__)
 CORS(app)
 
-print("✅ Aplicación Flask creada")
-print("🌐 Servidor listo")
-print("=" * 50)
+# Respuestas de los endpoints de lectura, ya serializadas
+from cache_respuestas import CacheRespuestas
+cache = CacheRespuestas(max_entradas=int(os.environ.get('CACHE_RESPUESTAS_MAX', 256)))
+
+log_arranque("✅ Aplicación Flask creada")
+log_arranque("🌐 Servidor listo")
+log_arranque("=" * 50)
 
 @app.route('/')
 def home():
@@ -279,10 +79,13 @@ def home():
             '/api/health': 'Estado del sistema',
             '/api/animals': 'Lista de animales',
             '/api/test': 'Prueba de funciones',
-            '/api/predict': 'Predicciones del modelo (params: top)',
+            '/api/predict': 'Predicciones del modelo (params: top, model=frecuencia|modelo|markov, as_of, markov_order, hora)',
+            '/api/predict/batch': 'Varias predicciones en una petición (POST, lista de {model, top, weights, window, as_of, markov_order, hour})',
             '/api/history': 'Historial de resultados (params: limit, fecha)',
+            '/api/history/export': 'Historial completo por bloques (params: formato=ndjson|csv, fecha, desde, hasta)',
             '/api/stats': 'Estadísticas generales',
-            '/api/update-data': 'Actualizar datos (POST)'
+            '/api/stats/by-hour': 'Frecuencias y días sin salir por hora de sorteo (params: hora, top)',
+            '/api/update-data': 'Encolar actualización de datos (POST); estado en /api/update-data/<job_id>'
         }
     })
 
@@ -312,12 +115,13 @@ def test():
     })
 
 @app.route('/api/animals')
+@cache.cacheada()
 def animals_list():
     """
     Retorna la lista completa de los 77 animales del Guácharo Activo
     """
     # Generar lista completa de animales (0-75 + 100)
-    numeros = list(range(0, 76)) + [100]
+    numeros = utils_map.ESTADOS
     animales = []
     
     for num in numeros:
@@ -342,92 +146,97 @@ def animals_list():
 # ENDPOINTS PARA LA APP MÓVIL
 # ============================================
 
-# Buscar CSV en múltiples ubicaciones
-def encontrar_csv():
-    """Busca el archivo CSV en diferentes ubicaciones"""
-    posibles_rutas = [
-        "resultados_guacharo.csv",
-        "Backend/resultados_guacharo.csv",
-        "data/resultados_guacharo.csv"
-    ]
-    
-    for ruta in posibles_rutas:
-        if os.path.exists(ruta):
-            return ruta
-    return None
+# Historial compartido: se lee y limpia una vez por versión del CSV.
+# dataset_store y los módulos de scoring importan pandas/numpy, así que se
+# importan en la primera petición que los necesita y no al arrancar.
+def obtener_dataset():
+    from dataset_store import store
+    return store.obtener()
+
+def version_datos():
+    """Versión del historial vigente (None si no hay datos); parte de la clave del caché"""
+    dataset = obtener_dataset()
+    return dataset.version if dataset is not None else None
 
 @app.route('/api/predict', methods=['GET'])
+@cache.cacheada(version_datos)
 def predict():
     """
-    Retorna predicciones del modelo
+    Retorna predicciones del modelo.
+    Con `model` (frecuencia, modelo o markov) y/o `as_of` (fecha/hora ISO 8601) predice
+    con otro modelo o como se habría predicho en ese instante; con model=modelo|markov
+    el estado sale de los checkpoints diarios, sin recalcular el historial truncado.
+    Con model=modelo|markov, `markov_order` (1-3) elige el orden de la cadena de Markov
+    y `hora` ("20" o "8:00 PM") la condiciona a la hora del sorteo a predecir.
+    Solo con `hora` rankea por frecuencia y días sin salir a esa hora.
     """
     try:
         top = request.args.get('top', 10, type=int)
-        
-        # Buscar CSV
-        csv_file = encontrar_csv()
-        if not csv_file:
+        model = request.args.get('model')
+        as_of = request.args.get('as_of')
+        hora = request.args.get('hora')
+        markov_order = request.args.get('markov_order')
+        
+        # Obtener datos (cacheados en memoria)
+        dataset = obtener_dataset()
+        if dataset is None:
             return jsonify({
                 'status': 'error',
                 'message': 'No hay datos disponibles'
             }), 404
         
-        # Cargar datos
-        df = pd.read_csv(csv_file)
-        
-        if df.empty:
+        if dataset.crudo.empty:
             return jsonify({
                 'status': 'error',
                 'message': 'El archivo de datos está vacío'
             }), 404
         
-        # Generar predicciones simples basadas en frecuencia
-        df['Num_Ganador'] = pd.to_numeric(df['Num_Ganador'], errors='coerce')
-        df = df.dropna(subset=['Num_Ganador'])
-        
-        # Contar frecuencias
-        frecuencias = df['Num_Ganador'].value_counts().head(top)
-        total_registros = len(df)
-        
-        # Convertir frecuencias a lista para evitar problemas con numpy
-        freq_values = list(frecuencias.values)
-        max_freq = max(freq_values) if freq_values else 1
+        if hora and not (model or as_of or markov_order):
+            from analitica_horaria import AnaliticaHoraria, etiqueta_hora, slot_de
+            slot = slot_de(hora)
+            if slot is None:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Hora inválida: {hora}'
+                }), 400
+            analitica = dataset.derivado('analitica_horaria', AnaliticaHoraria.desde_dataset)
+            predicciones = analitica.predicciones(slot, top)
+            return jsonify({
+                'status': 'success',
+                'hora': etiqueta_hora(slot),
+                'count': len(predicciones),
+                'predictions': predicciones,
+                'timestamp': datetime.now().isoformat()
+            })
         
-        predicciones = []
-        for numero, freq in frecuencias.items():
-            # Calcular scores normalizados (0-1)
-            score_frecuencia = min(float(freq) / float(max_freq), 1.0)
-            
-            # Score de recencia (basado en cuándo salió por última vez)
-            mask = df['Num_Ganador'] == numero
-            ultimas_apariciones = df[mask].index.tolist()
-            if ultimas_apariciones:
-                ultima_pos = max(ultimas_apariciones)
-                score_recencia = min((total_registros - ultima_pos) / total_registros, 1.0)
-            else:
-                score_recencia = 0.0
-            
-            # Score de tendencia (frecuencia en últimos 30 registros vs total)
-            ultimos_30 = df.tail(30)
-            freq_reciente = len(ultimos_30[ultimos_30['Num_Ganador'] == numero])
-            score_tendencia = min(freq_reciente / 30.0, 1.0) if len(ultimos_30) > 0 else 0.0
-            
-            # Score total (promedio ponderado)
-            score_total = (score_frecuencia * 0.4 + score_recencia * 0.3 + score_tendencia * 0.3)
-            
-            predicciones.append({
-                'Numero': int(float(numero)),
-                'Animal': numero_a_nombre(int(float(numero))),
-                'Score_Total': round(float(score_total), 3),
-                'Score_Frecuencia': round(float(score_frecuencia), 3),
-                'Score_Recencia': round(float(score_recencia), 3),
-                'Score_Tendencia': round(float(score_tendencia), 3),
-                'Frecuencia_Absoluta': int(freq),
-                'Probabilidad_Porcentaje': round((float(freq) / total_registros) * 100, 2)
+        if model or as_of or markov_order:
+            # Otro modelo o un instante pasado: mismo camino que /api/predict/batch
+            from predictor_lote import Lote, SpecInvalida, normalizar_spec
+            try:
+                spec = {'model': model or 'frecuencia', 'top': top, 'as_of': as_of, 'hour': hora}
+                if markov_order:
+                    spec['markov_order'] = int(markov_order) if markov_order.isdigit() else markov_order
+                spec = normalizar_spec(spec)
+            except SpecInvalida as e:
+                return jsonify({
+                    'status': 'error',
+                    'message': str(e)
+                }), 400
+            predicciones = Lote(dataset).evaluar(spec)
+            return jsonify({
+                'status': 'success',
+                'model': spec['model'],
+                'as_of': spec['as_of'],
+                'markov_order': spec['markov_order'],
+                'hora': spec['hour'],
+                'count': len(predicciones),
+                'predictions': predicciones,
+                'timestamp': datetime.now().isoformat()
             })
         
-        # Reordenar por Score_Total descendente
-        predicciones.sort(key=lambda x: x['Score_Total'], reverse=True)
+        # Generar predicciones simples basadas en frecuencia (vectorizado)
+        from predictor_frecuencia import generar_predicciones_frecuencia
+        predicciones = generar_predicciones_frecuencia(dataset.limpio, top)
         
         return jsonify({
             'status': 'success',
@@ -442,52 +251,103 @@ def predict():
             'message': str(e)
         }), 500
 
+def limites_fecha(fecha_filtro=None):
+    """
+    {'desde', 'hasta'} pedidos (draw_ts de inicio de día); `fecha_filtro` fija ambos.
+    ValueError si alguna fecha no es válida.
+    """
+    from indice_historial import inicio_del_dia
+    limites = {}
+    for nombre, valor in (('desde', fecha_filtro or request.args.get('desde')),
+                          ('hasta', fecha_filtro or request.args.get('hasta'))):
+        if valor:
+            limites[nombre] = inicio_del_dia(valor)
+            if limites[nombre] is None:
+                raise ValueError(f'Fecha inválida: {valor}')
+    return limites
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Evalúa varias configuraciones de predicción sobre el mismo historial cargado.
+    Body: lista de specs {model, top, weights, window, as_of, markov_order, hour} o {"specs": [...]}.
+    """
+    from predictor_lote import SpecInvalida, evaluar_lote
+    
+    cuerpo = request.get_json(silent=True)
+    specs = cuerpo.get('specs') if isinstance(cuerpo, dict) else cuerpo
+    
+    try:
+        dataset = obtener_dataset()
+        if dataset is None or dataset.crudo.empty:
+            return jsonify({
+                'status': 'error',
+                'message': 'No hay datos disponibles'
+            }), 404
+        
+        resultados = evaluar_lote(dataset, specs)
+        return jsonify({
+            'status': 'success',
+            'count': len(resultados),
+            'results': resultados,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except SpecInvalida as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 500
+
 @app.route('/api/history', methods=['GET'])
+@cache.cacheada(version_datos)
 def history():
     """
-    Retorna historial de resultados
+    Retorna historial de resultados, del más reciente al más antiguo.
+    Filtros: fecha (un día) o desde/hasta (inclusive), en dd/mm/yyyy o yyyy/mm/dd.
+    Paginación: pasar el next_cursor de la respuesta como ?cursor= para la página siguiente.
     """
+    from almacen_columnar import tipos_csv
+    from indice_historial import CursorInvalido, IndiceHistorial
+    
     try:
         limit = request.args.get('limit', 50, type=int)
         fecha_filtro = request.args.get('fecha', None)
+        cursor = request.args.get('cursor', None)
         
-        # Buscar CSV
-        csv_file = encontrar_csv()
-        if not csv_file:
+        # Obtener datos (cacheados en memoria)
+        dataset = obtener_dataset()
+        if dataset is None:
             return jsonify({
                 'status': 'error',
                 'message': 'No hay datos disponibles'
             }), 404
         
-        # Cargar datos
-        df = pd.read_csv(csv_file)
-        
-        # Aplicar filtro de fecha si existe
-        if fecha_filtro:
-            df = df[df['Fecha'] == fecha_filtro]
-        
-        # Convertir Fecha a datetime para ordenar correctamente
-        df['Fecha_dt'] = pd.to_datetime(df['Fecha'], format='%Y/%m/%d', errors='coerce')
-        
-        # Crear columna de hora en formato 24h para ordenar
-        def hora_a_24h(hora_str):
-            try:
-                from datetime import datetime
-                hora_obj = datetime.strptime(hora_str, '%I:%M %p')
-                return hora_obj.hour * 60 + hora_obj.minute
-            except:
-                return 0
-        
-        df['Hora_minutos'] = df['Hora'].apply(hora_a_24h)
-        
-        # Ordenar por fecha descendente y hora descendente (más recientes primero)
-        df = df.sort_values(['Fecha_dt', 'Hora_minutos'], ascending=[False, False])
-        
-        # Eliminar columnas auxiliares
-        df = df.drop(['Fecha_dt', 'Hora_minutos'], axis=1)
+        # Rango de fechas pedido (como inicio de día)
+        try:
+            limites = limites_fecha(fecha_filtro)
+        except ValueError as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
+        
+        # Índice ordenado por fecha/hora (se construye una vez por versión de datos)
+        indice = dataset.derivado('indice_historial', IndiceHistorial.desde_dataset)
+        try:
+            filas, next_cursor = indice.pagina(limit, cursor=cursor, **limites)
+        except CursorInvalido as e:
+            return jsonify({
+                'status': 'error',
+                'message': str(e)
+            }), 400
         
-        # Limitar resultados
-        df = df.head(limit)
+        df = tipos_csv(dataset.crudo.take(filas))
         
         # Convertir a JSON, reemplazando NaN con None
         resultados = df.fillna('').to_dict('records')
@@ -495,7 +355,8 @@ def history():
         return jsonify({
             'status': 'success',
             'count': len(resultados),
-            'results': resultados
+            'results': resultados,
+            'next_cursor': next_cursor
         })
         
     except Exception as e:
@@ -504,73 +365,63 @@ def history():
             'message': str(e)
         }), 500
 
+@app.route('/api/history/export', methods=['GET'])
+def history_export():
+    """
+    Historial completo (o el rango desde/hasta) en orden cronológico, como NDJSON o CSV.
+    Se envía por bloques a medida que se serializa y no pasa por el caché de respuestas.
+    """
+    from exportacion import FORMATOS, generar
+    from indice_historial import IndiceHistorial
+    
+    formato = request.args.get('formato', 'ndjson').lower()
+    if formato not in FORMATOS:
+        return jsonify({
+            'status': 'error',
+            'message': f'Formato no soportado: {formato} (usar {" o ".join(FORMATOS)})'
+        }), 400
+    
+    try:
+        limites = limites_fecha(request.args.get('fecha'))
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+    
+    dataset = obtener_dataset()
+    if dataset is None:
+        return jsonify({
+            'status': 'error',
+            'message': 'No hay datos disponibles'
+        }), 404
+    
+    # El generador conserva este dataset aunque una ingesta lo reemplace a mitad de la descarga
+    indice = dataset.derivado('indice_historial', IndiceHistorial.desde_dataset)
+    inicio, fin = indice.rango_dias(**limites)
+    respuesta = Response(generar(formato, dataset.crudo, indice.filas[inicio:fin]), mimetype=FORMATOS[formato])
+    respuesta.headers['Content-Disposition'] = f'attachment; filename=historial_guacharo.{formato}'
+    return respuesta
+
 @app.route('/api/stats', methods=['GET'])
+@cache.cacheada(version_datos)
 def stats():
     """
     Retorna estadísticas generales
     """
     try:
-        # Buscar CSV
-        csv_file = encontrar_csv()
-        if not csv_file:
+        # Obtener datos (cacheados en memoria, Num_Ganador ya es int)
+        dataset = obtener_dataset()
+        if dataset is None:
             return jsonify({
                 'status': 'error',
                 'message': 'No hay datos disponibles'
             }), 404
         
-        # Cargar datos
-        df = pd.read_csv(csv_file)
-        
-        # Convertir Num_Ganador a numérico
-        df['Num_Ganador'] = pd.to_numeric(df['Num_Ganador'], errors='coerce')
-        df = df.dropna(subset=['Num_Ganador'])
-        df['Num_Ganador'] = df['Num_Ganador'].astype(int)
-        
-        # Estadísticas básicas
-        total_sorteos = len(df)
-        
-        # Top 10 más frecuentes
-        top_frecuentes = df['Num_Ganador'].value_counts().head(10)
-        top_list = []
-        for num, count in top_frecuentes.items():
-            top_list.append({
-                'numero': int(num),
-                'animal': numero_a_nombre(int(num)),
-                'frecuencia': int(count),
-                'porcentaje': round((count / total_sorteos) * 100, 2)
-            })
-        
-        # Números únicos que han salido
-        numeros_salidos = sorted(df['Num_Ganador'].unique().tolist())
-        
-        # Estadísticas por hora
-        stats_hora = df.groupby('Hora').size().to_dict()
-        
-        # Último resultado
-        ultimo = df.iloc[-1] if not df.empty else None
-        ultimo_resultado = {
-            'fecha': ultimo['Fecha'],
-            'hora': ultimo['Hora'],
-            'animal': ultimo['Animal_Gan'],
-            'numero': int(ultimo['Num_Ganador'])
-        } if ultimo is not None else None
-        
-        # Convertir fechas a string para evitar NaN en JSON
-        fecha_min = str(df['Fecha'].min()) if not pd.isna(df['Fecha'].min()) else 'N/A'
-        fecha_max = str(df['Fecha'].max()) if not pd.isna(df['Fecha'].max()) else 'N/A'
-        
-        return jsonify({
-            'status': 'success',
-            'total_sorteos': int(total_sorteos),
-            'numeros_diferentes': int(len(numeros_salidos)),
-            'top_frecuentes': top_list,
-            'por_hora': {str(k): int(v) for k, v in stats_hora.items()},
-            'ultimo_resultado': ultimo_resultado,
-            'rango_fechas': {
-                'desde': fecha_min,
-                'hasta': fecha_max
-            }
-        })
+        # Snapshot precalculado una sola vez por versión de datos
+        from stats_snapshot import construir_snapshot
+        snapshot = dataset.derivado('stats', lambda ds: construir_snapshot(ds.limpio, ds.draw_ts_limpio))
+        return jsonify(snapshot.a_dict(numero_a_nombre))
         
     except Exception as e:
         return jsonify({
@@ -578,93 +429,98 @@ def stats():
             'message': str(e)
         }), 500
 
-@app.route('/api/update-data', methods=['POST'])
-def update_data():
+@app.route('/api/stats/by-hour', methods=['GET'])
+@cache.cacheada(version_datos)
+def stats_by_hour():
     """
-    Actualiza los datos ejecutando el script de scraping
+    Por cada hora de sorteo (o solo `hora`): números más frecuentes y los que
+    llevan más días sin salir a esa hora
     """
+    from analitica_horaria import AnaliticaHoraria, slot_de
+    
     try:
-        import subprocess
-        import requests
-        from bs4 import BeautifulSoup
-        import pandas as pd
-        from datetime import datetime
-        
-        print("🔄 Iniciando actualización de datos...")
-        
-        # URL del sitio web
-        URL = "https://lotoven.com/animalito/guacharoactivo/historial/"
-        CSV_FILE = "resultados_guacharo.csv"
-        
-        # Hacer scraping directo
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(URL, headers=headers, timeout=30)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Buscar la tabla de resultados
-        tabla = soup.find('table') or soup.find('div', class_='table')
+        top = request.args.get('top', 5, type=int)
+        hora = request.args.get('hora')
+        slot = slot_de(hora) if hora else None
+        if hora and slot is None:
+            return jsonify({
+                'status': 'error',
+                'message': f'Hora inválida: {hora}'
+            }), 400
         
-        if not tabla:
+        dataset = obtener_dataset()
+        if dataset is None:
             return jsonify({
                 'status': 'error',
-                'message': 'No se encontró la tabla de resultados en el sitio web'
+                'message': 'No hay datos disponibles'
             }), 404
         
-        # Extraer datos (implementación básica)
-        resultados = []
-        filas = tabla.find_all('tr')[1:] if tabla.find_all('tr') else []
-        
-        for fila in filas[:50]:  # Limitar a 50 resultados más recientes
-            celdas = fila.find_all(['td', 'th'])
-            if len(celdas) >= 3:
-                fecha = celdas[0].get_text(strip=True)
-                hora = celdas[1].get_text(strip=True)
-                animal = celdas[2].get_text(strip=True)
-                
-                # Mapear animal a número (usando función integrada)
-                numero = nombre_a_numero(animal.lower())
-                
-                if fecha and hora and animal:
-                    resultados.append({
-                        'Fecha': fecha,
-                        'Hora': hora,
-                        'Animal_Gan': animal,
-                        'Num_Ganador': numero or ''
-                    })
+        # Tensor 77x24 precalculado (se extiende con los sorteos nuevos tras cada ingesta)
+        analitica = dataset.derivado('analitica_horaria', AnaliticaHoraria.desde_dataset)
+        horas = [slot] if slot is not None else analitica.horas_con_sorteos()
+        return jsonify({
+            'status': 'success',
+            'count': len(horas),
+            'por_hora': [analitica.resumen(h, top) for h in horas]
+        })
         
-        if resultados:
-            # Crear DataFrame y guardar
-            df = pd.DataFrame(resultados)
-            df.to_csv(CSV_FILE, index=False)
-            
-            return jsonify({
-                'status': 'success',
-                'message': 'Datos actualizados correctamente',
-                'total_registros': len(resultados),
-                'ultimo_resultado': resultados[0] if resultados else None,
-                'timestamp': datetime.now().isoformat()
-            })
-        else:
-            return jsonify({
-                'status': 'warning',
-                'message': 'No se encontraron resultados nuevos'
-            })
-            
-    except requests.RequestException as e:
+    except Exception as e:
         return jsonify({
             'status': 'error',
-            'message': f'Error de conexión al sitio web: {str(e)}'
+            'message': str(e)
         }), 500
-    except Exception as e:
+
+# ============================================
+# INGESTA EN SEGUNDO PLANO
+# ============================================
+from ingestor import Ingestor
+
+def al_ingerir(nuevos):
+    """Tras agregar sorteos: recargar el historial y descartar respuestas cacheadas"""
+    from dataset_store import store
+    store.invalidar()
+    cache.invalidar()
+
+ingestor = Ingestor(
+    al_terminar=al_ingerir,
+    programado=os.environ.get('INGESTA_AUTOMATICA', '1').lower() in ('1', 'true', 'yes'),
+    minuto=int(os.environ.get('INGESTA_MINUTO', 5))
+)
+
+def iniciar_ingestor():
+    """Arranca el thread de ingesta (una vez por proceso; ver gunicorn.conf.py)"""
+    ingestor.iniciar()
+
+@app.route('/api/update-data', methods=['POST'])
+def update_data():
+    """
+    Encola una actualización de datos y retorna de inmediato (202) con el id del trabajo.
+    El estado se consulta en /api/update-data/<job_id>.
+    """
+    job_id = ingestor.encolar('manual')
+    return jsonify({
+        'status': 'accepted',
+        'message': 'Actualización en curso',
+        'job_id': job_id,
+        'status_url': f'/api/update-data/{job_id}',
+        'timestamp': datetime.now().isoformat()
+    }), 202
+
+@app.route('/api/update-data/<job_id>', methods=['GET'])
+def update_data_status(job_id):
+    """
+    Estado de un trabajo de actualización: pendiente, en_curso, completado, omitido o error
+    """
+    trabajo = ingestor.estado(job_id)
+    if trabajo is None:
         return jsonify({
             'status': 'error',
-            'message': f'Error actualizando datos: {str(e)}'
-        }), 500
+            'message': f'Trabajo no encontrado: {job_id}'
+        }), 404
+    return jsonify({
+        'status': 'success',
+        'job': trabajo
+    })
 
 if __name__ == '__main__':
     import os
@@ -675,10 +531,19 @@ if __name__ == '__main__':
     # Detectar si estamos en producción
     is_production = os.environ.get('RAILWAY_ENVIRONMENT') or os.environ.get('RENDER')
     
+    # Modo debug solo si se pide explícitamente (FLASK_DEBUG=1)
+    debug = os.environ.get('FLASK_DEBUG', '0').lower() in ('1', 'true', 'yes')
+    
     if not is_production:
         print("\n🎯 INICIANDO SERVIDOR LOCAL...")
         print(f"📍 Puerto: {port}")
+        print(f"📍 Debug: {'activado' if debug else 'desactivado'} (FLASK_DEBUG)")
+        print("📍 Para producción: gunicorn -c gunicorn.conf.py wsgi:app")
         print("📍 Presiona Ctrl+C para detener")
         print("=" * 50)
     
-    app.run(host='0.0.0.0', port=port, debug=not is_production)
\ No newline at end of file
+    # Con el recargador de debug, solo en el proceso que atiende peticiones
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        iniciar_ingestor()
+    
+    app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Carga histórica del Guácharo Activo por rango de fechas.
+
+Descarga en paralelo las páginas del historial (una por cada bloque de
+--dias-por-pagina días) con una sesión HTTP compartida (keep-alive, reintentos
+con backoff) y agrega las filas de cada página al almacén columnar a medida
+que llegan. Al terminar regenera el CSV y lo compacta una sola vez.
+
+Uso:
+    python backfill.py --desde 2023-01-01 --hasta 2025-11-30
+    python backfill.py --desde 2024-01-01 --hasta 2024-12-31 --workers 8 \\
+        --url-plantilla "https://lotoven.com/animalito/guacharoactivo/historial/?desde={desde}&hasta={hasta}"
+
+La plantilla recibe {desde} y {hasta} con el formato --formato-fecha.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import almacen_columnar
+import data_update
+from ingestor import lock_ingesta
+
+URL_PLANTILLA = data_update.URL + "?desde={desde}&hasta={hasta}"
+COLUMNAS = ["Fecha", "Hora", "Animal_Gan", "Num_Ganador"]
+
+
+def crear_sesion(conexiones: int = 8, reintentos: int = 3, backoff: float = 0.5) -> requests.Session:
+    """Sesión con pool de conexiones keep-alive y reintentos con backoff exponencial"""
+    sesion = requests.Session()
+    reintento = Retry(total=reintentos, backoff_factor=backoff,
+                      status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=("GET",), respect_retry_after_header=True)
+    adaptador = HTTPAdapter(max_retries=reintento, pool_connections=conexiones, pool_maxsize=conexiones)
+    sesion.mount("http://", adaptador)
+    sesion.mount("https://", adaptador)
+    sesion.headers["User-Agent"] = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    return sesion
+
+
+def paginas(desde: date, hasta: date, dias_por_pagina: int):
+    """Bloques (inicio, fin) consecutivos que cubren [desde, hasta]"""
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(inicio + timedelta(days=dias_por_pagina - 1), hasta)
+        yield inicio, fin
+        inicio = fin + timedelta(days=1)
+
+
+def _descargar_pagina(sesion, plantilla, formato, inicio, fin):
+    url = plantilla.format(desde=inicio.strftime(formato), hasta=fin.strftime(formato))
+    return data_update.parsear_historial(data_update.descargar(url, sesion))
+
+
+def _filas_con_resultado(historial) -> pd.DataFrame:
+    filas = [item for item in historial if not data_update._es_vacio(item["Animal_Gan"])]
+    return pd.DataFrame(filas, columns=COLUMNAS)
+
+
+def backfill(desde: date, hasta: date, plantilla: str = URL_PLANTILLA, formato: str = "%Y-%m-%d",
+             dias_por_pagina: int = 7, workers: int = 4, reintentos: int = 3, backoff: float = 0.5) -> dict:
+    """
+    Descarga el rango y lo agrega al historial. Retorna un resumen
+    (páginas, páginas con error, filas agregadas).
+    """
+    bloques = list(paginas(desde, hasta, dias_por_pagina))
+    directorio = almacen_columnar.directorio_de(data_update.CSV_FILE)
+    resumen = {"paginas": len(bloques), "errores": 0, "filas": 0}
+
+    # Una sola escritura a la vez con el ingestor programado
+    with lock_ingesta():
+        # El almacén debe reflejar el CSV actual antes de agregarle filas
+        data_update.actualizar_columnar()
+
+        sesion = crear_sesion(workers, reintentos, backoff)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            tareas = {executor.submit(_descargar_pagina, sesion, plantilla, formato, inicio, fin): (inicio, fin)
+                      for inicio, fin in bloques}
+            for i, tarea in enumerate(as_completed(tareas), 1):
+                inicio, fin = tareas[tarea]
+                try:
+                    df = _filas_con_resultado(tarea.result())
+                except (requests.RequestException, RuntimeError) as e:
+                    resumen["errores"] += 1
+                    print(f"❌ {inicio} a {fin}: {e}")
+                    continue
+                # Cada página va directo al almacén (escritura solo de las filas nuevas)
+                if not df.empty:
+                    almacen_columnar.agregar(df, directorio)
+                    resumen["filas"] += len(df)
+                print(f"   {i}/{len(bloques)} páginas - {inicio} a {fin}: {len(df)} sorteos")
+
+        if resumen["filas"]:
+            # CSV de compatibilidad y deduplicación, una sola vez al final
+            almacen_columnar.exportar_csv(directorio, data_update.CSV_FILE)
+            data_update.compactar()
+    return resumen
+
+
+def _fecha(texto: str) -> date:
+    return datetime.strptime(texto, "%Y-%m-%d").date()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga histórica del Guácharo Activo por rango de fechas")
+    parser.add_argument("--desde", type=_fecha, required=True, help="Fecha inicial (YYYY-MM-DD)")
+    parser.add_argument("--hasta", type=_fecha, default=date.today(), help="Fecha final (YYYY-MM-DD)")
+    parser.add_argument("--url-plantilla", default=URL_PLANTILLA)
+    parser.add_argument("--formato-fecha", default="%Y-%m-%d", help="Formato de {desde}/{hasta} en la URL")
+    parser.add_argument("--dias-por-pagina", type=int, default=7)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--reintentos", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print(f"📥 CARGA HISTÓRICA {args.desde} a {args.hasta}")
+    print("=" * 60)
+
+    inicio = time.perf_counter()
+    resumen = backfill(args.desde, args.hasta, args.url_plantilla, args.formato_fecha,
+                       args.dias_por_pagina, args.workers, args.reintentos, args.backoff)
+
+    print(f"\n✅ {resumen['filas']} sorteos de {resumen['paginas']} páginas "
+          f"({resumen['errores']} con error) en {time.perf_counter() - inicio:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
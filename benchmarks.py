@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+Benchmarks de rendimiento del backend.
+
+Uso:
+    python benchmarks.py predict [--filas 10000 100000 1000000]
+    python benchmarks.py carga [--filas 100000 1000000]
+    python benchmarks.py servidor --url http://127.0.0.1:5000 [--concurrencia 16 --segundos 10]
+    python benchmarks.py arranque [--rutas /api/health /api/predict]
+    python benchmarks.py html [--fixtures fixtures/lotoven_historial.html]
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+import almacen_columnar
+from predictor_frecuencia import generar_predicciones_frecuencia
+from utils_map import numero_a_nombre
+
+ESTADOS = np.array([0, 100] + list(range(1, 76)))
+HORAS = ["8:00 AM", "9:00 AM", "10:00 AM", "11:00 AM", "12:00 PM", "1:00 PM",
+         "2:00 PM", "3:00 PM", "4:00 PM", "5:00 PM", "6:00 PM", "7:00 PM"]
+
+
+def historial_sintetico(filas: int, semilla: int = 0) -> pd.DataFrame:
+    """Historial aleatorio con el formato del CSV (12 sorteos por día)"""
+    rng = np.random.default_rng(semilla)
+    numeros = rng.choice(ESTADOS, size=filas)
+    dias = pd.Timestamp("2020-01-01") + pd.to_timedelta(np.arange(filas) // len(HORAS), unit="D")
+    return pd.DataFrame({
+        "Fecha": dias.strftime("%d/%m/%Y"),
+        "Hora": np.array(HORAS)[np.arange(filas) % len(HORAS)],
+        "Animal_Gan": [numero_a_nombre(int(n)) for n in numeros],
+        "Num_Ganador": numeros.astype(float),
+    })
+
+
+def medir(funcion, repeticiones: int = 3) -> float:
+    """Mejor tiempo (segundos) de varias ejecuciones"""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+# ======================================================
+#   /api/predict: BUCLE POR CANDIDATO vs VECTORIZADO
+# ======================================================
+def _predicciones_por_candidato(df: pd.DataFrame, top: int) -> list:
+    """Implementación anterior de /api/predict (un escaneo del DataFrame por candidato)"""
+    frecuencias = df['Num_Ganador'].value_counts().head(top)
+    total_registros = len(df)
+    freq_values = list(frecuencias.values)
+    max_freq = max(freq_values) if freq_values else 1
+
+    predicciones = []
+    for numero, freq in frecuencias.items():
+        score_frecuencia = min(float(freq) / float(max_freq), 1.0)
+        mask = df['Num_Ganador'] == numero
+        ultimas_apariciones = df[mask].index.tolist()
+        if ultimas_apariciones:
+            ultima_pos = max(ultimas_apariciones)
+            score_recencia = min((total_registros - ultima_pos) / total_registros, 1.0)
+        else:
+            score_recencia = 0.0
+        ultimos_30 = df.tail(30)
+        freq_reciente = len(ultimos_30[ultimos_30['Num_Ganador'] == numero])
+        score_tendencia = min(freq_reciente / 30.0, 1.0) if len(ultimos_30) > 0 else 0.0
+        score_total = (score_frecuencia * 0.4 + score_recencia * 0.3 + score_tendencia * 0.3)
+        predicciones.append({
+            'Numero': int(float(numero)),
+            'Animal': numero_a_nombre(int(float(numero))),
+            'Score_Total': round(float(score_total), 3),
+            'Score_Frecuencia': round(float(score_frecuencia), 3),
+            'Score_Recencia': round(float(score_recencia), 3),
+            'Score_Tendencia': round(float(score_tendencia), 3),
+            'Frecuencia_Absoluta': int(freq),
+            'Probabilidad_Porcentaje': round((float(freq) / total_registros) * 100, 2)
+        })
+    predicciones.sort(key=lambda x: x['Score_Total'], reverse=True)
+    return predicciones
+
+
+def bench_predict(filas_lista, top: int = 10):
+    print("📊 /api/predict - scoring por candidato vs vectorizado")
+    print(f"{'filas':>10} {'anterior (ms)':>14} {'vectorizado (ms)':>17} {'speedup':>8}  iguales")
+    for filas in filas_lista:
+        df = historial_sintetico(filas)
+        df['Num_Ganador'] = df['Num_Ganador'].astype(int)
+        # Simular filas descartadas para que el índice no sea contiguo
+        df = df.drop(df.index[::97])
+
+        anterior = _predicciones_por_candidato(df, top)
+        nuevo = generar_predicciones_frecuencia(df, top)
+
+        t_anterior = medir(lambda: _predicciones_por_candidato(df, top))
+        t_nuevo = medir(lambda: generar_predicciones_frecuencia(df, top))
+        print(f"{filas:>10} {t_anterior * 1000:>14.2f} {t_nuevo * 1000:>17.2f} "
+              f"{t_anterior / t_nuevo:>7.1f}x  {'✅' if anterior == nuevo else '❌'}")
+
+
+# ======================================================
+#   CARGA EN FRÍO: pd.read_csv vs ALMACÉN COLUMNAR
+# ======================================================
+# Cada medición corre en un proceso nuevo: tiempo de carga y RSS residente
+# por encima del proceso con pandas ya importado.
+_SCRIPT_CARGA = """
+import json, os, resource, sys, time
+import pandas as pd
+import almacen_columnar
+
+def rss_kb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+metodo, ruta = sys.argv[1], sys.argv[2]
+base = rss_kb()
+inicio = time.perf_counter()
+if metodo == "csv":
+    df = pd.read_csv(ruta)
+    suma = df["Num_Ganador"].sum()
+else:
+    df, columnas = almacen_columnar.cargar(ruta)
+    suma = df["Num_Ganador"].sum()
+segundos = time.perf_counter() - inicio
+print(json.dumps({"segundos": segundos, "rss_kb": rss_kb() - base, "filas": len(df)}))
+"""
+
+
+def _medir_carga(metodo: str, ruta: str) -> dict:
+    salida = subprocess.run([sys.executable, "-c", _SCRIPT_CARGA, metodo, ruta],
+                            capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def bench_carga(filas_lista):
+    print("📊 Carga del historial - pd.read_csv vs almacén columnar (proceso nuevo)")
+    print(f"{'filas':>10} {'csv (ms)':>10} {'columnar (ms)':>14} {'csv RSS (MB)':>13} {'col. RSS (MB)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for filas in filas_lista:
+            ruta_csv = os.path.join(tmp, f"historial_{filas}.csv")
+            df = historial_sintetico(filas)
+            df.to_csv(ruta_csv, index=False)
+            directorio = almacen_columnar.directorio_de(ruta_csv)
+            almacen_columnar.escribir(df, directorio)
+
+            csv = _medir_carga("csv", ruta_csv)
+            col = _medir_carga("columnar", directorio)
+            print(f"{filas:>10} {csv['segundos'] * 1000:>10.1f} {col['segundos'] * 1000:>14.1f} "
+                  f"{csv['rss_kb'] / 1024:>13.1f} {col['rss_kb'] / 1024:>14.1f}")
+
+
+# ======================================================
+#   THROUGHPUT HTTP DE UN SERVIDOR EN EJECUCIÓN
+# ======================================================
+URLS_SERVIDOR = ("/api/predict", "/api/history?limit=100", "/api/stats", "/api/animals")
+
+
+def bench_servidor(url_base: str, concurrencia: int, segundos: float):
+    """Peticiones por segundo con `concurrencia` clientes pidiendo URLS_SERVIDOR en ronda"""
+    fin = time.perf_counter() + segundos
+    latencias, errores = [], [0]
+    lock = threading.Lock()
+
+    def cliente(desplazamiento):
+        propias = []
+        i = desplazamiento
+        while time.perf_counter() < fin:
+            url = url_base.rstrip("/") + URLS_SERVIDOR[i % len(URLS_SERVIDOR)]
+            i += 1
+            inicio = time.perf_counter()
+            try:
+                with urllib.request.urlopen(url, timeout=30) as respuesta:
+                    respuesta.read()
+                propias.append(time.perf_counter() - inicio)
+            except OSError:
+                with lock:
+                    errores[0] += 1
+        with lock:
+            latencias.extend(propias)
+
+    hilos = [threading.Thread(target=cliente, args=(i,)) for i in range(concurrencia)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    latencias = np.array(latencias) * 1000
+    print(f"📊 {url_base} - {concurrencia} clientes, {segundos:.0f}s")
+    print(f"   peticiones/s: {len(latencias) / segundos:.1f}   errores: {errores[0]}")
+    if len(latencias):
+        print(f"   latencia p50: {np.percentile(latencias, 50):.1f} ms   p99: {np.percentile(latencias, 99):.1f} ms")
+
+
+# ======================================================
+#   ARRANQUE EN FRÍO DE app.py
+# ======================================================
+def desglose_imports(directorio: str, top: int = 15) -> dict:
+    """Imports directos de app.py que más tardan (-X importtime, ms acumulados)"""
+    salida = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                            capture_output=True, text=True, cwd=directorio)
+    hijos, tiempos, total = [], {}, 0.0
+    for linea in salida.stderr.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea:
+            continue
+        _, acumulado, nombre = linea[len("import time:"):].split("|")
+        if not acumulado.strip().isdigit():
+            continue
+        nombre = nombre[1:]
+        profundidad = (len(nombre) - len(nombre.lstrip())) // 2
+        # Un módulo aparece después de todo lo que importa
+        if profundidad == 1:
+            hijos.append((nombre.strip(), int(acumulado) / 1000))
+        elif profundidad == 0:
+            if nombre.strip() == "app":
+                tiempos, total = dict(hijos), int(acumulado) / 1000
+            hijos = []
+    print(f"⏱ import app: {total:.1f} ms; imports directos (ms, acumulado)")
+    for nombre, ms in sorted(tiempos.items(), key=lambda x: -x[1])[:top]:
+        print(f"   {ms:>8.1f}  {nombre}")
+    return tiempos
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def tiempo_primera_respuesta(directorio: str, rutas, limite: float = 60) -> dict:
+    """Lanza `python app.py` y mide cuánto tarda cada ruta en responder por primera vez"""
+    puerto = _puerto_libre()
+    entorno = dict(os.environ, PORT=str(puerto), FLASK_DEBUG="0")
+    inicio = time.perf_counter()
+    proceso = subprocess.Popen([sys.executable, "app.py"], cwd=directorio, env=entorno,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    tiempos = {}
+    try:
+        for ruta in rutas:
+            while time.perf_counter() - inicio < limite:
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{puerto}{ruta}", timeout=limite) as r:
+                        r.read()
+                    tiempos[ruta] = time.perf_counter() - inicio
+                    break
+                except OSError:
+                    time.sleep(0.01)
+    finally:
+        proceso.terminate()
+        proceso.wait()
+    return tiempos
+
+
+def bench_arranque(directorio: str, rutas, repeticiones: int = 3):
+    desglose_imports(directorio)
+    print(f"\n📊 Tiempo hasta la primera respuesta de python app.py (mejor de {repeticiones})")
+    mejores = {}
+    for _ in range(repeticiones):
+        for ruta, segundos in tiempo_primera_respuesta(directorio, rutas).items():
+            mejores[ruta] = min(segundos, mejores.get(ruta, float("inf")))
+    for ruta in rutas:
+        valor = f"{mejores[ruta] * 1000:.0f} ms" if ruta in mejores else "sin respuesta"
+        print(f"   {ruta:<20} {valor}")
+
+
+# ======================================================
+#   EXTRACCIÓN DE LA TABLA DEL HISTORIAL (HTML GUARDADO)
+# ======================================================
+def _filas_pagina_completa(html):
+    """Extracción anterior: árbol de toda la página con html.parser y find_all sobre todo"""
+    from bs4 import BeautifulSoup
+    tabla = BeautifulSoup(html, "html.parser").find("table")
+    return [[c.get_text(" ", strip=True) for c in fila.find_all(["th", "td"])]
+            for fila in tabla.find_all("tr")]
+
+
+def _medir_extraccion(extraer, html, repeticiones: int) -> dict:
+    segundos = medir(lambda: extraer(html), repeticiones)
+    tracemalloc.start()
+    extraer(html)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": segundos * 1000, "pico_kb": pico / 1024}
+
+
+def bench_html(rutas, repeticiones: int = 20):
+    import data_update
+
+    metodos = {"página completa (html.parser)": _filas_pagina_completa}
+    for parser in dict.fromkeys(["html.parser", data_update.PARSER_HTML]):
+        metodos[f"solo tabla ({parser})"] = lambda html, p=parser: list(data_update.iterar_filas_tabla(html, p))
+
+    for ruta in rutas:
+        with open(ruta, "rb") as f:
+            html = f.read()
+        print(f"\n📊 {os.path.basename(ruta)} ({len(html) / 1024:.0f} KB, mejor de {repeticiones})")
+        referencia = _filas_pagina_completa(html)
+        for nombre, extraer in metodos.items():
+            if extraer(html) != referencia:
+                print(f"   ❌ {nombre}: las filas no coinciden con la extracción completa")
+                continue
+            r = _medir_extraccion(extraer, html, repeticiones)
+            print(f"   {nombre:<32} {r['ms']:>8.2f} ms   pico {r['pico_kb']:>8.0f} KB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del backend Guácharo")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    p_predict = sub.add_parser("predict", help="Scoring de /api/predict")
+    p_predict.add_argument("--filas", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    p_predict.add_argument("--top", type=int, default=10)
+
+    p_carga = sub.add_parser("carga", help="Carga en frío: CSV vs almacén columnar")
+    p_carga.add_argument("--filas", type=int, nargs="+", default=[100_000, 1_000_000])
+
+    p_servidor = sub.add_parser("servidor", help="Throughput HTTP de un servidor en ejecución")
+    p_servidor.add_argument("--url", default="http://127.0.0.1:5000")
+    p_servidor.add_argument("--concurrencia", type=int, default=16)
+    p_servidor.add_argument("--segundos", type=float, default=10)
+
+    p_arranque = sub.add_parser("arranque", help="Import time y tiempo hasta la primera respuesta")
+    p_arranque.add_argument("--rutas", nargs="+", default=["/api/health", "/api/predict"])
+    p_arranque.add_argument("--directorio", default=os.path.dirname(os.path.abspath(__file__)),
+                            help="Directorio con el app.py a medir")
+    p_arranque.add_argument("--repeticiones", type=int, default=3)
+
+    p_html = sub.add_parser("html", help="Extracción de la tabla del historial desde HTML guardado")
+    p_html.add_argument("--fixtures", nargs="+",
+                        default=[os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "lotoven_historial.html")])
+    p_html.add_argument("--repeticiones", type=int, default=20)
+
+    args = parser.parse_args()
+    if args.benchmark == "predict":
+        bench_predict(args.filas, args.top)
+    elif args.benchmark == "carga":
+        bench_carga(args.filas)
+    elif args.benchmark == "servidor":
+        bench_servidor(args.url, args.concurrencia, args.segundos)
+    elif args.benchmark == "arranque":
+        bench_arranque(args.directorio, args.rutas, args.repeticiones)
+    elif args.benchmark == "html":
+        bench_html(args.fixtures, args.repeticiones)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+# cache_respuestas.py - CACHÉ DE RESPUESTAS JSON YA SERIALIZADAS
+import functools
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+from flask import make_response, request
+
+# Por debajo de este tamaño no vale la pena comprimir
+MIN_BYTES_GZIP = 1024
+
+
+class CacheRespuestas:
+    """
+    Guarda el cuerpo ya codificado de las respuestas 200 de los endpoints de lectura,
+    por endpoint + parámetros normalizados + versión de datos.
+
+    El ETag sale de la clave (incluida la versión), así que un If-None-Match
+    se responde con 304 sin volver a generar la respuesta. Al cambiar la versión
+    de datos las claves viejas dejan de usarse y salen por LRU.
+    """
+
+    def __init__(self, max_entradas: int = 256):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidar(self):
+        """Descarta todas las respuestas guardadas"""
+        with self._lock:
+            self._entradas.clear()
+
+    def _obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+            return entrada
+
+    def _guardar(self, clave, entrada):
+        with self._lock:
+            self._entradas[clave] = entrada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    @staticmethod
+    def _responder(entrada, etag):
+        cuerpo = entrada['cuerpo']
+        comprimir = len(cuerpo) >= MIN_BYTES_GZIP and 'gzip' in request.accept_encodings
+        if comprimir:
+            if entrada.get('gzip') is None:
+                entrada['gzip'] = gzip.compress(cuerpo, 6)
+            cuerpo = entrada['gzip']
+
+        respuesta = make_response(cuerpo)
+        respuesta.mimetype = entrada['mimetype']
+        respuesta.set_etag(etag, weak=True)
+        respuesta.vary.add('Accept-Encoding')
+        if comprimir:
+            respuesta.headers['Content-Encoding'] = 'gzip'
+        return respuesta
+
+    def cacheada(self, version=None):
+        """
+        Decorador para una vista de solo lectura.
+        `version` es una función que retorna la versión de datos vigente
+        (None = sin datos: no se cachea). Sin `version` la respuesta es estática.
+        """
+        def decorador(vista):
+            @functools.wraps(vista)
+            def envoltura(*args, **kwargs):
+                v = version() if version is not None else 'estatica'
+                if v is None:
+                    return vista(*args, **kwargs)
+
+                parametros = tuple(sorted(request.args.items(multi=True)))
+                clave = (request.endpoint, parametros, v)
+                etag = hashlib.sha1(repr(clave).encode('utf-8')).hexdigest()
+
+                if request.if_none_match.contains_weak(etag):
+                    respuesta = make_response('', 304)
+                    respuesta.set_etag(etag, weak=True)
+                    respuesta.vary.add('Accept-Encoding')
+                    return respuesta
+
+                entrada = self._obtener(clave)
+                if entrada is None:
+                    respuesta = make_response(vista(*args, **kwargs))
+                    # Solo se guardan las respuestas exitosas
+                    if respuesta.status_code != 200:
+                        return respuesta
+                    entrada = {'cuerpo': respuesta.get_data(), 'mimetype': respuesta.mimetype}
+                    self._guardar(clave, entrada)
+                return self._responder(entrada, etag)
+            return envoltura
+        return decorador
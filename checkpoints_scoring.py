@@ -0,0 +1,132 @@
+# checkpoints_scoring.py - ESTADO DE SCORING EN CUALQUIER MOMENTO DEL HISTORIAL
+"""
+Checkpoints del ScoringState al cierre de cada día, para predecir "como se
+habría predicho" en un instante pasado sin recorrer el historial truncado.
+
+Por día se guardan los conteos por estado, el último día visto de cada estado
+y el día máximo (77 + 77 enteros). Los conteos de transición de Markov (77x77)
+pesan mucho más, así que se guardan cada DIAS_MARKOV días. La ventana de
+tendencia no se guarda: son los últimos `window` sorteos antes del corte.
+
+restaurar() toma el checkpoint más cercano anterior al instante pedido y
+avanza los pocos sorteos que faltan con ScoringState.avanzar().
+
+Las posiciones cuentan todos los sorteos, también los de números no válidos:
+no suman a los scores pero cortan la cadena de Markov, como en ScoringState.
+"""
+import numpy as np
+
+import normalizacion
+from predictor_model import N_ESTADOS, ScoringState
+from predictor_markov import TransicionesMarkov
+
+DIAS_MARKOV = 30
+
+
+class CheckpointsScoring:
+    """
+    Checkpoints sobre los sorteos en orden cronológico
+    (ver predictor_lote.HistorialCronologico).
+    """
+
+    def __init__(self, codigos: np.ndarray, dias: np.ndarray, draw_ts: np.ndarray,
+                 dias_markov: int = DIAS_MARKOV):
+        self.codigos = codigos
+        self.dias = dias
+        self.draw_ts = draw_ts
+        n = len(codigos)
+        validos = codigos >= 0
+        # Sorteos válidos entre los primeros p sorteos: validos_hasta[p]
+        self.validos_hasta = np.concatenate(([0], np.cumsum(validos)))
+        self.codigos_validos = codigos[validos]
+
+        # Posición (cantidad de sorteos) al cierre de cada día
+        dia_sorteo = normalizacion.dias_ordinales(draw_ts)
+        self.posiciones = np.append(np.flatnonzero(np.diff(dia_sorteo)) + 1, n) if n else np.zeros(0, np.int64)
+
+        # Conteos y último día visto de cada estado en cada checkpoint:
+        # con las apariciones de cada estado ordenadas, basta una búsqueda binaria
+        # (los -1 de los no válidos quedan antes del estado 0)
+        self.conteos = np.zeros((len(self.posiciones), N_ESTADOS), dtype=np.int32)
+        self.ultimo_dia = np.full((len(self.posiciones), N_ESTADOS), -1, dtype=np.int32)
+        orden = np.argsort(codigos, kind="stable")
+        limites = np.searchsorted(codigos[orden], np.arange(N_ESTADOS + 1))
+        for estado in range(N_ESTADOS):
+            apariciones = orden[limites[estado]:limites[estado + 1]]
+            vistas = np.searchsorted(apariciones, self.posiciones)
+            self.conteos[:, estado] = vistas
+            con_aparicion = vistas > 0
+            self.ultimo_dia[con_aparicion, estado] = dias[apariciones[vistas[con_aparicion] - 1]]
+        dias_validos = np.where(validos, dias, -1)
+        self.dia_max = np.maximum.accumulate(dias_validos)[self.posiciones - 1] if n else np.zeros(0, np.int64)
+
+        # Transiciones de Markov cada `dias_markov` checkpoints (solo pares de sorteos válidos seguidos)
+        self.posiciones_markov = self.posiciones[dias_markov - 1::dias_markov]
+        self.transiciones = np.zeros((len(self.posiciones_markov), N_ESTADOS, N_ESTADOS), dtype=np.int32)
+        pares = np.where(validos[:-1] & validos[1:], codigos[:-1] * N_ESTADOS + codigos[1:], -1)
+        anterior, acumulado = 0, np.zeros(N_ESTADOS * N_ESTADOS, dtype=np.int64)
+        for i, posicion in enumerate(self.posiciones_markov.tolist()):
+            # Los pares (p-1, p) con p < posicion
+            tramo = pares[anterior:max(posicion - 1, 0)]
+            acumulado += np.bincount(tramo[tramo >= 0], minlength=N_ESTADOS * N_ESTADOS)
+            anterior = max(posicion - 1, 0)
+            self.transiciones[i] = acumulado.reshape(N_ESTADOS, N_ESTADOS)
+
+    @classmethod
+    def desde_historial(cls, historial, dias_markov: int = DIAS_MARKOV) -> "CheckpointsScoring":
+        return cls(historial.codigos, historial.dias, historial.draw_ts, dias_markov)
+
+    @property
+    def nbytes(self) -> int:
+        return self.conteos.nbytes + self.ultimo_dia.nbytes + self.transiciones.nbytes
+
+    def corte(self, as_of_ts=None) -> int:
+        """Cantidad de sorteos con draw_ts <= as_of_ts (todos si es None)"""
+        if as_of_ts is None:
+            return len(self.codigos)
+        return int(np.searchsorted(self.draw_ts, as_of_ts, side="right"))
+
+    def _transiciones(self, posicion: int) -> TransicionesMarkov:
+        """Conteos de transición entre los primeros `posicion` sorteos"""
+        modelo = TransicionesMarkov()
+        k = int(np.searchsorted(self.posiciones_markov, posicion, side="right")) - 1
+        desde = 1
+        if k >= 0:
+            modelo.conteos = self.transiciones[k].astype(np.int64)
+            desde = max(int(self.posiciones_markov[k]), 1)
+        if posicion > desde:
+            origen, destino = self.codigos[desde - 1:posicion - 1], self.codigos[desde:posicion]
+            seguidos = (origen >= 0) & (destino >= 0)
+            np.add.at(modelo.conteos, (origen[seguidos], destino[seguidos]), 1)
+        modelo.totales = modelo.conteos.sum(axis=1)
+        modelo.ultimo = int(self.codigos[posicion - 1]) if posicion > 0 else -1
+        return modelo
+
+    def restaurar(self, corte: int, window: int = 30) -> ScoringState:
+        """
+        ScoringState de los primeros `corte` sorteos, igual al de
+        ScoringState.desde_arrays() sobre el historial truncado.
+        """
+        k = int(np.searchsorted(self.posiciones, corte, side="right")) - 1
+        estado = ScoringState(window)
+        posicion = 0
+        if k >= 0:
+            posicion = int(self.posiciones[k])
+            estado.total = int(self.validos_hasta[posicion])
+            estado.conteos = self.conteos[k].astype(np.int64)
+            estado.ultimo_dia = self.ultimo_dia[k].astype(np.int64)
+            estado.dia_max = int(self.dia_max[k])
+
+        if window > 0:
+            hasta = int(self.validos_hasta[posicion])
+            recientes = self.codigos_validos[max(0, hasta - window):hasta]
+            estado.ventana.extend(recientes.tolist())
+            estado.conteos_ventana = np.bincount(recientes, minlength=N_ESTADOS).astype(np.int64)
+
+        estado.transiciones = self._transiciones(posicion)
+        estado.transiciones.vistos = estado.conteos > 0
+
+        # Avanzar los sorteos del día parcial
+        for idx, dia in zip(self.codigos[posicion:corte].tolist(), self.dias[posicion:corte].tolist()):
+            estado.avanzar(idx, dia)
+        return estado
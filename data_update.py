@@ -1,15 +1,42 @@
 # data_update.py
+import argparse
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import json
+import numpy as np
 import pandas as pd
 import os
 import re
 from datetime import datetime
+from functools import lru_cache
+
+import almacen_columnar
+import normalizacion
+
+try:
+    from utils.utils_map import nombre_a_numero, plegar_acentos
+except ImportError:
+    from utils_map import nombre_a_numero, plegar_acentos
 
 URL = "https://lotoven.com/animalito/guacharoactivo/historial/"
 CSV_FILE = "resultados_guacharo.csv"
 JSON_FILE = "guacharo_historial.json"
+HWM_FILE = "resultados_guacharo.hwm.json"
+
+# lxml es bastante más rápido que html.parser; si no está instalado se usa el de la librería estándar
+try:
+    import lxml  # noqa: F401
+    PARSER_HTML = "lxml"
+except ImportError:
+    PARSER_HTML = "html.parser"
+
+# Solo se construye el árbol de las tablas, no el resto de la página
+SOLO_TABLAS = SoupStrainer("table")
+
+
+# Textos de celda que significan "sin resultado"
+VACIOS = {"", "-", "--", "n/a", "na", "sin dato"}
+_RE_NUMERO = re.compile(r'\b(\d{1,2})\b')
 
 
 def normalizar_texto(texto):
@@ -18,34 +45,13 @@ def normalizar_texto(texto):
         return ""
     return str(texto).lower().strip()
 
-def nombre_a_numero(nombre):
-    """Convierte nombre de animal a número - versión simplificada para scraping"""
-    mapa = {
-        "delfin": 0, "carnero": 1, "toro": 2, "ciempies": 3, "alacran": 4,
-        "leon": 5, "rana": 6, "perico": 7, "raton": 8, "aguila": 9,
-        "tigre": 10, "gato": 11, "caballo": 12, "mono": 13, "paloma": 14,
-        "zorro": 15, "oso": 16, "pavo": 17, "burro": 18, "chivo": 19,
-        "cochino": 20, "gallo": 21, "camello": 22, "cebra": 23, "iguana": 24,
-        "gallina": 25, "vaca": 26, "perro": 27, "zamuro": 28, "elefante": 29,
-        "caiman": 30, "lapa": 31, "ardilla": 32, "pescado": 33, "venado": 34,
-        "jirafa": 35, "culebra": 36, "tortuga": 37, "lechuza": 38, "bufalo": 38,
-        "canguro": 41, "garza": 44, "chiguire": 44, "puma": 46, "pavo real": 47,
-        "oso hormiguero": 49, "pereza": 50, "canario": 51, "pulpo": 53,
-        "caracol": 54, "grillo": 55, "tiburon": 57, "pato": 58, "camaleon": 61,
-        "cachicamo": 63, "gavilan": 64, "arana": 65, "conejo": 68,
-        "guacamaya": 70, "hipopotamo": 72, "ballena": 100
-    }
-    if nombre is None:
-        return None
-    return mapa.get(normalizar_texto(nombre))
-
-def extraer_numero_animal(raw_text: str):
-    if not isinstance(raw_text, str):
-        return None
 
-    txt = normalizar_texto(raw_text)
+@lru_cache(maxsize=None)
+def _resolver_celda(raw_text: str):
+    """Número del animal de un texto de celda (None si no se reconoce). Cacheado por texto."""
+    txt = plegar_acentos(raw_text)
 
-    if txt in ["", "-", "--", "n/a", "na", "sin dato"]:
+    if txt in VACIOS:
         return None
 
     # Ballena: "00" or 'ballena' word
@@ -57,7 +63,7 @@ def extraer_numero_animal(raw_text: str):
         return 0
 
     # explicit numeric
-    m = re.findall(r'\b(\d{1,2})\b', txt)
+    m = _RE_NUMERO.findall(txt)
     if m:
         n = int(m[-1])
         # could be 0 or 1..75
@@ -67,69 +73,281 @@ def extraer_numero_animal(raw_text: str):
             return n
 
     # try name mapping
-    mapped = nombre_a_numero(txt)
-    if mapped is not None:
-        return mapped
+    return nombre_a_numero(txt)
+
+
+def extraer_numero_animal(raw_text: str):
+    if not isinstance(raw_text, str):
+        return None
 
-    # not recognized
-    print(f"⚠ Texto no reconocido en scraping: '{raw_text}' -> '{txt}'")
-    return None
+    num = _resolver_celda(raw_text)
+    if num is None and normalizar_texto(raw_text) not in VACIOS:
+        # not recognized
+        print(f"⚠ Texto no reconocido en scraping: '{raw_text}' -> '{normalizar_texto(raw_text)}'")
+    return num
 
 
-def obtener_historial():
-    print("Descargando historial desde:", URL)
-    r = requests.get(URL, timeout=20)
+def normalizar_celdas(textos):
+    """
+    Resuelve en bloque los textos de las celdas del historial.
+    Cada texto distinto se procesa una sola vez (se repiten los mismos ~77).
+
+    Retorna (numeros, no_reconocidos): una Serie Int64 alineada con `textos`
+    (<NA> si la celda está vacía o no se reconoce) y la lista de textos no reconocidos.
+    """
+    serie = pd.Series(textos, dtype="object")
+    tabla = {}
+    no_reconocidos = []
+    for texto in serie.dropna().unique():
+        num = _resolver_celda(texto) if isinstance(texto, str) else None
+        tabla[texto] = num
+        if num is None and normalizar_texto(texto) not in VACIOS:
+            no_reconocidos.append(texto)
+    return serie.map(tabla).astype("Int64"), no_reconocidos
+
+
+def descargar(url=URL, sesion=None):
+    """
+    HTML (bytes) de una página del historial; con `sesion` reutiliza conexiones y reintentos.
+    Se pasan bytes al parser para que detecte la codificación de la página.
+    """
+    r = (sesion or requests).get(url, timeout=20)
     r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+    return r.content
+
 
+def obtener_historial(url=URL, sesion=None):
+    print("Descargando historial desde:", url)
+    return parsear_historial(descargar(url, sesion))
+
+
+def iterar_filas_tabla(html, parser=PARSER_HTML):
+    """
+    Genera los textos de las celdas de cada fila de la primera tabla de la página.
+    Con SoupStrainer el parser descarta todo lo que no está dentro de una <table>.
+    """
+    soup = BeautifulSoup(html, parser, parse_only=SOLO_TABLAS)
     tabla = soup.find("table")
     if tabla is None:
         raise RuntimeError("No se encontró la tabla de historial en la página.")
 
-    filas = tabla.find_all("tr")
-    if len(filas) < 2:
+    for fila in tabla.find_all("tr"):
+        celdas = fila.find_all(["th", "td"], recursive=False)
+        if celdas:
+            yield [c.get_text(" ", strip=True) for c in celdas]
+
+
+def parsear_historial(html):
+    """Filas {Fecha, Hora, Animal_Gan, Num_Ganador} de la tabla de una página del historial (str o bytes)"""
+    filas = iterar_filas_tabla(html)
+
+    encabezados = next(filas, None)
+    if encabezados is None:
+        raise RuntimeError("Tabla encontrada pero no tiene filas esperadas.")
+    fechas = [texto.replace("-", "/") for texto in encabezados[1:]]
+
+    # Recolectar todas las celdas y resolverlas en un solo paso
+    celdas_planas = []
+    for hora, *celdas in filas:
+        for i, texto in enumerate(celdas):
+            fecha = fechas[i] if i < len(fechas) else ""
+            celdas_planas.append((fecha, hora, texto))
+    if not celdas_planas:
         raise RuntimeError("Tabla encontrada pero no tiene filas esperadas.")
 
-    encabezados = filas[0].find_all(["th", "td"])
-    fechas = [c.get_text(strip=True).replace("-", "/") for c in encabezados[1:]]
+    numeros, no_reconocidos = normalizar_celdas([texto for _, _, texto in celdas_planas])
+    for texto in no_reconocidos:
+        print(f"⚠ Texto no reconocido en scraping: '{texto}' -> '{normalizar_texto(texto)}'")
 
     data = []
-    for row in filas[1:]:
-        celdas = row.find_all(["th", "td"])
-        if not celdas:
-            continue
-        hora = celdas[0].get_text(strip=True)
-        for i, cell in enumerate(celdas[1:]):
-            fecha = fechas[i] if i < len(fechas) else ""
-            animal_txt = cell.get_text(" ", strip=True)
-            num = extraer_numero_animal(animal_txt)
-            data.append({
-                "Fecha": fecha,
-                "Hora": hora,
-                "Animal_Gan": animal_txt,
-                "Num_Ganador": "" if num is None else num
-            })
+    for (fecha, hora, animal_txt), num in zip(celdas_planas, numeros):
+        data.append({
+            "Fecha": fecha,
+            "Hora": hora,
+            "Animal_Gan": animal_txt,
+            "Num_Ganador": "" if pd.isna(num) else int(num)
+        })
     return data
 
 
+# ======================================================
+#   INGESTA INCREMENTAL (SOLO AGREGA SORTEOS NUEVOS)
+# ======================================================
+def _es_vacio(texto) -> bool:
+    return normalizar_texto(texto) in VACIOS
+
+
+def _escribir_atomico(ruta, escribir):
+    """Escribe en un archivo temporal y lo reemplaza de una vez"""
+    tmp = f"{ruta}.tmp"
+    escribir(tmp)
+    os.replace(tmp, ruta)
+
+
+def leer_marca():
+    """Marca de agua: último sorteo (draw_ts) guardado en el CSV. La calcula una vez si no existe."""
+    if os.path.exists(HWM_FILE):
+        with open(HWM_FILE, encoding="utf-8") as f:
+            marca = json.load(f)
+        if "draw_ts" in marca:
+            return marca
+    if not os.path.exists(CSV_FILE):
+        return None
+    return guardar_marca(pd.read_csv(CSV_FILE, dtype=str))
+
+
+def guardar_marca(df):
+    """Calcula y persiste la marca de agua a partir de las filas con resultado"""
+    draw_ts, slots = normalizacion.columnas_tiempo(df["Fecha"], df["Hora"])
+    con_resultado = ~df["Animal_Gan"].map(lambda texto: pd.isna(texto) or _es_vacio(texto)).to_numpy(dtype=bool)
+    candidatos = np.flatnonzero(con_resultado & (draw_ts != normalizacion.NAT) & (slots >= 0))
+    if not len(candidatos):
+        return None
+
+    pos = candidatos[np.argmax(draw_ts[candidatos])]
+    marca = {"fecha": df["Fecha"].iloc[pos], "hora": df["Hora"].iloc[pos], "draw_ts": int(draw_ts[pos])}
+
+    def escribir(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(marca, f, ensure_ascii=False, separators=(",", ":"))
+    _escribir_atomico(HWM_FILE, escribir)
+    return marca
+
+
+def actualizar_columnar(df_nuevo=None, bytes_previos=None):
+    """
+    Mantiene al día el almacén columnar junto al CSV. Con df_nuevo (las filas recién
+    agregadas al CSV, que antes medía `bytes_previos` bytes) agrega solo esas filas,
+    si el almacén estaba al día con el CSV anterior; si no, o sin df_nuevo, lo
+    reconstruye desde el CSV. Si falla, el almacén no queda al día con el tamaño
+    del CSV y los lectores usan el CSV hasta la próxima reconstrucción.
+    """
+    directorio = almacen_columnar.directorio_de(CSV_FILE)
+    try:
+        bytes_csv = os.path.getsize(CSV_FILE)
+        if (df_nuevo is not None and bytes_previos is not None
+                and almacen_columnar.csv_reflejado(directorio) == bytes_previos):
+            almacen_columnar.agregar(df_nuevo, directorio, bytes_csv)
+        else:
+            almacen_columnar.escribir(pd.read_csv(CSV_FILE), directorio, bytes_csv)
+    except (ValueError, OSError) as e:
+        print(f"⚠ No se pudo actualizar el almacén columnar: {e}")
+
+
+def _agregar_csv(df_new):
+    """
+    Agrega filas al final del CSV en el mismo archivo, así el costo depende de
+    las filas nuevas y no del tamaño del historial. Se llama con lock_ingesta
+    tomado (un solo escritor). Las filas se escriben de una vez; un lector que
+    lea el archivo justo en ese momento lo vuelve a cargar en el próximo acceso,
+    porque cambió su firma (mtime/tamaño).
+    """
+    if not os.path.exists(CSV_FILE) or os.path.getsize(CSV_FILE) == 0:
+        _escribir_atomico(CSV_FILE, lambda tmp: df_new.to_csv(tmp, index=False, encoding="utf-8"))
+        return
+
+    # Mismo fin de línea que el archivo, y cerrar la última línea si quedó abierta
+    with open(CSV_FILE, "rb") as f:
+        f.seek(-min(2, os.path.getsize(CSV_FILE)), os.SEEK_END)
+        final = f.read()
+    salto = "\r\n" if final.endswith(b"\r\n") else "\n"
+
+    filas = df_new.to_csv(header=False, index=False, lineterminator=salto)
+    if not final.endswith(b"\n"):
+        filas = salto + filas
+    with open(CSV_FILE, "ab") as f:
+        f.write(filas.encode("utf-8"))
+
+
 def guardar(historial):
-    with open(JSON_FILE, "w", encoding="utf-8") as f:
-        json.dump(historial, f, ensure_ascii=False, indent=2)
+    """
+    Agrega al CSV solo los sorteos posteriores a la marca de agua.
+    Las celdas vacías ('-') de horas que aún no se juegan no avanzan la marca.
+    La deduplicación completa se hace aparte con compactar().
+    Retorna la cantidad de sorteos agregados.
+    """
+    def escribir_json(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(historial, f, ensure_ascii=False, separators=(",", ":"))
+    _escribir_atomico(JSON_FILE, escribir_json)
+
+    marca = leer_marca()
+    limite = marca["draw_ts"] if marca else None
+
+    draw_ts, slots = normalizacion.columnas_tiempo([item["Fecha"] for item in historial],
+                                                   [item["Hora"] for item in historial])
+    nuevos = {}
+    for item, clave, slot in zip(historial, draw_ts.tolist(), slots.tolist()):
+        if _es_vacio(item["Animal_Gan"]) or clave == normalizacion.NAT or slot < 0:
+            continue
+        if limite is not None and clave <= limite:
+            continue
+        nuevos[clave] = item
+
+    if not nuevos:
+        print("✔ CSV al día, sin sorteos nuevos:", CSV_FILE)
+        return 0
+
+    df_new = pd.DataFrame([nuevos[clave] for clave in sorted(nuevos)],
+                          columns=["Fecha", "Hora", "Animal_Gan", "Num_Ganador"])
 
-    df_new = pd.DataFrame(historial)
+    bytes_previos = os.path.getsize(CSV_FILE) if os.path.exists(CSV_FILE) else 0
+    _agregar_csv(df_new)
 
-    if os.path.exists(CSV_FILE):
-        df_old = pd.read_csv(CSV_FILE, dtype=str)
-        df_comb = pd.concat([df_old, df_new], ignore_index=True)
-        df_comb.drop_duplicates(subset=["Fecha", "Hora"], keep="last", inplace=True)
-    else:
-        df_comb = df_new
+    actualizar_columnar(df_new, bytes_previos)
+    guardar_marca(df_new)
+    print(f"✔ CSV actualizado correctamente: {CSV_FILE} (+{len(df_new)} sorteos)")
+    return len(df_new)
 
-    df_comb.to_csv(CSV_FILE, index=False, encoding="utf-8")
-    print("✔ CSV actualizado correctamente:", CSV_FILE)
+
+def compactar():
+    """
+    Deduplica el CSV completo por sorteo (draw_ts; Fecha+Hora si no se puede leer),
+    lo deja en orden cronológico y recalcula la marca de agua.
+    Entre duplicados gana la última fila con resultado.
+    """
+    if not os.path.exists(CSV_FILE):
+        print("⚠️ No existe", CSV_FILE)
+        return
+    df = pd.read_csv(CSV_FILE, dtype=str)
+    antes = len(df)
+
+    draw_ts, _ = normalizacion.columnas_tiempo(df["Fecha"], df["Hora"])
+    clave = pd.Series(draw_ts.astype(str), index=df.index)
+    sin_fecha = draw_ts == normalizacion.NAT
+    clave[sin_fecha] = "?" + df["Fecha"].fillna("").astype(str)[sin_fecha] + "|" + df["Hora"].fillna("").astype(str)[sin_fecha]
+    con_resultado = ~df["Animal_Gan"].map(lambda texto: pd.isna(texto) or _es_vacio(texto))
+
+    # Las filas con resultado van al final de su grupo para que keep="last" las prefiera
+    orden = con_resultado.sort_values(kind="stable").index
+    conservar = np.sort(clave.loc[orden].drop_duplicates(keep="last").index.to_numpy())
+
+    # Orden por draw_ts (sin fecha al principio); a igual draw_ts, el orden del archivo.
+    # Los consumidores que leen en orden de filas (tendencia, backtest) dependen de esto.
+    df = df.iloc[conservar[normalizacion.orden_cronologico(draw_ts[conservar])]]
+
+    _escribir_atomico(CSV_FILE, lambda tmp: df.to_csv(tmp, index=False, encoding="utf-8"))
+    actualizar_columnar()
+    if os.path.exists(HWM_FILE):
+        os.remove(HWM_FILE)
+    guardar_marca(df)
+    print(f"✔ CSV compactado: {antes} -> {len(df)} registros")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Actualiza el historial del Guácharo Activo")
+    parser.add_argument("--compactar", action="store_true",
+                        help="Deduplicar el CSV completo en lugar de descargar")
+    args = parser.parse_args()
+
+    # Mismo lock que la ingesta programada y el backfill: un solo escritor del CSV
+    from ingestor import lock_ingesta
+
+    if args.compactar:
+        with lock_ingesta():
+            compactar()
+        return
+
     print("=" * 60)
     print("🔄 ACTUALIZANDO DATOS DEL GUÁCHARO ACTIVO")
     print("=" * 60)
@@ -152,15 +370,14 @@ def main():
             print(f"   Rango: {min(fechas_unicas)} a {max(fechas_unicas)}")
         
         # Guardar
-        guardar(historial)
+        with lock_ingesta():
+            guardar(historial)
         
-        # Verificar archivo guardado
-        if os.path.exists(CSV_FILE):
-            df = pd.read_csv(CSV_FILE)
+        # Último sorteo guardado (sin releer el CSV completo)
+        marca = leer_marca()
+        if marca:
             print(f"\n✅ Archivo CSV actualizado:")
-            print(f"   Total de registros en CSV: {len(df)}")
-            print(f"   Fechas en CSV: {df['Fecha'].nunique()}")
-            print(f"   Rango: {df['Fecha'].min()} a {df['Fecha'].max()}")
+            print(f"   Último sorteo guardado: {marca['fecha']} {marca['hora']}")
         
         print("\n" + "=" * 60)
         print("✅ ACTUALIZACIÓN COMPLETADA")
@@ -0,0 +1,189 @@
+# dataset_store.py - CACHÉ EN MEMORIA DEL HISTORIAL DE RESULTADOS
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import almacen_columnar
+from normalizacion import columnas_tiempo
+
+# Ubicaciones donde puede estar el CSV (relativas al directorio de trabajo)
+RUTAS_CSV = [
+    "resultados_guacharo.csv",
+    "Backend/resultados_guacharo.csv",
+    "data/resultados_guacharo.csv"
+]
+
+
+def encontrar_csv():
+    """Busca el archivo CSV en diferentes ubicaciones"""
+    for ruta in RUTAS_CSV:
+        if os.path.exists(ruta):
+            return ruta
+    return None
+
+
+def limpiar_resultados(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Deja solo las filas con Num_Ganador numérico, convertido a int.
+    Conserva el índice original para que las posiciones sigan apuntando al CSV.
+    """
+    limpio = df.copy()
+    limpio['Num_Ganador'] = pd.to_numeric(limpio['Num_Ganador'], errors='coerce')
+    limpio = limpio.dropna(subset=['Num_Ganador'])
+    limpio['Num_Ganador'] = limpio['Num_Ganador'].astype(int)
+    return limpio
+
+
+class Dataset:
+    """
+    Versión cargada del historial. Es de solo lectura: los endpoints no deben
+    modificar `crudo` ni `limpio` (usar .assign()/.copy() si hace falta).
+    """
+
+    def __init__(self, ruta, firma, crudo: pd.DataFrame, columnas: dict = None):
+        self.ruta = ruta
+        self.firma = firma
+        self.crudo = crudo
+        # Columnas numéricas mapeadas en memoria (solo si se cargó del almacén columnar)
+        self.columnas = columnas
+        self.limpio = limpiar_resultados(crudo)
+        # Fecha/hora canónicas por fila de `crudo` (ver normalizacion.py)
+        if columnas is not None and "hour_slot" in columnas:
+            self.draw_ts, self.hour_slot = columnas["draw_ts"], columnas["hour_slot"]
+        else:
+            self.draw_ts, self.hour_slot = columnas_tiempo(crudo['Fecha'], crudo['Hora'])
+        self._derivados = {}
+        # Reentrante: un derivado puede construirse a partir de otro
+        self._lock = threading.RLock()
+
+    @property
+    def draw_ts_limpio(self):
+        """draw_ts alineado con las filas de `limpio`"""
+        return self.draw_ts[self.limpio.index.to_numpy()]
+
+    @property
+    def version(self) -> str:
+        """Identificador de la versión de datos (cambia al cambiar el archivo)"""
+        _, mtime_ns, size = self.firma
+        return f"{mtime_ns:x}-{size:x}"
+
+    def heredar(self, anterior: "Dataset"):
+        """
+        Si esta versión solo agrega filas al final de `anterior` (una ingesta normal),
+        reutiliza los derivados que saben extenderse (método `extender(dataset, desde)`)
+        en lugar de recalcularlos. Tras una compactación o un backfill no aplica.
+        """
+        n = len(anterior.crudo)
+        if (anterior.ruta != self.ruta or n > len(self.crudo)
+                or not np.array_equal(anterior.draw_ts, self.draw_ts[:n])
+                or not anterior.crudo['Num_Ganador'].equals(self.crudo['Num_Ganador'].iloc[:n])):
+            return
+        with anterior._lock:
+            derivados = list(anterior._derivados.items())
+        for nombre, valor in derivados:
+            extender = getattr(valor, 'extender', None)
+            if extender is not None:
+                self._derivados[nombre] = extender(self, n)
+
+    def derivado(self, nombre, constructor):
+        """
+        Devuelve una estructura calculada a partir de este dataset,
+        construyéndola una sola vez por versión de datos.
+        """
+        valor = self._derivados.get(nombre)
+        if valor is None:
+            with self._lock:
+                valor = self._derivados.get(nombre)
+                if valor is None:
+                    valor = constructor(self)
+                    self._derivados[nombre] = valor
+        return valor
+
+
+class DatasetStore:
+    """
+    Almacén único por proceso del historial. Lee y limpia el CSV una sola vez
+    y solo lo recarga si cambia su mtime o tamaño, o si se llama a invalidar().
+    Si junto al CSV hay un almacén columnar al día, lo mapea en memoria en lugar
+    de parsear el texto.
+    """
+
+    def __init__(self, buscar_ruta=encontrar_csv):
+        self._buscar_ruta = buscar_ruta
+        self._dataset = None
+        self._anterior = None
+        # ((firma del CSV, firma de meta.json), ¿almacén al día?): meta.json se lee solo si cambia
+        self._columnar_visto = (None, False)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _firma(ruta):
+        st = os.stat(ruta)
+        return (os.path.abspath(ruta), st.st_mtime_ns, st.st_size)
+
+    def _fuente(self, ruta):
+        """
+        (firma, es_columnar): usa el almacén columnar si no es más viejo que el CSV
+        y tiene sus mismas filas (bytes_csv de meta.json igual al tamaño del CSV)
+        """
+        firma_csv = self._firma(ruta)
+        directorio = almacen_columnar.directorio_de(ruta)
+        try:
+            firma_meta = self._firma(os.path.join(directorio, "meta.json"))
+        except OSError:
+            return firma_csv, False
+        if firma_meta[1] < firma_csv[1]:
+            return firma_csv, False
+
+        clave, al_dia = self._columnar_visto
+        if clave != (firma_csv, firma_meta):
+            al_dia = almacen_columnar.csv_reflejado(directorio) == firma_csv[2]
+            if not al_dia:
+                print(f"⚠ El almacén columnar no está al día con {ruta}: se usa el CSV")
+            self._columnar_visto = ((firma_csv, firma_meta), al_dia)
+        return (firma_meta, True) if al_dia else (firma_csv, False)
+
+    @staticmethod
+    def _cargar(ruta, firma, es_columnar):
+        if es_columnar:
+            crudo, columnas = almacen_columnar.cargar(almacen_columnar.directorio_de(ruta))
+            return Dataset(ruta, firma, crudo, columnas)
+        return Dataset(ruta, firma, pd.read_csv(ruta))
+
+    def obtener(self):
+        """Retorna el Dataset vigente, o None si no hay archivo de datos"""
+        ruta = self._buscar_ruta()
+        if not ruta:
+            return None
+        try:
+            firma, es_columnar = self._fuente(ruta)
+        except OSError:
+            return None
+
+        actual = self._dataset
+        if actual is not None and actual.firma == firma:
+            return actual
+
+        with self._lock:
+            actual = self._dataset
+            if actual is not None and actual.firma == firma:
+                return actual
+            nuevo = self._cargar(ruta, firma, es_columnar)
+            anterior = actual or self._anterior
+            if anterior is not None:
+                nuevo.heredar(anterior)
+            self._dataset, self._anterior = nuevo, None
+            return nuevo
+
+    def invalidar(self):
+        """Fuerza la recarga en el próximo acceso (p. ej. tras /api/update-data)"""
+        with self._lock:
+            # Se conserva para extender sus derivados incrementales en la recarga
+            self._anterior = self._dataset or self._anterior
+            self._dataset = None
+
+
+# Instancia compartida por todos los endpoints del proceso
+store = DatasetStore()
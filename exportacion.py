@@ -0,0 +1,43 @@
+# exportacion.py - EXPORTACIÓN COMPLETA DEL HISTORIAL POR BLOQUES
+"""
+Genera el historial como NDJSON o CSV para /api/history/export.
+
+Las filas se toman de `crudo` en bloques de FILAS_POR_BLOQUE y cada bloque se
+serializa y se entrega antes de tomar el siguiente: la memoria de una
+exportación depende del tamaño del bloque y no del tamaño del historial.
+"""
+import json
+
+from almacen_columnar import tipos_csv
+
+FILAS_POR_BLOQUE = 1000
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _bloques(crudo, filas, tamano: int):
+    for inicio in range(0, len(filas), tamano):
+        yield tipos_csv(crudo.take(filas[inicio:inicio + tamano])).fillna('')
+
+
+def ndjson(crudo, filas, tamano: int = FILAS_POR_BLOQUE):
+    """Un objeto JSON por línea, con las mismas claves que /api/history"""
+    for bloque in _bloques(crudo, filas, tamano):
+        lineas = [json.dumps(fila, ensure_ascii=False) + "\n" for fila in bloque.to_dict('records')]
+        yield "".join(lineas).encode("utf-8")
+
+
+def csv(crudo, filas, tamano: int = FILAS_POR_BLOQUE):
+    """CSV con encabezado (también si no hay filas)"""
+    yield crudo.iloc[:0].to_csv(index=False, lineterminator="\n").encode("utf-8")
+    for bloque in _bloques(crudo, filas, tamano):
+        yield bloque.to_csv(index=False, header=False, lineterminator="\n").encode("utf-8")
+
+
+def generar(formato: str, crudo, filas, tamano: int = FILAS_POR_BLOQUE):
+    """Generador de bloques (bytes) de las filas `filas` de `crudo` en el formato pedido"""
+    if formato == "csv":
+        return csv(crudo, filas, tamano)
+    return ndjson(crudo, filas, tamano)
@@ -0,0 +1,34 @@
+# gunicorn.conf.py - CONFIGURACIÓN DE PRODUCCIÓN
+# Uso: gunicorn -c gunicorn.conf.py wsgi:app
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Procesos y threads por proceso (Render define WEB_CONCURRENCY según el plan)
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Cargar la app (y el historial) una vez en el maestro antes de crear los workers
+preload_app = True
+# La ingesta la arranca post_fork en cada worker, no wsgi.crear_app() en el maestro
+os.environ['INGESTA_EN_WORKERS'] = '1'
+
+# Segundos sin respuesta de un worker antes de reiniciarlo (la ingesta corre en un thread aparte)
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info')
+
+
+def post_fork(server, worker):
+    """
+    Cada worker arranca su thread de ingesta (los threads no sobreviven al fork) para
+    atender los trabajos de /api/update-data que recibe. La ingesta de cada hora la
+    encola un solo worker (ver Ingestor.es_programador).
+    """
+    from app import iniciar_ingestor
+    iniciar_ingestor()
@@ -0,0 +1,86 @@
+# indice_historial.py - ÍNDICE ORDENADO DEL HISTORIAL PARA /api/history
+import base64
+import binascii
+
+import numpy as np
+
+import normalizacion
+from normalizacion import NAT
+
+_NS_POR_DIA = 24 * 60 * 60 * 10**9
+
+
+class CursorInvalido(ValueError):
+    """El cursor de paginación no se pudo decodificar"""
+
+
+def codificar_cursor(draw_ts: int, fila: int) -> str:
+    """Cursor opaco con la clave (draw_ts, fila) del último registro entregado"""
+    return base64.urlsafe_b64encode(f"{draw_ts}:{fila}".encode()).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str):
+    try:
+        texto = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        draw_ts, fila = texto.split(":")
+        return int(draw_ts), int(fila)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorInvalido("Cursor de paginación inválido")
+
+
+def inicio_del_dia(fecha: str):
+    """draw_ts de las 00:00 de una fecha "dd/mm/yyyy" o "yyyy/mm/dd"; None si no es válida"""
+    draw_ts, _ = normalizacion.columnas_tiempo([fecha], [""])
+    return None if draw_ts[0] == NAT else int(draw_ts[0])
+
+
+class IndiceHistorial:
+    """
+    Filas del historial ordenadas por la clave (draw_ts, fila).
+    Un rango de fechas es un par de búsquedas binarias sobre draw_ts y cada
+    página es un corte del arreglo, sin filtrar ni ordenar el DataFrame.
+    Las filas sin fecha quedan al principio (las más antiguas).
+    """
+
+    def __init__(self, draw_ts: np.ndarray):
+        draw_ts = np.asarray(draw_ts, dtype=np.int64)
+        filas = np.arange(len(draw_ts))
+        orden = np.lexsort((filas, draw_ts))
+        self.draw_ts = draw_ts[orden]
+        self.filas = filas[orden]
+
+    @classmethod
+    def desde_dataset(cls, dataset) -> "IndiceHistorial":
+        return cls(dataset.draw_ts)
+
+    def rango_dias(self, desde: int = None, hasta: int = None):
+        """
+        Posiciones [inicio, fin) de los sorteos entre el día de `desde` y el de `hasta`
+        (draw_ts de inicio de día, ambos inclusive).
+        """
+        inicio = 0 if desde is None else int(np.searchsorted(self.draw_ts, desde, side="left"))
+        fin = len(self.draw_ts) if hasta is None else int(np.searchsorted(self.draw_ts, hasta + _NS_POR_DIA, side="left"))
+        return inicio, max(inicio, fin)
+
+    def _posicion(self, draw_ts: int, fila: int) -> int:
+        """Primera posición cuya clave es >= (draw_ts, fila)"""
+        a = int(np.searchsorted(self.draw_ts, draw_ts, side="left"))
+        b = int(np.searchsorted(self.draw_ts, draw_ts, side="right"))
+        return a + int(np.searchsorted(self.filas[a:b], fila, side="left"))
+
+    def pagina(self, limit: int, desde: int = None, hasta: int = None, cursor: str = None):
+        """
+        Página de filas (posiciones en `crudo`), de la más reciente a la más antigua,
+        y el cursor para pedir la siguiente (None si no hay más).
+        """
+        inicio, fin = self.rango_dias(desde, hasta)
+        if cursor:
+            fin = max(inicio, min(fin, self._posicion(*decodificar_cursor(cursor))))
+
+        corte = max(inicio, fin - max(limit, 0))
+        filas = self.filas[corte:fin][::-1]
+
+        siguiente = None
+        if corte > inicio and len(filas):
+            siguiente = codificar_cursor(int(self.draw_ts[corte]), int(self.filas[corte]))
+        return filas, siguiente
@@ -0,0 +1,228 @@
+# ingestor.py - ACTUALIZACIÓN DEL HISTORIAL EN SEGUNDO PLANO
+"""
+Descarga y guarda los sorteos nuevos fuera del ciclo de las peticiones HTTP.
+
+Un thread por proceso atiende una cola de trabajos: los que encola
+/api/update-data en ese proceso y uno programado cada hora (a los
+INGESTA_MINUTO minutos), alineado con los sorteos. El programado lo encola un
+solo proceso: el que tiene tomado ARCHIVO_PROGRAMADOR (lock retenido mientras
+vive); si ese worker muere, lo toma otro en la hora siguiente. La escritura usa data_update.guardar(), que agrega
+solo los sorteos nuevos al final del CSV y del almacén columnar. Un lock de
+archivo (fcntl, si existe) evita que dos procesos (p. ej. workers de gunicorn)
+ingieran a la vez.
+
+El estado de cada trabajo también se guarda en DIRECTORIO_TRABAJOS, para que
+cualquier worker pueda responder la consulta de estado.
+"""
+import json
+import os
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo el lock dentro del proceso
+    fcntl = None
+
+ARCHIVO_LOCK = "resultados_guacharo.lock"
+ARCHIVO_PROGRAMADOR = "resultados_guacharo.programador.lock"
+DIRECTORIO_TRABAJOS = "ingesta_trabajos"
+MAX_TRABAJOS = 100
+
+PENDIENTE = "pendiente"
+EN_CURSO = "en_curso"
+COMPLETADO = "completado"
+OMITIDO = "omitido"
+ERROR = "error"
+
+
+class IngestaOcupada(Exception):
+    """Otro proceso está ingiriendo en este momento"""
+
+
+@contextmanager
+def lock_ingesta(ruta=ARCHIVO_LOCK, bloquear=True):
+    """Lock exclusivo entre procesos sobre `ruta` (no-op sin fcntl)"""
+    with open(ruta, "a") as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | (0 if bloquear else fcntl.LOCK_NB))
+            except BlockingIOError:
+                raise IngestaOcupada("Hay otra ingesta en curso")
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def proxima_hora(ahora: datetime, minuto: int) -> datetime:
+    """Próximo instante hh:minuto posterior a `ahora`"""
+    siguiente = ahora.replace(minute=minuto, second=0, microsecond=0)
+    if siguiente <= ahora:
+        siguiente += timedelta(hours=1)
+    return siguiente
+
+
+def ingerir():
+    """Descarga el historial y guarda los sorteos nuevos; retorna cuántos se agregaron"""
+    # data_update importa requests/bs4/pandas: solo se cargan al ingerir
+    import data_update
+    historial = data_update.obtener_historial()
+    if not historial:
+        return 0
+    return data_update.guardar(historial)
+
+
+class Ingestor:
+    """
+    Cola de trabajos de ingesta atendida por un thread en segundo plano.
+    `al_terminar(nuevos)` se llama tras cada ingesta con datos nuevos
+    (p. ej. para invalidar el historial y el caché de respuestas).
+    """
+
+    def __init__(self, al_terminar=None, funcion=ingerir, programado: bool = True, minuto: int = 5,
+                 directorio: str = DIRECTORIO_TRABAJOS, archivo_programador: str = ARCHIVO_PROGRAMADOR):
+        self.al_terminar = al_terminar
+        self.directorio = directorio
+        self.funcion = funcion
+        self.programado = programado
+        self.minuto = minuto
+        self.archivo_programador = archivo_programador
+        self._programador = None
+        self._cola = queue.Queue()
+        self._trabajos = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    # ------------------------------------------------------
+    #   Trabajos
+    # ------------------------------------------------------
+    def encolar(self, origen: str = "manual") -> str:
+        """Agrega un trabajo a la cola y retorna su id"""
+        self.iniciar()
+        trabajo = {
+            "id": uuid.uuid4().hex[:12],
+            "origen": origen,
+            "estado": PENDIENTE,
+            "creado": datetime.now().isoformat(),
+            "iniciado": None,
+            "terminado": None,
+            "nuevos": None,
+            "mensaje": None,
+        }
+        with self._lock:
+            self._trabajos[trabajo["id"]] = trabajo
+            while len(self._trabajos) > MAX_TRABAJOS:
+                self._trabajos.popitem(last=False)
+            self._persistir(trabajo)
+        self._podar()
+        self._cola.put(trabajo["id"])
+        return trabajo["id"]
+
+    def estado(self, id_trabajo: str):
+        """Copia del estado de un trabajo (de este u otro proceso), o None si no existe"""
+        with self._lock:
+            trabajo = self._trabajos.get(id_trabajo)
+            if trabajo is not None:
+                return dict(trabajo)
+        if not id_trabajo.isalnum():
+            return None
+        try:
+            with open(os.path.join(self.directorio, f"{id_trabajo}.json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _actualizar(self, id_trabajo, **cambios):
+        with self._lock:
+            if id_trabajo in self._trabajos:
+                self._trabajos[id_trabajo].update(cambios)
+                self._persistir(self._trabajos[id_trabajo])
+
+    def _persistir(self, trabajo):
+        """Escribe el estado del trabajo (temporal + rename)"""
+        try:
+            os.makedirs(self.directorio, exist_ok=True)
+            ruta = os.path.join(self.directorio, f"{trabajo['id']}.json")
+            with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(trabajo, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(ruta + ".tmp", ruta)
+        except OSError as e:
+            print(f"⚠ No se pudo guardar el estado del trabajo {trabajo['id']}: {e}")
+
+    def _podar(self):
+        """Conserva solo los MAX_TRABAJOS archivos de estado más recientes"""
+        try:
+            rutas = [os.path.join(self.directorio, n) for n in os.listdir(self.directorio) if n.endswith(".json")]
+            rutas.sort(key=os.path.getmtime)
+            for ruta in rutas[:-MAX_TRABAJOS]:
+                os.remove(ruta)
+        except OSError:
+            pass
+
+    def _ejecutar(self, id_trabajo):
+        self._actualizar(id_trabajo, estado=EN_CURSO, iniciado=datetime.now().isoformat())
+        try:
+            with lock_ingesta(bloquear=False):
+                nuevos = self.funcion()
+            if nuevos and self.al_terminar is not None:
+                self.al_terminar(nuevos)
+            self._actualizar(id_trabajo, estado=COMPLETADO, nuevos=nuevos,
+                             mensaje=f"{nuevos} sorteos nuevos" if nuevos else "Sin sorteos nuevos")
+        except IngestaOcupada as e:
+            self._actualizar(id_trabajo, estado=OMITIDO, mensaje=str(e))
+        except Exception as e:
+            self._actualizar(id_trabajo, estado=ERROR, mensaje=str(e))
+            print(f"❌ Error en la ingesta {id_trabajo}: {e}")
+        finally:
+            self._actualizar(id_trabajo, terminado=datetime.now().isoformat())
+
+    # ------------------------------------------------------
+    #   Thread en segundo plano
+    # ------------------------------------------------------
+    def iniciar(self):
+        """Arranca el thread (idempotente; se vuelve a crear en un proceso hijo tras fork)"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._bucle, name="ingestor", daemon=True)
+            self._thread.start()
+
+    def es_programador(self) -> bool:
+        """
+        True si este proceso encola la ingesta programada. El primero que toma el
+        lock lo conserva hasta terminar (sin fcntl, cada proceso programa la suya).
+        """
+        if fcntl is None:
+            return True
+        if self._programador is not None and self._programador[0] == os.getpid():
+            return True
+        # Un lock heredado por fork es del padre: se pide uno propio
+        archivo = open(self.archivo_programador, "a")
+        try:
+            fcntl.flock(archivo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            archivo.close()
+            return False
+        self._programador = (os.getpid(), archivo)
+        return True
+
+    def _bucle(self):
+        siguiente = proxima_hora(datetime.now(), self.minuto)
+        while True:
+            espera = (siguiente - datetime.now()).total_seconds() if self.programado else None
+            try:
+                id_trabajo = self._cola.get(timeout=max(espera, 0) if espera is not None else None)
+            except queue.Empty:
+                siguiente = proxima_hora(datetime.now(), self.minuto)
+                if self.es_programador():
+                    self.encolar("programado")
+                continue
+            self._ejecutar(id_trabajo)
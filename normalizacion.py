@@ -0,0 +1,78 @@
+# normalizacion.py - FECHA/HORA CANÓNICAS DE CADA SORTEO
+"""
+Única etapa que interpreta los textos de Fecha y Hora del historial.
+
+    draw_ts    int64  fecha+hora del sorteo en ns desde 1970 (NAT si no hay fecha)
+    hour_slot  int8   hora del día 0-23 (-1 si no se puede leer)
+
+Fecha acepta "dd/mm/yyyy" y "yyyy/mm/dd" (también con "-"), y Hora "8:00 AM" / "01:00 PM".
+Cada texto distinto se interpreta una sola vez, así el costo depende de las
+fechas distintas y no de la cantidad de filas.
+"""
+import numpy as np
+import pandas as pd
+
+NAT = np.iinfo(np.int64).min
+FORMATOS_FECHA = ("%d/%m/%Y", "%Y/%m/%d")
+_NS_POR_MINUTO = 60 * 10**9
+_NS_POR_DIA = 24 * 60 * _NS_POR_MINUTO
+# date.toordinal() de 1970-01-01
+_ORDINAL_EPOCH = 719163
+
+
+def _textos(serie) -> pd.Series:
+    serie = pd.Series(serie, dtype="object")
+    return serie.where(serie.notna(), "").astype(str).str.strip()
+
+
+def _por_valor_unico(serie: pd.Series, convertir) -> np.ndarray:
+    """Aplica `convertir` a los valores distintos y lo expande a todas las filas"""
+    unicas = pd.Index(serie.unique())
+    return convertir(unicas)[unicas.get_indexer(serie)]
+
+
+def _dias(unicas: pd.Index) -> np.ndarray:
+    fechas = unicas.str.replace("-", "/")
+    dias = pd.to_datetime(fechas, format=FORMATOS_FECHA[0], errors="coerce")
+    for formato in FORMATOS_FECHA[1:]:
+        dias = dias.where(dias.notna(), pd.to_datetime(fechas, format=formato, errors="coerce"))
+    return dias.to_numpy().astype("datetime64[ns]").view(np.int64)
+
+
+def _minutos(unicas: pd.Index) -> np.ndarray:
+    t = pd.to_datetime(unicas.str.upper(), format="%I:%M %p", errors="coerce")
+    return np.asarray((t.hour * 60 + t.minute).fillna(-1), dtype=np.int64)
+
+
+def minutos_del_dia(horas) -> np.ndarray:
+    """Minutos desde medianoche de cada hora (-1 si no se puede leer)"""
+    return _por_valor_unico(_textos(horas), _minutos)
+
+
+def hour_slot(horas) -> np.ndarray:
+    """Hora del día (0-23) de cada valor de Hora (-1 si no se puede leer)"""
+    minutos = minutos_del_dia(horas)
+    return np.where(minutos >= 0, minutos // 60, -1).astype(np.int8)
+
+
+def columnas_tiempo(fechas, horas):
+    """
+    (draw_ts, hour_slot) alineados con las filas.
+    Si la hora no se puede leer, draw_ts queda al inicio del día.
+    """
+    dias = _por_valor_unico(_textos(fechas), _dias)
+    minutos = minutos_del_dia(horas)
+    draw_ts = np.where(dias == NAT, NAT, dias + np.maximum(minutos, 0) * _NS_POR_MINUTO)
+    slots = np.where(minutos >= 0, minutos // 60, -1).astype(np.int8)
+    return draw_ts.astype(np.int64), slots
+
+
+def dias_ordinales(draw_ts: np.ndarray) -> np.ndarray:
+    """Número de día (como date.toordinal()) de cada draw_ts; -1 si no hay fecha"""
+    draw_ts = np.asarray(draw_ts, dtype=np.int64)
+    return np.where(draw_ts == NAT, -1, draw_ts // _NS_POR_DIA + _ORDINAL_EPOCH)
+
+
+def orden_cronologico(draw_ts: np.ndarray) -> np.ndarray:
+    """Posiciones ordenadas por draw_ts (estable; sin fecha al principio)"""
+    return np.argsort(np.asarray(draw_ts, dtype=np.int64), kind="stable")
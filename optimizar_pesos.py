@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Barrido de hiperparámetros del modelo (pesos de los scores, ventana de tendencia y top_k)
+evaluado con el backtest walk-forward en paralelo.
+
+Uso:
+    python optimizar_pesos.py --paso 0.1 --ventanas 15 30 60 --top-k 5 10
+    python optimizar_pesos.py --aleatorio 200 --workers 4 --salida barrido.csv
+"""
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from predictor_model import codificar_sorteos, walk_forward
+
+CSV = "resultados_guacharo.csv"
+COMPONENTES = ("freq", "recency", "trend", "markov")
+
+# Arreglos compartidos, visibles en cada proceso worker
+_DATOS = {}
+
+
+# ======================================================
+#   GENERACIÓN DE CONFIGURACIONES
+# ======================================================
+def pesos_en_grilla(paso: float) -> list:
+    """Todas las combinaciones de pesos múltiplos de `paso` que suman 1"""
+    divisiones = int(round(1 / paso))
+    pesos = []
+    for combo in itertools.product(range(divisiones + 1), repeat=len(COMPONENTES) - 1):
+        resto = divisiones - sum(combo)
+        if resto < 0:
+            continue
+        valores = list(combo) + [resto]
+        pesos.append({c: round(v / divisiones, 6) for c, v in zip(COMPONENTES, valores)})
+    return pesos
+
+
+def pesos_aleatorios(cantidad: int, semilla: int = 0) -> list:
+    """Vectores de pesos al azar (distribución uniforme sobre el simplex)"""
+    rng = np.random.default_rng(semilla)
+    muestras = rng.dirichlet(np.ones(len(COMPONENTES)), size=cantidad)
+    return [{c: round(float(v), 6) for c, v in zip(COMPONENTES, fila)} for fila in muestras]
+
+
+# ======================================================
+#   MEMORIA COMPARTIDA CON LOS WORKERS
+# ======================================================
+def _compartir(arreglo: np.ndarray):
+    """Copia un arreglo a memoria compartida; retorna el bloque y su descripción"""
+    shm = shared_memory.SharedMemory(create=True, size=max(arreglo.nbytes, 1))
+    np.ndarray(arreglo.shape, dtype=arreglo.dtype, buffer=shm.buf)[:] = arreglo
+    return shm, (shm.name, arreglo.shape, arreglo.dtype.str)
+
+
+def _iniciar_worker(descripciones: dict):
+    """Conecta el worker a los arreglos compartidos (sin copiar ni serializar el historial)"""
+    for nombre, (shm_nombre, forma, dtype) in descripciones.items():
+        shm = shared_memory.SharedMemory(name=shm_nombre)
+        _DATOS[nombre + "_shm"] = shm
+        _DATOS[nombre] = np.ndarray(forma, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def _evaluar(pesos: dict, window: int, tops: tuple, lookback_window: int, eval_window):
+    """Corre un backtest con el mayor top_k y deriva los aciertos de los demás"""
+    res = walk_forward(_DATOS["codigos"], _DATOS["dias"], lookback_window, eval_window,
+                       max(tops), pesos, window)
+    reales = res["reales"][:, None]
+    filas = []
+    for top_k in tops:
+        # El ranking es estable: el top_k es el prefijo del top máximo
+        aciertos = int(((res["predicciones"][:, :top_k] == reales).any(axis=1) & (res["reales"] >= 0)).sum())
+        filas.append({
+            **{f"w_{c}": pesos.get(c, 0) for c in COMPONENTES},
+            "window": window,
+            "top_k": top_k,
+            "aciertos": aciertos,
+            "total_pruebas": res["total_pruebas"],
+            "tasa_acierto": aciertos / res["total_pruebas"] if res["total_pruebas"] else 0.0
+        })
+    return filas
+
+
+# ======================================================
+#   BARRIDO
+# ======================================================
+def barrido(df: pd.DataFrame, lista_pesos: list, ventanas: list, tops: list,
+            lookback_window: int = 100, eval_window: int = None, workers: int = None) -> pd.DataFrame:
+    """Evalúa todas las configuraciones en paralelo y retorna la tabla ordenada por tasa de acierto"""
+    codigos, dias = codificar_sorteos(df)
+    bloques = {}
+    try:
+        descripciones = {}
+        for nombre, arreglo in (("codigos", codigos), ("dias", dias)):
+            bloques[nombre], descripciones[nombre] = _compartir(arreglo)
+
+        resultados = {}
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker,
+                                 initargs=(descripciones,)) as executor:
+            tareas = {executor.submit(_evaluar, pesos, window, tuple(tops), lookback_window, eval_window): pos
+                      for pos, (pesos, window) in enumerate(itertools.product(lista_pesos, ventanas))}
+            for i, tarea in enumerate(as_completed(tareas), 1):
+                resultados[tareas[tarea]] = tarea.result()
+                if i % 50 == 0 or i == len(tareas):
+                    print(f"   {i}/{len(tareas)} configuraciones evaluadas")
+    finally:
+        for shm in bloques.values():
+            shm.close()
+            shm.unlink()
+
+    # Orden de envío, para que los empates queden siempre en el mismo orden
+    tabla = pd.DataFrame([fila for pos in sorted(resultados) for fila in resultados[pos]])
+    tabla = tabla.sort_values(["tasa_acierto", "top_k"], ascending=[False, True], kind="stable")
+    tabla.insert(0, "ranking", range(1, len(tabla) + 1))
+    return tabla.reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de pesos del modelo Guácharo")
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--paso", type=float, default=0.1, help="Paso de la grilla de pesos")
+    grupo.add_argument("--aleatorio", type=int, help="Cantidad de vectores de pesos al azar")
+    parser.add_argument("--ventanas", type=int, nargs="+", default=[30])
+    parser.add_argument("--top-k", type=int, nargs="+", default=[5, 10])
+    parser.add_argument("--lookback", type=int, default=100)
+    parser.add_argument("--eval", type=int, default=None, help="Pasos a evaluar (por defecto todo el historial)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--csv", default=CSV)
+    parser.add_argument("--salida", default="resultados_barrido.csv")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🔧 BARRIDO DE PESOS DEL MODELO")
+    print("=" * 60)
+
+    df = pd.read_csv(args.csv)
+    lista_pesos = pesos_aleatorios(args.aleatorio) if args.aleatorio else pesos_en_grilla(args.paso)
+    print(f"📊 Registros: {len(df)}")
+    print(f"⚙ Configuraciones: {len(lista_pesos)} pesos × {len(args.ventanas)} ventanas × {len(args.top_k)} top_k")
+
+    inicio = time.perf_counter()
+    tabla = barrido(df, lista_pesos, args.ventanas, args.top_k, args.lookback, args.eval, args.workers)
+    tabla.to_csv(args.salida, index=False)
+
+    print(f"\n✅ Barrido completado en {time.perf_counter() - inicio:.1f}s -> {args.salida}")
+    print(tabla.head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
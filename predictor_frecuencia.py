@@ -0,0 +1,107 @@
+# predictor_frecuencia.py - SCORING POR FRECUENCIA DE /api/predict
+import numpy as np
+import pandas as pd
+
+import ranking
+
+try:
+    from utils.utils_map import numero_a_nombre
+except ImportError:
+    from utils_map import numero_a_nombre
+
+# Pesos y ventana de tendencia usados por la API
+PESO_FRECUENCIA = 0.4
+PESO_RECENCIA = 0.3
+PESO_TENDENCIA = 0.3
+VENTANA_TENDENCIA = 30
+PESOS = {"freq": PESO_FRECUENCIA, "recency": PESO_RECENCIA, "trend": PESO_TENDENCIA}
+
+
+def _ultimas_apariciones(df: pd.DataFrame, candidatos: np.ndarray):
+    """
+    Etiqueta (índice) de la última aparición de cada número.
+    Recorre el historial desde el final en bloques crecientes y se detiene en
+    cuanto aparecen todos los candidatos, así no depende del largo del historial.
+    """
+    if not df.index.is_monotonic_increasing:
+        ultimas = df.index.to_series().groupby(df['Num_Ganador'].to_numpy()).max()
+        return ultimas.index.to_numpy(), ultimas.to_numpy()
+
+    valores = df['Num_Ganador'].to_numpy()
+    etiquetas = df.index.to_numpy()
+    n = len(valores)
+    tam_bloque = 1024
+    while True:
+        inicio = max(0, n - tam_bloque)
+        unicos, pos_invertida = np.unique(valores[inicio:][::-1], return_index=True)
+        if inicio == 0 or np.isin(candidatos, unicos).all():
+            return unicos, etiquetas[n - 1 - pos_invertida]
+        tam_bloque *= 4
+
+
+def generar_predicciones_frecuencia(df: pd.DataFrame, top: int = 10, pesos: dict = None,
+                                    ventana: int = VENTANA_TENDENCIA) -> list:
+    """
+    Calcula las predicciones de /api/predict para los `top` números más frecuentes.
+    `pesos` ({freq, recency, trend}) y `ventana` (sorteos, >= 1) cambian el scoring por defecto.
+
+    `df` es el historial limpio (Num_Ganador numérico, índice original del CSV).
+    Recencia y tendencia se calculan para todos los candidatos a la vez:
+    última aparición con un escaneo inverso y conteos de la ventana reciente.
+    """
+    # Contar frecuencias
+    frecuencias = df['Num_Ganador'].value_counts().head(top)
+    total_registros = len(df)
+    if frecuencias.empty:
+        return []
+
+    candidatos = frecuencias.index.to_numpy()
+
+    # Última aparición de cada número
+    unicos, ultima_etiqueta = _ultimas_apariciones(df, candidatos)
+
+    # Apariciones en los últimos registros
+    recientes = df['Num_Ganador'].to_numpy()[-ventana:]
+    unicos_recientes, conteos_recientes = np.unique(recientes, return_counts=True)
+
+    freqs = frecuencias.to_numpy()
+    max_freq = freqs.max()
+
+    # Calcular scores normalizados (0-1)
+    score_frecuencia = np.minimum(freqs.astype(float) / float(max_freq), 1.0)
+
+    ultima_pos = ultima_etiqueta[np.searchsorted(unicos, candidatos)]
+    score_recencia = np.minimum((total_registros - ultima_pos) / total_registros, 1.0)
+
+    pos_reciente = np.searchsorted(unicos_recientes, candidatos)
+    pos_reciente_valida = np.minimum(pos_reciente, len(unicos_recientes) - 1)
+    presentes = unicos_recientes[pos_reciente_valida] == candidatos
+    freq_reciente = np.where(presentes, conteos_recientes[pos_reciente_valida], 0)
+    score_tendencia = np.minimum(freq_reciente / float(ventana), 1.0)
+
+    # Score total (promedio ponderado)
+    if pesos is None:
+        pesos = PESOS
+    score_total = (score_frecuencia * pesos.get("freq", 0) +
+                   score_recencia * pesos.get("recency", 0) +
+                   score_tendencia * pesos.get("trend", 0))
+
+    # Ordenar por Score_Total (redondeado) descendente; a igual score, el más frecuente
+    totales = np.array([round(float(x), 3) for x in score_total])
+    orden = ranking.top_k(totales, len(totales))
+
+    predicciones = []
+    for i in orden.tolist():
+        numero = int(float(candidatos[i]))
+        freq = int(freqs[i])
+        predicciones.append({
+            'Numero': numero,
+            'Animal': numero_a_nombre(numero),
+            'Score_Total': float(totales[i]),
+            'Score_Frecuencia': round(float(score_frecuencia[i]), 3),
+            'Score_Recencia': round(float(score_recencia[i]), 3),
+            'Score_Tendencia': round(float(score_tendencia[i]), 3),
+            'Frecuencia_Absoluta': freq,
+            'Probabilidad_Porcentaje': round((float(freq) / total_registros) * 100, 2)
+        })
+    return predicciones
@@ -0,0 +1,226 @@
+# predictor_lote.py - VARIAS PREDICCIONES SOBRE UN MISMO HISTORIAL
+"""
+Evalúa una lista de configuraciones de predicción para POST /api/predict/batch.
+
+Cada configuración (spec) es {model, top, weights, window, as_of, markov_order, hour}:
+
+    model         "frecuencia" (scoring de /api/predict), "modelo" (generar_predicciones)
+                  o "markov" (probabilidades de transición)
+    top           cantidad de números (1-77)
+    weights       pesos {freq, recency, trend, markov}; por defecto los de cada modelo
+    window        sorteos de la ventana de tendencia
+    as_of         fecha/hora ISO 8601: solo se usan los sorteos hasta ese instante
+    markov_order  orden de la cadena de Markov (1-3; "modelo" y "markov")
+    hour          hora del sorteo a predecir ("20" o "8:00 PM"): condiciona la
+                  cadena por hora ("modelo" y "markov")
+
+Todas las specs usan el mismo Dataset: los sorteos codificados en orden
+cronológico se calculan una vez por versión de datos y cada ScoringState
+se construye una sola vez por (window, as_of) dentro del lote. Con as_of el
+estado se restaura desde los checkpoints diarios (checkpoints_scoring.py).
+"""
+import numpy as np
+import pandas as pd
+
+import normalizacion
+from analitica_horaria import slot_de
+from checkpoints_scoring import CheckpointsScoring
+from predictor_frecuencia import VENTANA_TENDENCIA, generar_predicciones_frecuencia
+from predictor_markov import CadenaMarkov
+from predictor_model import N_ESTADOS, PESOS_DEFECTO, ScoringState, codificar_sorteos, score_cadena
+
+MODELOS = ("frecuencia", "modelo", "markov")
+MAX_SPECS = 20
+MAX_VENTANA = 10_000
+
+
+class SpecInvalida(ValueError):
+    """Una configuración del lote no es válida"""
+
+
+# ======================================================
+#   VALIDACIÓN DE SPECS
+# ======================================================
+def instante(as_of):
+    """draw_ts (ns) de un as_of ISO 8601, o None si no se pidió"""
+    if as_of in (None, ""):
+        return None
+    try:
+        ts = pd.Timestamp(str(as_of))
+    except ValueError:
+        raise SpecInvalida(f"as_of inválido: {as_of}")
+    if ts is pd.NaT:
+        raise SpecInvalida(f"as_of inválido: {as_of}")
+    return int(ts.tz_localize(None).value) if ts.tzinfo is not None else int(ts.value)
+
+
+def _entero(spec, clave, defecto, minimo, maximo):
+    valor = spec.get(clave, defecto)
+    if isinstance(valor, bool) or not isinstance(valor, int) or not minimo <= valor <= maximo:
+        raise SpecInvalida(f"{clave} debe ser un entero entre {minimo} y {maximo}")
+    return valor
+
+
+def normalizar_spec(spec) -> dict:
+    """Spec con valores por defecto completos; SpecInvalida si algo no es válido"""
+    if not isinstance(spec, dict):
+        raise SpecInvalida("Cada spec debe ser un objeto")
+
+    modelo = spec.get("model", "frecuencia")
+    if modelo not in MODELOS:
+        raise SpecInvalida(f"model debe ser uno de: {', '.join(MODELOS)}")
+
+    pesos = spec.get("weights")
+    if pesos is not None:
+        if not isinstance(pesos, dict) or not set(pesos) <= set(PESOS_DEFECTO):
+            raise SpecInvalida(f"weights acepta las claves: {', '.join(PESOS_DEFECTO)}")
+        if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in pesos.values()):
+            raise SpecInvalida("weights debe tener valores numéricos")
+        pesos = {k: float(v) for k, v in pesos.items()}
+
+    orden = _entero(spec, "markov_order", 1, 1, 3)
+    hora = spec.get("hour")
+    slot = None
+    if hora not in (None, ""):
+        slot = None if isinstance(hora, bool) else slot_de(str(hora))
+        if slot is None:
+            raise SpecInvalida(f"hour inválida: {hora}")
+    if modelo == "frecuencia" and (orden != 1 or slot is not None):
+        raise SpecInvalida("markov_order y hour solo aplican a model=modelo o markov")
+
+    as_of = spec.get("as_of")
+    return {
+        "model": modelo,
+        "top": _entero(spec, "top", 10, 1, N_ESTADOS),
+        "weights": pesos,
+        "window": _entero(spec, "window", VENTANA_TENDENCIA, 1, MAX_VENTANA),
+        "as_of": as_of,
+        "markov_order": orden,
+        "hour": hora,
+        "_as_of_ts": instante(as_of),
+        "_hora": slot,
+    }
+
+
+# ======================================================
+#   ESTADO COMPARTIDO
+# ======================================================
+class HistorialCronologico:
+    """
+    Sorteos del historial limpio, codificados (-1 = número no válido) y en orden
+    cronológico, con la hora 0-23 de cada uno
+    """
+
+    def __init__(self, codigos: np.ndarray, dias: np.ndarray, draw_ts: np.ndarray, horas: np.ndarray = None):
+        self.codigos = codigos
+        self.dias = dias
+        self.draw_ts = draw_ts
+        self.horas = horas
+
+    @classmethod
+    def desde_dataset(cls, dataset) -> "HistorialCronologico":
+        draw_ts = dataset.draw_ts_limpio
+        codigos, dias = codificar_sorteos(dataset.limpio, draw_ts)
+        horas = dataset.hour_slot[dataset.limpio.index.to_numpy()].astype(np.int64)
+        orden = normalizacion.orden_cronologico(draw_ts)
+        return cls(codigos[orden], dias[orden], draw_ts[orden], horas[orden])
+
+
+def checkpoints_de(dataset) -> CheckpointsScoring:
+    """Checkpoints diarios del ScoringState, una vez por versión de datos"""
+    return dataset.derivado("checkpoints_scoring", lambda ds: CheckpointsScoring.desde_historial(
+        ds.derivado("historial_cronologico", HistorialCronologico.desde_dataset)))
+
+
+class Lote:
+    """Evalúa specs ya normalizadas sobre un Dataset, compartiendo el estado entre ellas"""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.historial = dataset.derivado("historial_cronologico", HistorialCronologico.desde_dataset)
+        self._estados = {}
+        self._cadenas = {}
+
+    def _estado(self, window: int, as_of_ts) -> ScoringState:
+        if as_of_ts is None:
+            clave = (window, None)
+            if clave not in self._estados:
+                h = self.historial
+                self._estados[clave] = ScoringState.desde_arrays(h.codigos, h.dias, window)
+            return self._estados[clave]
+
+        # Punto en el tiempo: checkpoint más cercano + los sorteos que faltan
+        checkpoints = checkpoints_de(self.dataset)
+        clave = (window, checkpoints.corte(as_of_ts))
+        if clave not in self._estados:
+            self._estados[clave] = checkpoints.restaurar(clave[1], window)
+        return self._estados[clave]
+
+    def _cadena(self, spec) -> CadenaMarkov:
+        """Cadena de orden markov_order (por hora si se pidió hour) con los sorteos hasta as_of"""
+        h = self.historial
+        corte = len(h.codigos)
+        if spec["_as_of_ts"] is not None:
+            corte = int(np.searchsorted(h.draw_ts, spec["_as_of_ts"], side="right"))
+        por_hora = spec["_hora"] is not None
+        clave = (spec["markov_order"], por_hora, corte)
+        if clave not in self._cadenas:
+            self._cadenas[clave] = CadenaMarkov.desde_codigos(
+                h.codigos[:corte], h.horas[:corte] if por_hora else None, spec["markov_order"], por_hora)
+        return self._cadenas[clave]
+
+    def _frecuencia(self, spec) -> list:
+        limpio = self.dataset.limpio
+        if spec["_as_of_ts"] is not None:
+            # Se conservan las etiquetas del CSV: la recencia se calcula sobre ellas,
+            # igual que en /api/predict con el historial de ese momento
+            limpio = limpio[self.dataset.draw_ts_limpio <= spec["_as_of_ts"]]
+        return generar_predicciones_frecuencia(limpio, spec["top"], spec["weights"], spec["window"])
+
+    def evaluar(self, spec: dict) -> list:
+        """Predicciones de una spec normalizada, en el formato de su modelo"""
+        if spec["model"] == "frecuencia":
+            return self._frecuencia(spec)
+
+        estado = self._estado(spec["window"], spec["_as_of_ts"])
+        # Orden 1 sin hora: las transiciones del ScoringState
+        cadena = None
+        if spec["markov_order"] > 1 or spec["_hora"] is not None:
+            cadena = self._cadena(spec)
+
+        if spec["model"] == "markov":
+            if cadena is not None:
+                return cadena.predecir(spec["top"], hora=spec["_hora"])
+            return estado.transiciones.predecir(spec["top"])
+
+        markov = score_cadena(cadena, spec["_hora"]) if cadena is not None and estado.total else None
+        return [p.a_dict() for p in estado.mejores(spec["top"], spec["weights"], markov)]
+
+
+def evaluar_lote(dataset, specs: list) -> list:
+    """
+    Resultado de cada spec, en el mismo orden: {spec, count, predictions}.
+    SpecInvalida (con la posición) si alguna spec no es válida; no se evalúa ninguna.
+    """
+    if not isinstance(specs, list) or not specs:
+        raise SpecInvalida("Se espera una lista no vacía de specs")
+    if len(specs) > MAX_SPECS:
+        raise SpecInvalida(f"Máximo {MAX_SPECS} specs por lote")
+
+    normalizadas = []
+    for i, spec in enumerate(specs):
+        try:
+            normalizadas.append(normalizar_spec(spec))
+        except SpecInvalida as e:
+            raise SpecInvalida(f"spec {i}: {e}")
+
+    lote = Lote(dataset)
+    resultados = []
+    for spec in normalizadas:
+        predicciones = lote.evaluar(spec)
+        resultados.append({
+            "spec": {k: v for k, v in spec.items() if not k.startswith("_")},
+            "count": len(predicciones),
+            "predictions": predicciones,
+        })
+    return resultados
@@ -1,99 +1,285 @@
 import numpy as np
 import pandas as pd
-from utils.utils_map import nombre_a_numero, numero_a_nombre
+try:
+    from utils.utils_map import ESTADOS, numero_a_nombre
+except ImportError:
+    from utils_map import ESTADOS, numero_a_nombre
+
+import normalizacion
+import ranking
+
+
+# Espacio fijo de estados del juego: 0-75 y 100 (Ballena), ver utils_map.ESTADOS
+N_ESTADOS = len(ESTADOS)
+_POS_ESTADO = {num: i for i, num in enumerate(ESTADOS)}
+_TABLA_ESTADOS = np.full(max(ESTADOS) + 1, -1, dtype=np.int64)
+_TABLA_ESTADOS[list(ESTADOS)] = np.arange(N_ESTADOS)
+
+
+def codificar_estados(valores) -> np.ndarray:
+    """Posición de cada número en ESTADOS (-1 si falta o no es un número del juego)"""
+    nums = pd.to_numeric(pd.Series(valores), errors="coerce").to_numpy(dtype=float)
+    validos = np.isfinite(nums) & (nums >= 0) & (nums < len(_TABLA_ESTADOS))
+    codigos = np.full(len(nums), -1, dtype=np.int64)
+    codigos[validos] = _TABLA_ESTADOS[nums[validos].astype(np.int64)]
+    return codigos
 
 
 # ======================================================
-#   MATRIZ DE TRANSICIÓN DE MARKOV
+#   CONTEOS DE TRANSICIÓN PERSISTENTES
 # ======================================================
-def construir_matriz_transicion(df: pd.DataFrame):
+class TransicionesMarkov:
     """
-    Construye una matriz de transición de Markov basada en la columna 'numero'.
+    Conteos de transición de primer orden sobre los 77 estados del juego.
+
+    Se actualiza en O(1) por sorteo y normaliza cada fila solo cuando se
+    consulta, así una predicción cuesta O(77) sin reconstruir la matriz.
+    Un número fuera del juego corta la cadena (no genera transiciones).
     """
-    if "numero" not in df.columns:
-        raise ValueError("El DataFrame no contiene la columna 'numero'.")
 
-    secuencia = df["numero"].dropna().astype(int).tolist()
-    estados = sorted(list(set(secuencia)))
+    def __init__(self):
+        self.conteos = np.zeros((N_ESTADOS, N_ESTADOS), dtype=np.int64)
+        self.totales = np.zeros(N_ESTADOS, dtype=np.int64)
+        self.vistos = np.zeros(N_ESTADOS, dtype=bool)
+        self.ultimo = -1
+
+    @classmethod
+    def desde_codigos(cls, codigos: np.ndarray) -> "TransicionesMarkov":
+        """Construye los conteos en una pasada vectorizada sobre la secuencia codificada"""
+        modelo = cls()
+        codigos = np.asarray(codigos, dtype=np.int64)
+        if len(codigos) == 0:
+            return modelo
+        origen, destino = codigos[:-1], codigos[1:]
+        pares = (origen >= 0) & (destino >= 0)
+        modelo.conteos = np.bincount(origen[pares] * N_ESTADOS + destino[pares],
+                                     minlength=N_ESTADOS * N_ESTADOS).reshape(N_ESTADOS, N_ESTADOS)
+        modelo.totales = modelo.conteos.sum(axis=1)
+        modelo.vistos[codigos[codigos >= 0]] = True
+        modelo.ultimo = int(codigos[-1])
+        return modelo
+
+    @classmethod
+    def desde_df(cls, df: pd.DataFrame, columna: str = "numero") -> "TransicionesMarkov":
+        """Construye los conteos a partir de la columna de números del DataFrame"""
+        if columna not in df.columns:
+            raise ValueError(f"El DataFrame no contiene la columna '{columna}'.")
+        return cls.desde_codigos(codificar_estados(df[columna].dropna()))
 
-    n = len(estados)
-    matriz = np.zeros((n, n))
+    def avanzar(self, idx: int):
+        """Agrega un sorteo ya codificado (posición en ESTADOS, -1 si no es válido) en O(1)"""
+        if idx >= 0:
+            if self.ultimo >= 0:
+                self.conteos[self.ultimo, idx] += 1
+                self.totales[self.ultimo] += 1
+            self.vistos[idx] = True
+        self.ultimo = idx
 
-    index = {estado: i for i, estado in enumerate(estados)}
+    def actualizar(self, numero):
+        """Agrega el número del último sorteo en O(1)"""
+        try:
+            idx = _POS_ESTADO.get(int(numero), -1)
+        except (TypeError, ValueError, OverflowError):
+            idx = -1
+        self.avanzar(idx)
 
-    for i in range(len(secuencia) - 1):
-        a = secuencia[i]
-        b = secuencia[i + 1]
+    def fila(self, idx: int) -> np.ndarray:
+        """Probabilidades de transición desde el estado `idx` (ceros si nunca salió)"""
+        total = self.totales[idx]
+        if total == 0:
+            return np.zeros(N_ESTADOS)
+        return self.conteos[idx] / total
 
-        if a in index and b in index:
-            matriz[index[a]][index[b]] += 1
+    def probabilidades_siguiente(self) -> np.ndarray:
+        """Probabilidades del próximo sorteo dado el último número visto"""
+        if self.ultimo < 0:
+            return np.zeros(N_ESTADOS)
+        return self.fila(self.ultimo)
 
-    # Normalizar
-    for i in range(n):
-        total = matriz[i].sum()
-        if total > 0:
-            matriz[i] /= total
+    def matriz(self):
+        """Matriz normalizada y lista de estados, restringidas a los números observados"""
+        idx = np.flatnonzero(self.vistos)
+        sub = self.conteos[np.ix_(idx, idx)].astype(float)
+        totales = sub.sum(axis=1, keepdims=True)
+        matriz = np.divide(sub, totales, out=np.zeros_like(sub), where=totales > 0)
+        return matriz, [ESTADOS[i] for i in idx]
 
-    return matriz, estados
+    def entropia(self) -> float:
+        """Entropía de la matriz de transición normalizada"""
+        probs = np.divide(self.conteos, self.totales[:, None],
+                          out=np.zeros(self.conteos.shape), where=self.totales[:, None] > 0)
+        eps = 1e-9
+        return float(-np.sum(probs * np.log(probs + eps)))
+
+    def predecir(self, top_n: int = 3) -> list:
+        """Números con mayor probabilidad de salir después del último sorteo"""
+        if self.ultimo < 0:
+            return []
+        candidatos = np.flatnonzero(self.vistos)
+
+        # Mayor probabilidad primero; a igual probabilidad, el número menor
+        resultados = []
+        for i, probabilidad in ranking.ranking(self.fila(self.ultimo)[candidatos], top_n):
+            numero = ESTADOS[candidatos[i]]
+            resultados.append({
+                "numero": numero,
+                "animal": numero_a_nombre(numero),
+                "probabilidad": round(probabilidad, 4)
+            })
+        return resultados
 
 
 # ======================================================
-#   SCORE MARKOV (INDICADOR SIMPLE)
+#   CADENAS DE ORDEN K Y CONDICIONADAS POR HORA
 # ======================================================
-def score_markov(df: pd.DataFrame) -> float:
+def slots_hora(horas: pd.Series) -> np.ndarray:
+    """Hora del día (0-23) de cada valor "8:00 AM" de la columna Hora (-1 si no se puede leer)"""
+    return normalizacion.hour_slot(horas).astype(np.int64)
+
+
+class CadenaMarkov:
     """
-    Calcula un score simple basado en la entropía de la matriz de transición.
+    Cadena de Markov de orden `orden` (1-3), opcionalmente condicionada por la
+    hora del sorteo a predecir.
+
+    Cada transición (contexto, siguiente) se codifica como un entero y los conteos
+    se guardan en dos arreglos ordenados (claves, conteos): solo ocupan memoria
+    las transiciones observadas, no una tabla densa de 77^(orden+1).
+    Las filas de un mismo contexto quedan contiguas, así una consulta es una
+    búsqueda binaria más O(77).
     """
-    matriz, _ = construir_matriz_transicion(df)
 
-    if matriz.size == 0:
-        return 0.0
+    def __init__(self, orden: int = 2, por_hora: bool = False):
+        if not 1 <= orden <= 3:
+            raise ValueError("El orden de la cadena debe estar entre 1 y 3.")
+        self.orden = orden
+        self.por_hora = por_hora
+        self.claves = np.zeros(0, dtype=np.int64)
+        self.conteos = np.zeros(0, dtype=np.int32)
+        self.contexto = []
+
+    @classmethod
+    def desde_codigos(cls, codigos: np.ndarray, horas: np.ndarray = None,
+                      orden: int = 2, por_hora: bool = False) -> "CadenaMarkov":
+        """
+        Cuenta todas las transiciones en una pasada vectorizada.
+        `horas` (hora 0-23 de cada sorteo) es obligatorio si `por_hora`.
+        """
+        cadena = cls(orden, por_hora)
+        codigos = np.asarray(codigos, dtype=np.int64)
+        n = len(codigos)
+        if n > orden:
+            # Contexto = los `orden` sorteos anteriores, en base 77
+            claves = np.zeros(n - orden, dtype=np.int64)
+            validos = codigos[orden:] >= 0
+            for j in range(orden):
+                previo = codigos[j:n - orden + j]
+                claves = claves * N_ESTADOS + np.maximum(previo, 0)
+                validos &= previo >= 0
+            if por_hora:
+                horas = np.asarray(horas, dtype=np.int64)[orden:]
+                claves = claves + horas * N_ESTADOS ** orden
+                validos &= horas >= 0
+            claves = claves * N_ESTADOS + np.maximum(codigos[orden:], 0)
+
+            cadena.claves, conteos = np.unique(claves[validos], return_counts=True)
+            cadena.conteos = conteos.astype(np.int32)
+        cadena.contexto = codigos[-orden:].tolist()
+        return cadena
+
+    @classmethod
+    def desde_df(cls, df: pd.DataFrame, orden: int = 2, por_hora: bool = False,
+                 columna: str = "Num_Ganador") -> "CadenaMarkov":
+        """Construye la cadena a partir del historial (en el orden de sus filas)"""
+        horas = slots_hora(df["Hora"]) if por_hora else None
+        return cls.desde_codigos(codificar_estados(df[columna]), horas, orden, por_hora)
+
+    def _clave_contexto(self, contexto, hora) -> int:
+        clave = 0
+        for idx in contexto:
+            if idx < 0:
+                return -1
+            clave = clave * N_ESTADOS + idx
+        if self.por_hora:
+            if hora is None or hora < 0:
+                return -1
+            clave += hora * N_ESTADOS ** self.orden
+        return clave
+
+    def probabilidades(self, contexto=None, hora: int = None) -> np.ndarray:
+        """
+        Probabilidades del próximo estado (alineadas con ESTADOS) dado un contexto
+        de `orden` posiciones en ESTADOS (por defecto los últimos sorteos vistos).
+        Un contexto nunca observado devuelve ceros.
+        """
+        if contexto is None:
+            contexto = self.contexto
+        probs = np.zeros(N_ESTADOS)
+        if len(contexto) != self.orden:
+            return probs
+        clave = self._clave_contexto(contexto, hora)
+        if clave < 0:
+            return probs
 
-    eps = 1e-9
-    entropia = -np.sum(matriz * np.log(matriz + eps))
+        inicio = clave * N_ESTADOS
+        lo, hi = np.searchsorted(self.claves, (inicio, inicio + N_ESTADOS))
+        if hi > lo:
+            conteos = self.conteos[lo:hi]
+            probs[self.claves[lo:hi] - inicio] = conteos / conteos.sum()
+        return probs
 
-    return float(entropia)
+    def predecir(self, top_n: int = 3, hora: int = None) -> list:
+        """Números con mayor probabilidad de salir después de los últimos sorteos"""
+        probs = self.probabilidades(hora=hora)
+        candidatos = np.flatnonzero(probs)
+        return [{
+            "numero": ESTADOS[candidatos[i]],
+            "animal": numero_a_nombre(ESTADOS[candidatos[i]]),
+            "probabilidad": round(probabilidad, 4)
+        } for i, probabilidad in ranking.ranking(probs[candidatos], top_n)]
 
 
 # ======================================================
-#   PREDICCIÓN PRINCIPAL DE MARKOV
+#   MATRIZ DE TRANSICIÓN DE MARKOV
 # ======================================================
-def generate_markov_prediction(df: pd.DataFrame, top_n=3):
+def construir_matriz_transicion(df: pd.DataFrame):
     """
-    Genera predicciones usando cadenas de Markov:
-    - Toma el último número real del historial
-    - Busca la fila correspondiente en la matriz de transición
-    - Devuelve los animales con mayor probabilidad
+    Construye una matriz de transición de Markov basada en la columna 'numero'.
     """
     if "numero" not in df.columns:
-        raise ValueError("El DataFrame debe contener columna 'numero'.")
-
-    matriz, estados = construir_matriz_transicion(df)
+        raise ValueError("El DataFrame no contiene la columna 'numero'.")
 
-    if len(estados) == 0:
-        return []
+    return TransicionesMarkov.desde_df(df).matriz()
 
-    # último número jugado
-    ultimo_num = int(df["numero"].dropna().iloc[-1])
 
-    if ultimo_num not in estados:
-        return []
+# ======================================================
+#   SCORE MARKOV (INDICADOR SIMPLE)
+# ======================================================
+def score_markov(df: pd.DataFrame, modelo: TransicionesMarkov = None) -> float:
+    """
+    Calcula un score simple basado en la entropía de la matriz de transición.
+    Si se pasa `modelo`, reutiliza sus conteos en lugar de reconstruirlos.
+    """
+    if modelo is None:
+        modelo = TransicionesMarkov.desde_df(df)
 
-    idx = estados.index(ultimo_num)
-    probs = matriz[idx]
+    return modelo.entropia()
 
-    # Tomar los mejores N estados siguientes
-    best_idx = np.argsort(probs)[::-1][:top_n]
 
-    resultados = []
-    for i in best_idx:
-        numero = estados[i]
-        prob = probs[i]
-        nombre = numero_a_nombre(numero)
-        resultados.append({
-            "numero": numero,
-            "animal": nombre,
-            "probabilidad": round(float(prob), 4)
-        })
+# ======================================================
+#   PREDICCIÓN PRINCIPAL DE MARKOV
+# ======================================================
+def generate_markov_prediction(df: pd.DataFrame, top_n=3, modelo: TransicionesMarkov = None):
+    """
+    Genera predicciones usando cadenas de Markov:
+    - Toma el último número real del historial
+    - Busca la fila correspondiente en la matriz de transición
+    - Devuelve los animales con mayor probabilidad
+    Si se pasa `modelo` (ya actualizado con el historial), no se recorre el DataFrame.
+    """
+    if modelo is None:
+        if "numero" not in df.columns:
+            raise ValueError("El DataFrame debe contener columna 'numero'.")
+        modelo = TransicionesMarkov.desde_df(df)
 
-    return resultados
+    return modelo.predecir(top_n)
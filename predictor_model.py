@@ -1,10 +1,30 @@
 # predictor_model.py - VERSIÓN CORREGIDA
+from collections import deque
+from typing import NamedTuple
+
 import pandas as pd
 import numpy as np
-from utils.utils_map import numero_a_nombre
+try:
+    from utils.utils_map import ESTADOS, numero_a_nombre
+except ImportError:
+    from utils_map import ESTADOS, numero_a_nombre
+from predictor_markov import CadenaMarkov, TransicionesMarkov
+import normalizacion
+import ranking
 
 # Estados válidos según el mapeo exacto
-STATES = sorted([0, 100] + list(range(1, 76)))  # [0, 1, 2, ..., 75, 100]
+STATES = list(ESTADOS)  # [0, 1, 2, ..., 75, 100]
+N_ESTADOS = len(STATES)
+
+# Posición de cada número en STATES (-1 = número no válido)
+_POS_ESTADO = {num: i for i, num in enumerate(STATES)}
+_TABLA_ESTADOS = np.full(max(STATES) + 1, -1, dtype=np.int64)
+_TABLA_ESTADOS[STATES] = np.arange(N_ESTADOS)
+
+# Días asignados a los números que nunca han salido
+DIAS_NUNCA_VISTO = 999
+
+PESOS_DEFECTO = {"freq": 0.40, "recency": 0.30, "trend": 0.20, "markov": 0.10}
 
 def normalizar_serie(s: pd.Series) -> pd.Series:
     """Normaliza una serie entre 0 y 1"""
@@ -25,6 +45,11 @@ def filtrar_numeros_validos(df: pd.DataFrame) -> pd.DataFrame:
     """Filtra solo los números válidos del juego"""
     return df[df["Num_Ganador"].apply(es_numero_valido)].copy()
 
+def fechas_sorteo(df: pd.DataFrame) -> pd.Series:
+    """Fecha y hora canónicas de cada fila como datetime (NaT si no hay fecha)"""
+    draw_ts, _ = normalizacion.columnas_tiempo(df["Fecha"], df["Hora"])
+    return pd.Series(draw_ts.view("datetime64[ns]"), index=df.index)
+
 def score_frecuencia(df: pd.DataFrame) -> pd.Series:
     """Score basado en frecuencia de aparición"""
     df_valid = filtrar_numeros_validos(df)
@@ -48,7 +73,7 @@ def score_recencia(df: pd.DataFrame) -> pd.Series:
     
     # Convertir fechas
     df_valid = df_valid.copy()
-    df_valid["Fecha_dt"] = pd.to_datetime(df_valid["Fecha"], dayfirst=True, errors="coerce")
+    df_valid["Fecha_dt"] = fechas_sorteo(df_valid).dt.normalize()
     df_valid = df_valid.dropna(subset=["Fecha_dt"])
     
     if df_valid.empty:
@@ -80,7 +105,7 @@ def score_tendencia(df: pd.DataFrame, window: int = 30) -> pd.Series:
     
     # Ordenar por fecha
     df_valid = df_valid.copy()
-    df_valid["Fecha_dt"] = pd.to_datetime(df_valid["Fecha"], dayfirst=True, errors="coerce")
+    df_valid["Fecha_dt"] = fechas_sorteo(df_valid)
     df_valid = df_valid.sort_values("Fecha_dt", ascending=False)
     
     # Tomar últimos 'window' resultados
@@ -94,57 +119,404 @@ def score_tendencia(df: pd.DataFrame, window: int = 30) -> pd.Series:
     
     return normalizar_serie(s)
 
+# ======================================================
+#   ESTADO INCREMENTAL DE SCORING
+# ======================================================
+def indice_estado(num):
+    """Posición del número en STATES, o None si no es un número válido"""
+    try:
+        return _POS_ESTADO.get(int(num))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+def _dia(fecha):
+    """Convierte una fecha (date, datetime, Timestamp) a número de día; None si falta"""
+    if fecha is None or fecha is pd.NaT:
+        return None
+    if isinstance(fecha, (int, np.integer)):
+        return int(fecha)
+    try:
+        return fecha.toordinal()
+    except AttributeError:
+        return pd.Timestamp(fecha).toordinal()
+
+def codificar_sorteos(df: pd.DataFrame, draw_ts: np.ndarray = None):
+    """
+    Convierte el historial a dos arreglos alineados:
+    posición del estado (-1 si el número no es válido) y día del sorteo (-1 si no hay fecha).
+    `draw_ts` (de normalizacion.py, alineado con las filas) evita volver a leer Fecha/Hora.
+    """
+    nums = pd.to_numeric(df["Num_Ganador"], errors="coerce").to_numpy(dtype=float)
+    validos = np.isfinite(nums) & (nums >= 0) & (nums < len(_TABLA_ESTADOS))
+    codigos = np.full(len(nums), -1, dtype=np.int64)
+    codigos[validos] = _TABLA_ESTADOS[nums[validos].astype(np.int64)]
+
+    if draw_ts is None:
+        draw_ts, _ = normalizacion.columnas_tiempo(df["Fecha"], df["Hora"])
+    return codigos, normalizacion.dias_ordinales(draw_ts)
+
+def codificar_cronologico(df: pd.DataFrame, draw_ts: np.ndarray = None):
+    """codificar_sorteos() con los sorteos ordenados por fecha y hora"""
+    if draw_ts is None:
+        draw_ts, _ = normalizacion.columnas_tiempo(df["Fecha"], df["Hora"])
+    codigos, dias = codificar_sorteos(df, draw_ts)
+    orden = normalizacion.orden_cronologico(draw_ts)
+    return codigos[orden], dias[orden]
+
+def minutos_del_dia(horas: pd.Series) -> np.ndarray:
+    """Minutos desde medianoche de cada hora "8:00 AM" (-1 si no se puede leer)"""
+    return normalizacion.minutos_del_dia(horas)
+
+def _normalizar(a: np.ndarray) -> np.ndarray:
+    """Normaliza un arreglo entre 0 y 1 (igual que normalizar_serie)"""
+    a = a.astype(float)
+    minimo, maximo = a.min(), a.max()
+    if maximo == minimo:
+        return np.zeros(len(a))
+    return (a - minimo) / (maximo - minimo)
+
+class Prediccion(NamedTuple):
+    """Un número del ranking de ScoringState.mejores()"""
+    ranking: int
+    numero: int
+    score_total: float
+    score_frecuencia: float
+    score_recencia: float
+    score_tendencia: float
+    score_markov: float
+
+    def a_dict(self, decimales: int = 4) -> dict:
+        """Formato de las filas de generar_predicciones (claves de la API)"""
+        return {
+            "Numero": self.numero,
+            "Animal": numero_a_nombre(self.numero),
+            "Score_Total": round(self.score_total, decimales),
+            "Score_Frecuencia": round(self.score_frecuencia, decimales),
+            "Score_Recencia": round(self.score_recencia, decimales),
+            "Score_Tendencia": round(self.score_tendencia, decimales),
+            "Score_Markov": round(self.score_markov, decimales),
+            "Ranking": self.ranking
+        }
+
+class ScoringState:
+    """
+    Estadísticas acumuladas para generar_predicciones que se actualizan sorteo a sorteo:
+    conteos por estado, último día visto por estado, una ventana circular
+    con los últimos `window` sorteos para la tendencia y las transiciones
+    de Markov de primer orden. Un sorteo con un número no válido no cuenta
+    para los scores, pero corta la cadena de Markov (como en CadenaMarkov).
+
+    update() es O(1) y scores() es O(77), de modo que la API y el backtest
+    pueden avanzar un sorteo a la vez sin reprocesar el historial.
+    """
+
+    def __init__(self, window: int = 30):
+        self.window = window
+        self.total = 0
+        self.conteos = np.zeros(N_ESTADOS, dtype=np.int64)
+        self.ultimo_dia = np.full(N_ESTADOS, -1, dtype=np.int64)
+        self.dia_max = -1
+        self.ventana = deque(maxlen=window)
+        self.conteos_ventana = np.zeros(N_ESTADOS, dtype=np.int64)
+        self.transiciones = TransicionesMarkov()
+
+    @classmethod
+    def desde_df(cls, df: pd.DataFrame, window: int = 30,
+                 draw_ts: np.ndarray = None) -> "ScoringState":
+        """
+        Construye el estado a partir de un historial completo (vectorizado).
+        Los sorteos se ordenan por draw_ts, así la ventana de tendencia
+        contiene los más recientes aunque el CSV no esté en orden.
+        """
+        codigos, dias = codificar_cronologico(df, draw_ts)
+        return cls.desde_arrays(codigos, dias, window)
+
+    @classmethod
+    def desde_arrays(cls, codigos: np.ndarray, dias: np.ndarray, window: int = 30) -> "ScoringState":
+        """Construye el estado a partir de los arreglos de codificar_sorteos()"""
+        estado = cls(window)
+        # Las transiciones usan la secuencia completa: un sorteo no válido corta la cadena
+        estado.transiciones = TransicionesMarkov.desde_codigos(codigos)
+        validos = codigos >= 0
+        codigos = codigos[validos]
+        dias = dias[validos]
+
+        estado.total = len(codigos)
+        estado.conteos = np.bincount(codigos, minlength=N_ESTADOS).astype(np.int64)
+
+        con_fecha = dias >= 0
+        np.maximum.at(estado.ultimo_dia, codigos[con_fecha], dias[con_fecha])
+        if con_fecha.any():
+            estado.dia_max = int(dias[con_fecha].max())
+
+        if window > 0:
+            recientes = codigos[-window:]
+            estado.ventana.extend(recientes.tolist())
+            estado.conteos_ventana = np.bincount(recientes, minlength=N_ESTADOS).astype(np.int64)
+        return estado
+
+    def update(self, draw):
+        """
+        Agrega un sorteo `(numero, fecha)` en O(1).
+        Un número no válido solo corta la cadena de Markov; la fecha puede ser None.
+        """
+        numero, fecha = draw
+        idx = indice_estado(numero)
+        if idx is None:
+            self.avanzar(-1)
+            return
+        dia = _dia(fecha)
+        self.avanzar(idx, -1 if dia is None else dia)
+
+    def avanzar(self, idx: int, dia: int = -1):
+        """Agrega un sorteo ya codificado (posición en STATES o -1 si no es válido, día o -1) en O(1)"""
+        self.transiciones.avanzar(idx)
+        if idx < 0:
+            return
+        self.total += 1
+        self.conteos[idx] += 1
+
+        if dia >= 0:
+            if dia > self.ultimo_dia[idx]:
+                self.ultimo_dia[idx] = dia
+            if dia > self.dia_max:
+                self.dia_max = dia
+
+        if self.window > 0:
+            if len(self.ventana) == self.window:
+                self.conteos_ventana[self.ventana[0]] -= 1
+            self.ventana.append(idx)
+            self.conteos_ventana[idx] += 1
+
+    def scores(self) -> dict:
+        """Scores normalizados (0-1) por estado, alineados con STATES"""
+        if self.total == 0:
+            ceros = np.zeros(N_ESTADOS)
+            return {"freq": ceros, "recency": ceros, "trend": ceros, "markov": ceros}
+
+        if self.dia_max >= 0:
+            # Mayor score para números que salieron hace más tiempo
+            dias_sin_salir = np.where(self.ultimo_dia >= 0, self.dia_max - self.ultimo_dia, DIAS_NUNCA_VISTO)
+            recencia = _normalizar(dias_sin_salir)
+        else:
+            recencia = np.zeros(N_ESTADOS)
+
+        return {
+            "freq": _normalizar(self.conteos),
+            "recency": recencia,
+            "trend": _normalizar(self.conteos_ventana),
+            # Probabilidad de transición desde el último número
+            "markov": _normalizar(self.transiciones.probabilidades_siguiente())
+        }
+
+    def score_total(self, weights: dict = None, scores: dict = None) -> np.ndarray:
+        """Combinación ponderada de los scores"""
+        if weights is None:
+            weights = PESOS_DEFECTO
+        if scores is None:
+            scores = self.scores()
+        return (
+            weights.get("freq", 0) * scores["freq"] +
+            weights.get("recency", 0) * scores["recency"] +
+            weights.get("trend", 0) * scores["trend"] +
+            weights.get("markov", 0) * scores["markov"]
+        )
+
+    def _ranking(self, top_k: int, weights: dict, markov: np.ndarray):
+        scores = self.scores()
+        if markov is not None:
+            scores["markov"] = markov
+        total = self.score_total(weights, scores)
+        # Mayor score primero; a igual score gana el número menor
+        return ranking.top_k(total, top_k), total, scores
+
+    def mejores(self, top_k: int = 10, weights: dict = None,
+                markov: np.ndarray = None) -> list:
+        """Ranking como lista de Prediccion, sin armar un DataFrame"""
+        orden, total, scores = self._ranking(top_k, weights, markov)
+        columnas = zip(orden.tolist(), total[orden].tolist(), scores["freq"][orden].tolist(),
+                       scores["recency"][orden].tolist(), scores["trend"][orden].tolist(),
+                       scores["markov"][orden].tolist())
+        return [Prediccion(puesto, STATES[i], *valores)
+                for puesto, (i, *valores) in enumerate(columnas, 1)]
+
+    def predicciones(self, top_k: int = 10, weights: dict = None,
+                     markov: np.ndarray = None) -> pd.DataFrame:
+        """
+        Ranking de predicciones en el formato de generar_predicciones.
+        `markov` reemplaza el score de Markov de primer orden (p. ej. por uno de orden superior).
+        """
+        orden, total, scores = self._ranking(top_k, weights, markov)
+        df_result = pd.DataFrame({
+            "Numero": [STATES[i] for i in orden],
+            "Animal": [numero_a_nombre(STATES[i]) for i in orden],
+            "Score_Total": total[orden],
+            "Score_Frecuencia": scores["freq"][orden],
+            "Score_Recencia": scores["recency"][orden],
+            "Score_Tendencia": scores["trend"][orden],
+            "Score_Markov": scores["markov"][orden]
+        })
+        df_result["Ranking"] = df_result.index + 1
+        return df_result
+
+def score_cadena(cadena: CadenaMarkov, hora: int = None) -> np.ndarray:
+    """Score de Markov (0-1 por estado) de una CadenaMarkov tras sus últimos sorteos"""
+    return _normalizar(cadena.probabilidades(hora=hora))
+
 def generar_predicciones(df: pd.DataFrame, top_k: int = 10, 
-                         weights: dict = None, window: int = 30) -> pd.DataFrame:
+                         weights: dict = None, window: int = 30,
+                         orden_markov: int = 1, draw_ts: np.ndarray = None,
+                         hora: int = None) -> pd.DataFrame:
+    """
+    Genera predicciones combinando múltiples scores.
+    `orden_markov` (1-3) elige el orden de la cadena usada en el score de Markov y
+    `hora` (0-23, la del sorteo a predecir) la condiciona por hora.
+    `draw_ts` (opcional, p. ej. Dataset.draw_ts_limpio) evita volver a leer las fechas.
+    Para avanzar sorteo a sorteo sin reprocesar el historial, usar ScoringState.
     """
-    Genera predicciones combinando múltiples scores
+    if draw_ts is None:
+        draw_ts, _ = normalizacion.columnas_tiempo(df["Fecha"], df["Hora"])
+    codigos, dias = codificar_cronologico(df, draw_ts)
+    estado = ScoringState.desde_arrays(codigos, dias, window)
+
+    markov = None
+    if (orden_markov > 1 or hora is not None) and estado.total > 0:
+        # Secuencia completa: un sorteo no válido corta el contexto, igual que en orden 1
+        horas = None
+        if hora is not None:
+            horas = normalizacion.hour_slot(df["Hora"])[normalizacion.orden_cronologico(draw_ts)]
+        cadena = CadenaMarkov.desde_codigos(codigos, horas, orden=orden_markov, por_hora=hora is not None)
+        markov = score_cadena(cadena, hora)
+    return estado.predicciones(top_k, weights, markov)
+
+# ======================================================
+#   BACKTEST WALK-FORWARD
+# ======================================================
+def _normalizar_filas(a: np.ndarray) -> np.ndarray:
+    """_normalizar() aplicado a cada fila de una matriz"""
+    a = a.astype(float)
+    minimo = a.min(axis=1, keepdims=True)
+    rango = a.max(axis=1, keepdims=True) - minimo
+    constante = rango == 0
+    return np.where(constante, 0.0, (a - minimo) / np.where(constante, 1.0, rango))
+
+def walk_forward(codigos: np.ndarray, dias: np.ndarray, lookback_window: int = 100,
+                 eval_window: int = None, top_k: int = 5, weights: dict = None,
+                 window: int = 30, bloque: int = 4096) -> dict:
+    """
+    Backtest walk-forward sobre los arreglos de codificar_sorteos().
+
+    Entrena con los primeros `lookback_window` sorteos y luego, en cada paso,
+    predice el top_k con el mismo scoring que ScoringState y compara con el
+    sorteo real. Conteos, último día visto y ventana de tendencia avanzan de forma
+    incremental, en bloques de pasos vectorizados, así que el recorrido es O(N).
+    `eval_window=None` evalúa hasta el final del historial.
     """
     if weights is None:
-        weights = {"freq": 0.40, "recency": 0.30, "trend": 0.20, "markov": 0.10}
-    
-    # Calcular scores individuales
-    sf = score_frecuencia(df)
-    sr = score_recencia(df)
-    st = score_tendencia(df, window)
-    
-    # Inicializar score Markov (simplificado por ahora)
-    sm = pd.Series(0.0, index=STATES)
-    
-    # Normalizar cada score
-    sf_n = normalizar_serie(sf)
-    sr_n = normalizar_serie(sr)
-    st_n = normalizar_serie(st)
-    sm_n = normalizar_serie(sm)
-    
-    # Combinar scores ponderados
-    total = (
-        weights.get("freq", 0) * sf_n +
-        weights.get("recency", 0) * sr_n +
-        weights.get("trend", 0) * st_n +
-        weights.get("markov", 0) * sm_n
-    )
-    
-    # Crear DataFrame con resultados
-    resultados = []
-    for num in STATES:
-        resultados.append({
-            "Numero": num,
-            "Animal": numero_a_nombre(num),
-            "Score_Total": total.get(num, 0),
-            "Score_Frecuencia": sf_n.get(num, 0),
-            "Score_Recencia": sr_n.get(num, 0),
-            "Score_Tendencia": st_n.get(num, 0)
-        })
-    
-    df_result = pd.DataFrame(resultados)
-    
-    # Ordenar por score total
-    df_result = df_result.sort_values("Score_Total", ascending=False).reset_index(drop=True)
-    
-    # Añadir ranking
-    df_result["Ranking"] = df_result.index + 1
-    
-    return df_result.head(top_k)
+        weights = PESOS_DEFECTO
+    n = len(codigos)
+    fin = n if eval_window is None else min(n, lookback_window + eval_window)
+    inicio = min(lookback_window, fin)
+    pasos = fin - inicio
+
+    # Solo los sorteos válidos entran al estado; k[i] = válidos antes del paso i
+    validos = codigos >= 0
+    cod_v = codigos[validos]
+    dia_v = dias[validos]
+    k = np.concatenate(([0], np.cumsum(validos)))
+
+    predicciones = np.empty((pasos, top_k), dtype=np.int64)
+    estados = np.array(STATES)
+
+    # Transiciones de primer orden entre sorteos válidos consecutivos en el historial:
+    # contiguo[p] indica si el válido p-1 es el sorteo inmediatamente anterior al válido p
+    usar_markov = weights.get("markov", 0) != 0
+    transiciones = np.zeros((N_ESTADOS, N_ESTADOS), dtype=np.int64)
+    posiciones_validas = np.flatnonzero(validos)
+    contiguo = np.concatenate(([False], np.diff(posiciones_validas) == 1))
+    pares = 1
+
+    # Estado acumulado hasta el sorteo válido número `base`
+    base = 0
+    conteos_base = np.zeros(N_ESTADOS, dtype=np.int64)
+    ultimo_dia_base = np.full(N_ESTADOS, -1, dtype=np.int64)
+
+    for a in range(inicio, fin, bloque):
+        ks = k[a:min(a + bloque, fin)]
+        lo = max(0, int(ks[0]) - window)
+        hi = int(ks[-1])
+
+        # Avanzar el estado base hasta `lo`
+        conteos_base += np.bincount(cod_v[base:lo], minlength=N_ESTADOS)
+        con_fecha = dia_v[base:lo] >= 0
+        np.maximum.at(ultimo_dia_base, cod_v[base:lo][con_fecha], dia_v[base:lo][con_fecha])
+        base = lo
+
+        # Conteos y último día acumulados para cada k en [lo, hi]
+        filas = np.arange(hi - lo)
+        uno = np.zeros((hi - lo + 1, N_ESTADOS), dtype=np.int64)
+        uno[0] = conteos_base
+        uno[filas + 1, cod_v[lo:hi]] = 1
+        acumulados = np.cumsum(uno, axis=0)
+
+        dias_bloque = np.full((hi - lo + 1, N_ESTADOS), -1, dtype=np.int64)
+        dias_bloque[0] = ultimo_dia_base
+        dias_bloque[filas + 1, cod_v[lo:hi]] = dia_v[lo:hi]
+        ultimo_dia = np.maximum.accumulate(dias_bloque, axis=0)[ks - lo]
+
+        conteos = acumulados[ks - lo]
+        tendencia = conteos - acumulados[np.maximum(ks - window, 0) - lo]
+
+        dia_max = ultimo_dia.max(axis=1, keepdims=True)
+        dias_sin_salir = np.where(ultimo_dia >= 0, dia_max - ultimo_dia, DIAS_NUNCA_VISTO)
+        recencia = np.where(dia_max >= 0, _normalizar_filas(dias_sin_salir), 0.0)
+
+        markov = np.zeros(conteos.shape)
+        if usar_markov:
+            filas_markov = np.zeros(conteos.shape, dtype=np.int64)
+            for j, kj in enumerate(ks.tolist()):
+                # Incorporar las transiciones entre los primeros kj sorteos válidos
+                for p in range(pares, kj):
+                    if contiguo[p]:
+                        transiciones[cod_v[p - 1], cod_v[p]] += 1
+                pares = max(pares, kj)
+                # Sin fila si el sorteo anterior al paso no es válido (corta la cadena)
+                if kj > 0 and codigos[a + j - 1] >= 0:
+                    filas_markov[j] = transiciones[cod_v[kj - 1]]
+            totales = filas_markov.sum(axis=1, keepdims=True)
+            probs = np.divide(filas_markov, totales, out=np.zeros(conteos.shape), where=totales > 0)
+            markov = _normalizar_filas(probs)
+
+        total = (
+            weights.get("freq", 0) * _normalizar_filas(conteos) +
+            weights.get("recency", 0) * recencia +
+            weights.get("trend", 0) * _normalizar_filas(tendencia) +
+            weights.get("markov", 0) * markov
+        )
+        top = ranking.top_k(total, top_k)
+        predicciones[a - inicio:a - inicio + len(ks)] = estados[top]
+
+    reales = np.where(codigos[inicio:fin] >= 0, estados[np.maximum(codigos[inicio:fin], 0)], -1)
+    aciertos = (predicciones == reales[:, None]).any(axis=1) & (reales >= 0)
+
+    return {
+        "aciertos": int(aciertos.sum()),
+        "total_pruebas": pasos,
+        "predicciones": predicciones,
+        "reales": reales,
+        "acierto_por_paso": aciertos
+    }
+
+def backtest_walk_forward(df: pd.DataFrame, lookback_window: int = 100,
+                          eval_window: int = None, top_k: int = 5,
+                          weights: dict = None, window: int = 30) -> dict:
+    """
+    Backtest walk-forward sobre el historial (en el orden de sus filas).
+    Además de las métricas devuelve el top_k predicho en cada paso
+    ("predicciones", una fila por paso) y el número real ("reales").
+    """
+    codigos, dias = codificar_sorteos(df)
+    return walk_forward(codigos, dias, lookback_window, eval_window, top_k, weights, window)
 
 def backtest_simple(df: pd.DataFrame, lookback_window: int = 100, 
                     eval_window: int = 50, top_k: int = 5) -> dict:
@@ -155,28 +527,9 @@ def backtest_simple(df: pd.DataFrame, lookback_window: int = 100,
     if n < lookback_window + eval_window:
         return {"error": f"Datos insuficientes. Se necesitan al menos {lookback_window + eval_window} registros."}
     
-    hits = 0
-    total_tests = 0
-    
-    for i in range(lookback_window, min(n, lookback_window + eval_window)):
-        # Datos de entrenamiento
-        train = df.iloc[:i].copy()
-        
-        # Resultado real a predecir
-        real = df.iloc[i]["Num_Ganador"]
-        
-        # Generar predicciones
-        try:
-            preds = generar_predicciones(train, top_k=top_k)
-            predicted_numbers = preds["Numero"].tolist()
-            
-            # Verificar acierto
-            if real in predicted_numbers:
-                hits += 1
-            
-            total_tests += 1
-        except Exception as e:
-            continue
+    res = backtest_walk_forward(df, lookback_window, eval_window, top_k)
+    hits = res["aciertos"]
+    total_tests = res["total_pruebas"]
     
     if total_tests == 0:
         return {"error": "No se pudieron realizar pruebas"}
@@ -204,7 +557,7 @@ def analisis_rapido(df: pd.DataFrame):
     
     # Fechas
     try:
-        df["Fecha_dt"] = pd.to_datetime(df["Fecha"], dayfirst=True, errors="coerce")
+        df["Fecha_dt"] = fechas_sorteo(df)
         print(f"Rango de fechas: {df['Fecha_dt'].min().date()} a {df['Fecha_dt'].max().date()}")
     except:
         print("No se pudo analizar fechas")
@@ -0,0 +1,76 @@
+# ranking.py - TOP-K EXACTO SOBRE ARREGLOS DE SCORES
+"""
+Selección de los k mejores de un arreglo de scores sin ordenarlo completo.
+
+El resultado es el mismo que np.argsort(-scores, kind="stable")[:k]: mayor
+score primero y, a igual score, la posición menor. np.partition encuentra el
+k-ésimo score; se eligen los que lo superan más los primeros empates con él,
+y solo esos k se ordenan. Costo O(n + k log k) por fila en lugar de O(n log n).
+Con un solo arreglo de pocos scores (los 77 estados) el orden completo de numpy
+es más barato que las llamadas extra, así que se usa directamente.
+Los scores no deben tener NaN.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+# Desde este largo conviene np.partition en un arreglo 1D
+MIN_PARTICION = 512
+
+
+class Puesto(NamedTuple):
+    """Un lugar del ranking: posición en el arreglo de scores y su score"""
+    posicion: int
+    score: float
+
+
+def _top_k_1d(scores: np.ndarray, k: int) -> np.ndarray:
+    n = len(scores)
+    k = min(max(int(k), 0), n)
+    if k == 0:
+        return np.zeros(0, dtype=np.int64)
+    if n < MIN_PARTICION:
+        return np.argsort(-scores, kind="stable")[:k]
+
+    umbral = np.partition(scores, n - k)[n - k]
+    posiciones = np.flatnonzero(scores >= umbral)
+    if len(posiciones) > k:
+        # Sobran empates con el umbral: entran los de menor posición
+        mayores = posiciones[scores[posiciones] > umbral]
+        empates = posiciones[scores[posiciones] == umbral][:k - len(mayores)]
+        posiciones = np.concatenate((mayores, empates))
+    return posiciones[np.argsort(-scores[posiciones], kind="stable")]
+
+
+def top_k(scores, k: int) -> np.ndarray:
+    """
+    Posiciones de los `k` mayores scores, de mayor a menor.
+    Acepta un arreglo 1D o una matriz (un ranking por fila, sobre el último eje).
+    """
+    scores = np.asarray(scores)
+    if scores.ndim == 1:
+        return _top_k_1d(scores, k)
+
+    filas, n = scores.shape
+    k = min(max(int(k), 0), n)
+    if k == 0:
+        return np.zeros((filas, 0), dtype=np.int64)
+
+    # k-ésimo mayor score de cada fila
+    umbral = np.partition(scores, n - k, axis=1)[:, n - k:n - k + 1]
+    mayores = scores > umbral
+    empates = scores == umbral
+    # De los empates con el umbral entran los de menor posición
+    faltan = k - mayores.sum(axis=1, keepdims=True)
+    elegidos = mayores | (empates & (np.cumsum(empates, axis=1) <= faltan))
+
+    posiciones = np.nonzero(elegidos)[1].reshape(filas, k)
+    orden = np.argsort(-np.take_along_axis(scores, posiciones, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(posiciones, orden, axis=1)
+
+
+def ranking(scores, k: int) -> list:
+    """Los `k` mejores de un arreglo 1D como registros Puesto(posicion, score)"""
+    scores = np.asarray(scores)
+    posiciones = top_k(scores, k)
+    return [Puesto(p, s) for p, s in zip(posiciones.tolist(), scores[posiciones].tolist())]
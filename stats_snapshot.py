@@ -0,0 +1,105 @@
+# stats_snapshot.py - ESTADÍSTICAS PRECALCULADAS PARA /api/stats
+from dataclasses import dataclass
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from normalizacion import NAT
+
+
+@dataclass(frozen=True)
+class SnapshotEstadisticas:
+    """
+    Agregados del historial. Se construye una vez por versión de datos
+    y se sirve tal cual en cada petición.
+    """
+    total_sorteos: int
+    conteo_por_numero: tuple          # ((numero, frecuencia), ...) de mayor a menor
+    numeros_salidos: tuple
+    por_hora: MappingProxyType
+    ultimo_resultado: MappingProxyType
+    fecha_min: str
+    fecha_max: str
+
+    def top_frecuentes(self, numero_a_nombre, top: int = 10) -> list:
+        """Top de números más frecuentes en el formato de la API"""
+        top_list = []
+        for num, count in self.conteo_por_numero[:top]:
+            top_list.append({
+                'numero': int(num),
+                'animal': numero_a_nombre(int(num)),
+                'frecuencia': int(count),
+                'porcentaje': round((count / self.total_sorteos) * 100, 2)
+            })
+        return top_list
+
+    def a_dict(self, numero_a_nombre) -> dict:
+        """Cuerpo de respuesta de /api/stats"""
+        return {
+            'status': 'success',
+            'total_sorteos': self.total_sorteos,
+            'numeros_diferentes': len(self.numeros_salidos),
+            'top_frecuentes': self.top_frecuentes(numero_a_nombre),
+            'por_hora': dict(self.por_hora),
+            'ultimo_resultado': dict(self.ultimo_resultado) if self.ultimo_resultado is not None else None,
+            'rango_fechas': {
+                'desde': self.fecha_min,
+                'hasta': self.fecha_max
+            }
+        }
+
+
+def construir_snapshot(df: pd.DataFrame, draw_ts: np.ndarray = None) -> SnapshotEstadisticas:
+    """
+    Calcula los agregados a partir del historial limpio
+    (Num_Ganador numérico entero). `draw_ts` (alineado con las filas) da el
+    orden cronológico para el último resultado y el rango de fechas; sin él
+    se usa el orden del archivo.
+    """
+    conteos = df['Num_Ganador'].value_counts()
+    stats_hora = df.groupby('Hora').size().to_dict()
+
+    if draw_ts is not None:
+        draw_ts = np.asarray(draw_ts, dtype=np.int64)
+        con_fecha = np.flatnonzero(draw_ts != NAT)
+    else:
+        con_fecha = None
+
+    ultimo_resultado = None
+    if not df.empty:
+        if con_fecha is not None and len(con_fecha):
+            # Último por fecha y hora; a igual draw_ts, la fila más nueva del archivo
+            ts = draw_ts[con_fecha]
+            ultimo = df.iloc[con_fecha[len(ts) - 1 - np.argmax(ts[::-1])]]
+        else:
+            ultimo = df.iloc[-1]
+        ultimo_resultado = MappingProxyType({
+            'fecha': ultimo['Fecha'],
+            'hora': ultimo['Hora'],
+            'animal': ultimo['Animal_Gan'],
+            'numero': int(ultimo['Num_Ganador'])
+        })
+
+    if con_fecha is not None:
+        # Rango por fecha real, no por orden alfabético del texto
+        if len(con_fecha):
+            ts = draw_ts[con_fecha]
+            fecha_min = str(df['Fecha'].iloc[con_fecha[np.argmin(ts)]])
+            fecha_max = str(df['Fecha'].iloc[con_fecha[np.argmax(ts)]])
+        else:
+            fecha_min = fecha_max = 'N/A'
+    else:
+        # Convertir fechas a string para evitar NaN en JSON
+        fecha_min = str(df['Fecha'].min()) if not pd.isna(df['Fecha'].min()) else 'N/A'
+        fecha_max = str(df['Fecha'].max()) if not pd.isna(df['Fecha'].max()) else 'N/A'
+
+    return SnapshotEstadisticas(
+        total_sorteos=int(len(df)),
+        conteo_por_numero=tuple(conteos.items()),
+        numeros_salidos=tuple(sorted(df['Num_Ganador'].unique().tolist())),
+        por_hora=MappingProxyType({str(k): int(v) for k, v in stats_hora.items()}),
+        ultimo_resultado=ultimo_resultado,
+        fecha_min=fecha_min,
+        fecha_max=fecha_max
+    )
@@ -0,0 +1,80 @@
+# test_almacen_columnar.py - CARGA SIN COPIA, EXPORTACIÓN Y SINCRONÍA DEL ALMACÉN CON EL CSV
+import os
+
+import numpy as np
+import pandas as pd
+
+import almacen_columnar
+
+
+def _historial(dias: int) -> pd.DataFrame:
+    fechas = pd.date_range("2020-01-01", periods=dias).strftime("%d/%m/%Y")
+    df = pd.DataFrame({
+        "Fecha": np.repeat(fechas, 2),
+        "Hora": ["8:00 AM", "9:00 AM"] * dias,
+        "Animal_Gan": ["Oso", "Lapa"] * dias,
+        "Num_Ganador": [float(i % 77) for i in range(2 * dias)],
+    })
+    df.loc[1, "Animal_Gan"] = np.nan
+    df.loc[1, "Num_Ganador"] = np.nan
+    return df
+
+
+def test_cargar_no_copia_los_archivos(tmp_path):
+    directorio = str(tmp_path / "almacen")
+    df = _historial(20)
+    almacen_columnar.escribir(df, directorio)
+
+    cargado, columnas = almacen_columnar.cargar(directorio)
+    for nombre, columna_csv in almacen_columnar.TEXTOS.items():
+        assert np.shares_memory(cargado[columna_csv].array.codes, columnas[nombre])
+    assert np.shares_memory(cargado["Num_Ganador"].array._data, columnas["numero"])
+    textos = {columna: object for columna in almacen_columnar.TEXTOS.values()}
+    pd.testing.assert_frame_equal(almacen_columnar.tipos_csv(cargado), df.astype(textos))
+
+
+def test_agregar_ensancha_codigos_y_exporta_igual_al_csv(tmp_path):
+    directorio = str(tmp_path / "almacen")
+    df = _historial(200)
+    almacen_columnar.escribir(df.iloc[:100], directorio)
+    assert almacen_columnar.leer_meta(directorio)["columnas"]["fecha"] == np.dtype(np.int8).str
+
+    # Las fechas nuevas no entran en int8: se reescribe con códigos int16
+    almacen_columnar.agregar(df.iloc[100:], directorio)
+    meta = almacen_columnar.leer_meta(directorio)
+    assert meta["columnas"]["fecha"] == np.dtype(np.int16).str
+    assert meta["filas"] == len(df)
+
+    salida = str(tmp_path / "exportado.csv")
+    almacen_columnar.exportar_csv(directorio, salida)
+    with open(salida, encoding="utf-8") as f:
+        assert f.read() == df.to_csv(index=False)
+
+
+def _sorteo(dia: int, hora: str, animal: str, numero: int) -> dict:
+    return {"Fecha": f"{dia:02d}/12/2025", "Hora": hora, "Animal_Gan": animal, "Num_Ganador": numero}
+
+
+def test_almacen_atrasado_no_se_sirve_y_se_reconstruye(tmp_path, monkeypatch):
+    import data_update
+    from dataset_store import DatasetStore
+
+    monkeypatch.chdir(tmp_path)
+    data_update.guardar([_sorteo(1, "8:00 AM", "Zorro", 15), _sorteo(1, "9:00 AM", "Oso", 7)])
+    store = DatasetStore(buscar_ruta=lambda: data_update.CSV_FILE)
+    assert store.obtener().columnas is not None
+
+    # Un sorteo que llegó al CSV pero no al almacén (p. ej. falló actualizar_columnar)
+    data_update._agregar_csv(pd.DataFrame([_sorteo(1, "10:00 AM", "Lapa", 25)]))
+    directorio = almacen_columnar.directorio_de(data_update.CSV_FILE)
+    os.utime(os.path.join(directorio, "meta.json"))
+    dataset = store.obtener()
+    assert dataset.columnas is None
+    assert len(dataset.crudo) == 3
+
+    # La ingesta siguiente no agrega sobre el almacén atrasado: lo reconstruye
+    data_update.guardar([_sorteo(1, "11:00 AM", "Mono", 29)])
+    assert almacen_columnar.al_dia(directorio, data_update.CSV_FILE)
+    dataset = store.obtener()
+    assert dataset.columnas is not None
+    assert dataset.crudo["Hora"].tolist() == ["8:00 AM", "9:00 AM", "10:00 AM", "11:00 AM"]
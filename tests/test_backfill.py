@@ -0,0 +1,114 @@
+# test_backfill.py - CARGA HISTÓRICA CONTRA UN SERVIDOR HTTP LOCAL CON HTML GUARDADO
+import os
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import backfill
+import data_update
+import normalizacion
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "fixtures", "lotoven_historial.html")
+# Días del encabezado de la página guardada
+DIAS_FIXTURE = [date(2025, 11, 24) + timedelta(days=i) for i in range(7)]
+# 12 horas x 7 días, menos las 3 últimas horas del último día (sin resultado todavía)
+SORTEOS_POR_PAGINA = 12 * 7 - 3
+
+DESDE = date(2025, 3, 3)
+SEMANAS = [DESDE + timedelta(days=7 * i) for i in range(4)]
+SEMANA_404 = SEMANAS[1]
+SEMANA_503 = SEMANAS[2]
+# Esta semana devuelve la misma página que la primera (sorteos duplicados)
+SEMANA_REPETIDA = SEMANAS[3]
+
+
+def _pagina(lunes: date) -> bytes:
+    """La página guardada con las fechas del encabezado movidas a la semana pedida"""
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    for i, dia in enumerate(DIAS_FIXTURE):
+        html = html.replace(f"<th>{dia:%d-%m-%Y}</th>", f"<th>{lunes + timedelta(days=i):%d-%m-%Y}</th>")
+    return html.encode("utf-8")
+
+
+@pytest.fixture
+def servidor():
+    """Servidor HTTP local que sirve el historial por semanas (?desde=YYYY-MM-DD)"""
+    intentos = {}
+    lock = threading.Lock()
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            lunes = date.fromisoformat(parse_qs(urlparse(self.path).query)["desde"][0])
+            with lock:
+                intentos[lunes] = intentos.get(lunes, 0) + 1
+                intento = intentos[lunes]
+
+            if lunes == SEMANA_404:
+                self.send_error(404)
+                return
+            if lunes == SEMANA_503 and intento == 1:
+                self.send_error(503)
+                return
+            cuerpo = _pagina(SEMANAS[0] if lunes == SEMANA_REPETIDA else lunes)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{httpd.server_port}/historial/?desde={{desde}}&hasta={{hasta}}", intentos
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+@pytest.fixture
+def directorio(tmp_path, monkeypatch):
+    """CSV inicial con sorteos posteriores al rango y uno repetido en otro formato de fecha"""
+    monkeypatch.chdir(tmp_path)
+    pd.DataFrame([
+        ["01/12/2025", "8:00 AM", "Zorro", 15],
+        ["01/12/2025", "9:00 AM", "Ballena", 100],
+        # El mismo sorteo que trae la primera página, en formato yyyy/mm/dd
+        [f"{SEMANAS[0]:%Y/%m/%d}", "08:00 AM", "Lechuza", 38],
+    ], columns=["Fecha", "Hora", "Animal_Gan", "Num_Ganador"]).to_csv(data_update.CSV_FILE, index=False)
+    return tmp_path
+
+
+def test_backfill_concurrente(servidor, directorio):
+    plantilla, intentos = servidor
+    resumen = backfill.backfill(DESDE, SEMANAS[-1] + timedelta(days=6), plantilla,
+                                dias_por_pagina=7, workers=3, reintentos=2, backoff=0)
+
+    # La página 404 se omite; la 503 se reintenta y entra
+    assert resumen == {"paginas": 4, "errores": 1, "filas": 3 * SORTEOS_POR_PAGINA}
+    assert intentos[SEMANA_404] == 1
+    assert intentos[SEMANA_503] == 2
+
+    df = pd.read_csv(data_update.CSV_FILE, dtype=str)
+    draw_ts, _ = normalizacion.columnas_tiempo(df["Fecha"], df["Hora"])
+
+    # Sin duplicados: la semana repetida y el sorteo del CSV inicial se compactan
+    assert len(np.unique(draw_ts)) == len(df)
+    assert len(df) == 2 * SORTEOS_POR_PAGINA + 2
+
+    # Orden cronológico aunque las páginas terminen en cualquier orden
+    assert (np.diff(draw_ts) >= 0).all()
+    assert df["Fecha"].iloc[-1] == "01/12/2025"
+
+    # La marca de agua queda en el último sorteo
+    assert data_update.leer_marca()["draw_ts"] == draw_ts.max()
@@ -0,0 +1,61 @@
+# test_checkpoints_scoring.py - ESTADO RESTAURADO DE UN CHECKPOINT CONTRA EL HISTORIAL TRUNCADO
+import numpy as np
+import pytest
+
+from checkpoints_scoring import CheckpointsScoring
+from predictor_model import N_ESTADOS, PESOS_DEFECTO, ScoringState
+
+_NS_POR_HORA = 3600 * 10**9
+
+
+def _historial(n: int = 700):
+    """Sorteos en orden cronológico: días de 1 a 12 sorteos, días sin sorteos y números no válidos"""
+    rng = np.random.default_rng(5)
+    por_dia = rng.integers(1, 13, n)
+    dias = np.repeat(738000 + np.cumsum(rng.integers(1, 3, n)), por_dia)[:n]
+    hora = np.concatenate([np.arange(k) for k in por_dia])[:n]
+    draw_ts = (dias - 719163) * 24 * _NS_POR_HORA + (8 + hora) * _NS_POR_HORA
+    codigos = rng.integers(0, N_ESTADOS, n)
+    codigos[rng.random(n) < 0.1] = -1
+    return codigos, dias, draw_ts
+
+
+def _assert_estados_iguales(obtenido: ScoringState, esperado: ScoringState):
+    assert obtenido.total == esperado.total
+    assert obtenido.dia_max == esperado.dia_max
+    np.testing.assert_array_equal(obtenido.conteos, esperado.conteos)
+    np.testing.assert_array_equal(obtenido.ultimo_dia, esperado.ultimo_dia)
+    assert list(obtenido.ventana) == list(esperado.ventana)
+    np.testing.assert_array_equal(obtenido.conteos_ventana, esperado.conteos_ventana)
+    np.testing.assert_array_equal(obtenido.transiciones.conteos, esperado.transiciones.conteos)
+    np.testing.assert_array_equal(obtenido.transiciones.vistos, esperado.transiciones.vistos)
+    assert obtenido.transiciones.ultimo == esperado.transiciones.ultimo
+
+    pesos = dict(PESOS_DEFECTO, markov=0.5)
+    assert obtenido.mejores(10, pesos) == esperado.mejores(10, pesos)
+
+
+@pytest.mark.parametrize("window", [0, 30, 2000])
+def test_restaurar_y_avanzar_igual_a_desde_arrays(window):
+    codigos, dias, draw_ts = _historial()
+    checkpoints = CheckpointsScoring(codigos, dias, draw_ts, dias_markov=4)
+
+    # Cortes al cierre de un día, a mitad de día, antes del primer checkpoint de Markov y al final
+    for corte in [0, 1, 5] + list(range(17, len(codigos), 23)) + [len(codigos)]:
+        estado = checkpoints.restaurar(corte, window)
+        _assert_estados_iguales(estado, ScoringState.desde_arrays(codigos[:corte], dias[:corte], window))
+
+        # Seguir sorteo a sorteo desde el estado restaurado
+        siguiente = min(corte + 40, len(codigos))
+        for idx, dia in zip(codigos[corte:siguiente].tolist(), dias[corte:siguiente].tolist()):
+            estado.avanzar(idx, dia)
+        _assert_estados_iguales(estado, ScoringState.desde_arrays(codigos[:siguiente], dias[:siguiente], window))
+
+
+def test_corte_cuenta_los_sorteos_hasta_el_instante():
+    codigos, dias, draw_ts = _historial()
+    checkpoints = CheckpointsScoring(codigos, dias, draw_ts)
+    assert checkpoints.corte() == len(codigos)
+    assert checkpoints.corte(draw_ts[100]) == 101
+    assert checkpoints.corte(draw_ts[100] - 1) == 100
+    assert checkpoints.corte(draw_ts[0] - 1) == 0
@@ -0,0 +1,92 @@
+# test_data_update.py - INGESTA INCREMENTAL (guardar) Y COMPACTACIÓN DEL CSV
+import pandas as pd
+import pytest
+
+import almacen_columnar
+import data_update
+import normalizacion
+
+HORAS = ["8:00 AM", "9:00 AM", "10:00 AM"]
+
+
+def _sorteo(dia: int, hora: str, numero=None) -> dict:
+    """Celda del historial como la arma parsear_historial ('-' si la hora aún no se jugó)"""
+    if numero is None:
+        return {"Fecha": f"{dia:02d}/12/2025", "Hora": hora, "Animal_Gan": "-", "Num_Ganador": ""}
+    return {"Fecha": f"{dia:02d}/12/2025", "Hora": hora, "Animal_Gan": f"Animal {numero}", "Num_Ganador": numero}
+
+
+def _pagina(desde: int, hasta: int, pendientes: int = 0) -> list:
+    """Sorteos de los días desde..hasta; las últimas `pendientes` horas todavía sin resultado"""
+    celdas = [(dia, j, hora) for dia in range(desde, hasta + 1) for j, hora in enumerate(HORAS)]
+    return [_sorteo(dia, hora, None if i >= len(celdas) - pendientes else (dia * 7 + j) % 77)
+            for i, (dia, j, hora) in enumerate(celdas)]
+
+
+def _csv() -> str:
+    with open(data_update.CSV_FILE, encoding="utf-8") as f:
+        return f.read()
+
+
+def _reescritura_completa(paginas: list) -> pd.DataFrame:
+    """Lo que dejaba el guardar anterior (concatenar y deduplicar todo el CSV), sin celdas vacías y en orden"""
+    df = pd.DataFrame(columns=["Fecha", "Hora", "Animal_Gan", "Num_Ganador"])
+    for pagina in paginas:
+        df = pd.concat([df, pd.DataFrame(pagina).astype(str)], ignore_index=True)
+        df = df.drop_duplicates(subset=["Fecha", "Hora"], keep="last")
+    df = df[df["Animal_Gan"] != "-"]
+    draw_ts, _ = normalizacion.columnas_tiempo(df["Fecha"], df["Hora"])
+    return df.iloc[normalizacion.orden_cronologico(draw_ts)]
+
+
+@pytest.fixture(autouse=True)
+def directorio(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_repetir_el_mismo_lote_no_cambia_nada():
+    pagina = _pagina(1, 3, pendientes=1)
+    assert data_update.guardar(pagina) == 8
+    antes, marca = _csv(), data_update.leer_marca()
+
+    assert data_update.guardar(pagina) == 0
+    assert _csv() == antes
+    assert data_update.leer_marca() == marca
+
+
+def test_sorteos_hasta_la_marca_se_saltan():
+    data_update.guardar(_pagina(2, 3))
+    assert data_update.leer_marca()["fecha"] == "03/12/2025"
+
+    # Días anteriores a la marca y el mismo último sorteo: no se agregan
+    assert data_update.guardar(_pagina(1, 3)) == 0
+    assert data_update.guardar([_sorteo(1, "8:00 AM", 50)]) == 0
+    # Solo entra lo posterior a la marca
+    assert data_update.guardar(_pagina(1, 4)) == 3
+    assert pd.read_csv(data_update.CSV_FILE)["Fecha"].tolist() == ["02/12/2025"] * 3 + ["03/12/2025"] * 3 + ["04/12/2025"] * 3
+
+
+def test_celdas_vacias_no_se_guardan_ni_avanzan_la_marca():
+    assert data_update.guardar(_pagina(1, 1, pendientes=2)) == 1
+    assert data_update.leer_marca()["hora"] == "8:00 AM"
+    assert "-" not in _csv()
+
+    # Cuando se juegan, entran en la siguiente ingesta
+    assert data_update.guardar(_pagina(1, 1)) == 2
+    assert pd.read_csv(data_update.CSV_FILE)["Hora"].tolist() == HORAS
+
+
+def test_compactar_reproduce_la_reescritura_completa():
+    # Páginas solapadas, cada una con la última hora pendiente (se completa en la siguiente)
+    paginas = [_pagina(1, 3, pendientes=1), _pagina(2, 5, pendientes=1), _pagina(4, 6, pendientes=1), _pagina(5, 7)]
+    for pagina in paginas:
+        data_update.guardar(pagina)
+    # Sorteos repetidos que llegaron por otro camino (p. ej. una carga histórica)
+    data_update._agregar_csv(pd.DataFrame(_pagina(2, 3)))
+
+    data_update.compactar()
+    esperado = _reescritura_completa(paginas)
+    assert _csv() == esperado.to_csv(index=False)
+    assert data_update.leer_marca()["fecha"] == "07/12/2025"
+    assert almacen_columnar.al_dia(almacen_columnar.directorio_de(data_update.CSV_FILE), data_update.CSV_FILE)
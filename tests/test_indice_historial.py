@@ -0,0 +1,90 @@
+# test_indice_historial.py - PAGINACIÓN POR CURSOR DE /api/history
+import numpy as np
+import pandas as pd
+import pytest
+
+import normalizacion
+from dataset_store import DatasetStore
+from indice_historial import CursorInvalido, IndiceHistorial, codificar_cursor, inicio_del_dia
+
+
+def _historial() -> pd.DataFrame:
+    """Sorteos desordenados, con horas repetidas el mismo día y filas sin fecha"""
+    rng = np.random.default_rng(11)
+    fechas = pd.date_range("2025-03-01", periods=20).strftime("%d/%m/%Y")
+    horas = ["8:00 AM", "9:00 AM", "1:00 PM", "7:00 PM"]
+    filas = [[fecha, hora, "Animal", i % 77] for i, (fecha, hora) in
+             enumerate((fecha, hora) for fecha in fechas for hora in horas)]
+    filas += [["01/03/2025", "8:00 AM", "Repetido", 1], ["10/03/2025", "1:00 PM", "Repetido", 2],
+              ["", "8:00 AM", "Sin fecha", 3], ["xx", "", "Sin fecha", 4]]
+    df = pd.DataFrame(filas, columns=["Fecha", "Hora", "Animal_Gan", "Num_Ganador"])
+    return df.iloc[rng.permutation(len(df))].reset_index(drop=True)
+
+
+def _indice(df: pd.DataFrame) -> IndiceHistorial:
+    draw_ts, _ = normalizacion.columnas_tiempo(df["Fecha"], df["Hora"])
+    return IndiceHistorial(draw_ts)
+
+
+def _recorrer(indice: IndiceHistorial, limit: int, **limites) -> list:
+    vistas, cursor = [], None
+    while True:
+        filas, cursor = indice.pagina(limit, cursor=cursor, **limites)
+        assert 0 < len(filas) <= limit
+        vistas.extend(filas.tolist())
+        if cursor is None:
+            return vistas
+
+
+def _esperado(df: pd.DataFrame, desde=None, hasta=None) -> list:
+    """Filas del rango de la más reciente a la más antigua (a igual fecha/hora, la última del archivo primero)"""
+    draw_ts, _ = normalizacion.columnas_tiempo(df["Fecha"], df["Hora"])
+    orden = sorted(range(len(df)), key=lambda fila: (draw_ts[fila], fila), reverse=True)
+    fin = None if hasta is None else hasta + 24 * 60 * 60 * 10**9
+    return [fila for fila in orden
+            if (desde is None or draw_ts[fila] >= desde) and (fin is None or draw_ts[fila] < fin)]
+
+
+@pytest.mark.parametrize("limit", [1, 7, 16, 200])
+def test_recorrer_con_cursor_entrega_cada_fila_una_vez_y_en_orden(limit):
+    df = _historial()
+    assert _recorrer(_indice(df), limit) == _esperado(df)
+
+
+@pytest.mark.parametrize("desde, hasta", [("05/03/2025", "12/03/2025"), ("10/03/2025", "10/03/2025"),
+                                          ("2025/03/18", None), (None, "02/03/2025")])
+def test_desde_y_hasta_incluyen_los_dias_de_los_extremos(desde, hasta):
+    df = _historial()
+    limites = {"desde": desde and inicio_del_dia(desde), "hasta": hasta and inicio_del_dia(hasta)}
+    assert _recorrer(_indice(df), 5, **limites) == _esperado(df, **limites)
+
+
+def test_rango_vacio_no_tiene_pagina_siguiente():
+    filas, cursor = _indice(_historial()).pagina(10, desde=inicio_del_dia("01/01/2030"))
+    assert len(filas) == 0 and cursor is None
+
+
+@pytest.mark.parametrize("cursor", ["%%%", "bm8tZXMtdW4tY3Vyc29y", codificar_cursor(1, 2)[:-1]])
+def test_cursor_invalido(cursor):
+    with pytest.raises(CursorInvalido):
+        _indice(_historial()).pagina(10, cursor=cursor)
+
+
+def test_api_history_pagina_y_rechaza_cursor_invalido(tmp_path, monkeypatch):
+    import app as modulo_app
+
+    df = _historial()
+    ruta = tmp_path / "resultados_guacharo.csv"
+    df.to_csv(ruta, index=False)
+    monkeypatch.setattr(modulo_app, "obtener_dataset", DatasetStore(buscar_ruta=lambda: str(ruta)).obtener)
+    modulo_app.cache.invalidar()
+    cliente = modulo_app.app.test_client()
+
+    numeros, cursor = [], ""
+    while cursor is not None:
+        datos = cliente.get(f"/api/history?limit=9&cursor={cursor}").get_json()
+        numeros.extend(fila["Num_Ganador"] for fila in datos["results"])
+        cursor = datos["next_cursor"]
+    assert numeros == df["Num_Ganador"].iloc[_esperado(df)].tolist()
+
+    assert cliente.get("/api/history?cursor=%25%25%25").status_code == 400
@@ -0,0 +1,46 @@
+# test_ingestor.py - UN SOLO PROCESO ENCOLA LA INGESTA PROGRAMADA
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import ingestor
+from ingestor import COMPLETADO, Ingestor
+
+pytestmark = pytest.mark.skipif(ingestor.fcntl is None, reason="requiere fcntl")
+
+
+def _ingestor(tmp_path, **kwargs):
+    return Ingestor(funcion=lambda: 0, programado=False, directorio=str(tmp_path / "trabajos"),
+                    archivo_programador=str(tmp_path / "programador.lock"), **kwargs)
+
+
+def test_un_solo_programador_y_todos_atienden_sus_trabajos(tmp_path):
+    primero, segundo = _ingestor(tmp_path), _ingestor(tmp_path)
+    assert primero.es_programador()
+    assert not segundo.es_programador()
+    assert primero.es_programador()
+
+    # El que no programa igual atiende los trabajos que recibe
+    id_trabajo = segundo.encolar("manual")
+    for _ in range(100):
+        if segundo.estado(id_trabajo)["estado"] == COMPLETADO:
+            break
+        time.sleep(0.02)
+    assert segundo.estado(id_trabajo)["estado"] == COMPLETADO
+
+
+def test_otro_proceso_toma_el_programador_cuando_termina_el_que_lo_tenia(tmp_path):
+    archivo = tmp_path / "programador.lock"
+    codigo = ("import sys, ingestor; i = ingestor.Ingestor(archivo_programador=sys.argv[1]); "
+              "print(i.es_programador()); sys.stdout.flush(); sys.stdin.read()")
+    hijo = subprocess.Popen([sys.executable, "-c", codigo, str(archivo)], stdin=subprocess.PIPE,
+                            stdout=subprocess.PIPE, text=True, cwd=os.path.dirname(os.path.abspath(ingestor.__file__)))
+    assert hijo.stdout.readline().strip() == "True"
+    local = _ingestor(tmp_path)
+    assert not local.es_programador()
+
+    hijo.communicate("")
+    assert local.es_programador()
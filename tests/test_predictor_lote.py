@@ -0,0 +1,56 @@
+# test_predictor_lote.py - PREDICCIONES EN UN INSTANTE PASADO (as_of) CONTRA /api/predict
+import numpy as np
+import pandas as pd
+import pytest
+
+import predictor_lote
+from dataset_store import Dataset, DatasetStore
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    """App con un historial sintético que tiene filas sin resultado (etiquetas no contiguas)"""
+    import app as modulo_app
+
+    rng = np.random.default_rng(7)
+    dias = pd.date_range("2025-01-01", periods=40).strftime("%d/%m/%Y")
+    horas = [f"{h}:00 AM" for h in range(8, 12)] + ["12:00 PM"] + [f"{h}:00 PM" for h in range(1, 8)]
+    filas = [[dia, hora, "Animal", float(rng.integers(0, 77))] for dia in dias for hora in horas]
+    for i in range(0, len(filas), 13):
+        filas[i][2], filas[i][3] = None, None
+    ruta = tmp_path / "resultados_guacharo.csv"
+    pd.DataFrame(filas, columns=["Fecha", "Hora", "Animal_Gan", "Num_Ganador"]).to_csv(ruta, index=False)
+
+    monkeypatch.setattr(modulo_app, "obtener_dataset", DatasetStore(buscar_ruta=lambda: str(ruta)).obtener)
+    modulo_app.cache.invalidar()
+    return modulo_app.app.test_client()
+
+
+def _predicciones(respuesta):
+    assert respuesta.status_code == 200
+    return respuesta.get_json()["predictions"]
+
+
+def test_as_of_posterior_al_ultimo_sorteo_es_igual_a_predict(cliente):
+    vigente = _predicciones(cliente.get("/api/predict?top=15"))
+    assert vigente
+    assert _predicciones(cliente.get("/api/predict?top=15&as_of=2026-01-01T00:00")) == vigente
+
+    lote = cliente.post("/api/predict/batch", json=[{"top": 15, "as_of": "2026-01-01T00:00"}])
+    assert lote.get_json()["results"][0]["predictions"] == vigente
+
+
+def test_as_of_pasado_igual_a_predict_con_el_historial_de_ese_momento(tmp_path):
+    df = pd.DataFrame({
+        "Fecha": ["01/01/2025"] * 6 + ["02/01/2025"] * 6,
+        "Hora": [f"{h}:00 AM" for h in range(6, 12)] * 2,
+        "Animal_Gan": ["A"] * 12,
+        "Num_Ganador": [1, None, 2, 1, 3, None, 2, 2, 5, None, 1, 4],
+    })
+    dataset = Dataset("x.csv", ("x.csv", 0, 0), df)
+    # El historial tal como estaba al cierre del 01/01: mismas filas y etiquetas
+    pasado = Dataset("x.csv", ("x.csv", 0, 0), df.iloc[:6])
+
+    from predictor_frecuencia import generar_predicciones_frecuencia
+    spec = predictor_lote.normalizar_spec({"top": 5, "as_of": "2025-01-01T23:59"})
+    assert predictor_lote.Lote(dataset).evaluar(spec) == generar_predicciones_frecuencia(pasado.limpio, 5)
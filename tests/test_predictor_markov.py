@@ -0,0 +1,83 @@
+# test_predictor_markov.py - CADENAS DE MARKOV: SORTEOS NO VÁLIDOS, ORDEN Y HORA
+import numpy as np
+import pandas as pd
+import pytest
+
+import normalizacion
+import predictor_lote
+from dataset_store import Dataset, DatasetStore
+from predictor_markov import CadenaMarkov, TransicionesMarkov
+from predictor_model import codificar_cronologico, generar_predicciones
+
+HORAS = [f"{h}:00 AM" for h in range(8, 12)] + ["12:00 PM"] + [f"{h}:00 PM" for h in range(1, 8)]
+
+
+def _historial() -> pd.DataFrame:
+    """Sorteos que se repiten cada 3 días (los contextos se vuelven a ver), con números fuera del juego"""
+    dias = pd.date_range("2025-01-01", periods=45).strftime("%d/%m/%Y")
+    filas = [[dia, hora, "Animal", float((5 * h + 11 * (d % 3)) % 77)]
+             for d, dia in enumerate(dias) for h, hora in enumerate(HORAS)]
+    for i in range(7, len(filas), 17):
+        filas[i][3] = 99.0
+    return pd.DataFrame(filas, columns=["Fecha", "Hora", "Animal_Gan", "Num_Ganador"])
+
+
+@pytest.fixture
+def cliente(tmp_path, monkeypatch):
+    import app as modulo_app
+
+    ruta = tmp_path / "resultados_guacharo.csv"
+    _historial().to_csv(ruta, index=False)
+    monkeypatch.setattr(modulo_app, "obtener_dataset", DatasetStore(buscar_ruta=lambda: str(ruta)).obtener)
+    modulo_app.cache.invalidar()
+    return modulo_app.app.test_client()
+
+
+def test_orden_1_sobre_todos_los_sorteos_igual_a_transiciones():
+    rng = np.random.default_rng(3)
+    codigos = rng.integers(0, 77, 500)
+    codigos[rng.random(500) < 0.1] = -1
+    cadena = CadenaMarkov.desde_codigos(codigos, orden=1)
+    transiciones = TransicionesMarkov.desde_codigos(codigos)
+    for idx in range(77):
+        np.testing.assert_allclose(cadena.probabilidades([idx]), transiciones.fila(idx))
+
+
+def test_sorteo_no_valido_corta_el_contexto_de_orden_2():
+    cadena = CadenaMarkov.desde_codigos(np.array([1, 2, -1, 3, 4, 5]), orden=2)
+    # Solo (3, 4) -> 5: ningún contexto salta por encima del sorteo no válido
+    assert cadena.claves.tolist() == [(3 * 77 + 4) * 77 + 5]
+    assert not cadena.probabilidades([2, 3]).any()
+
+
+def test_spec_con_orden_y_hora_igual_a_generar_predicciones():
+    dataset = Dataset("x.csv", ("x.csv", 0, 0), _historial())
+    lote = predictor_lote.Lote(dataset)
+    spec = predictor_lote.normalizar_spec({"model": "modelo", "top": 10, "markov_order": 2, "hour": "8:00 AM"})
+    obtenido = lote.evaluar(spec)
+
+    esperado = generar_predicciones(dataset.limpio, 10, orden_markov=2, hora=8)
+    assert [p["Numero"] for p in obtenido] == esperado["Numero"].tolist()
+    np.testing.assert_allclose([p["Score_Markov"] for p in obtenido], esperado["Score_Markov"], atol=1e-4)
+    assert esperado["Score_Markov"].max() > 0
+
+
+def test_api_markov_con_orden_y_hora(cliente):
+    respuesta = cliente.get("/api/predict?model=markov&markov_order=2&hora=8&top=5")
+    assert respuesta.status_code == 200
+    datos = respuesta.get_json()
+    assert datos["markov_order"] == 2
+
+    df = _historial()
+    draw_ts, _ = normalizacion.columnas_tiempo(df["Fecha"], df["Hora"])
+    codigos, _ = codificar_cronologico(df, draw_ts)
+    horas = normalizacion.hour_slot(df["Hora"])[normalizacion.orden_cronologico(draw_ts)]
+    cadena = CadenaMarkov.desde_codigos(codigos, horas, orden=2, por_hora=True)
+    assert datos["predictions"] == cadena.predecir(5, hora=8)
+    assert datos["predictions"]
+
+
+@pytest.mark.parametrize("consulta", ["model=frecuencia&markov_order=2", "model=modelo&markov_order=4",
+                                      "model=markov&hora=25"])
+def test_api_rechaza_orden_u_hora_invalidos(cliente, consulta):
+    assert cliente.get(f"/api/predict?{consulta}").status_code == 400
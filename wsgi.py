@@ -0,0 +1,47 @@
+# wsgi.py - PUNTO DE ENTRADA PARA SERVIDORES WSGI (gunicorn / waitress)
+"""
+Uso:
+    gunicorn -c gunicorn.conf.py wsgi:app
+    waitress-serve --threads 8 --port 5000 wsgi:app
+
+Con preload_app (ver gunicorn.conf.py) la aplicación se crea y precarga una sola
+vez en el proceso maestro: el historial, sus índices y las respuestas más pedidas
+quedan en memoria antes de crear los workers, que los comparten copy-on-write.
+
+El thread de ingesta lo arranca crear_app() (waitress y otros servidores de un
+solo proceso); con gunicorn.conf.py lo arranca post_fork en cada worker, porque
+un thread creado en el maestro no sobrevive al fork.
+"""
+import os
+
+from app import app as aplicacion, iniciar_ingestor
+
+# Respuestas que se calculan al arrancar (las que pide la app móvil al abrir)
+URLS_PRECARGA = (
+    '/api/animals',
+    '/api/stats',
+    '/api/predict',
+    '/api/history',
+    '/api/history?limit=100',
+)
+
+
+def precargar(flask_app):
+    """Carga el historial y llena el caché de respuestas antes de atender tráfico"""
+    cliente = flask_app.test_client()
+    for url in URLS_PRECARGA:
+        respuesta = cliente.get(url)
+        if respuesta.status_code != 200:
+            print(f"⚠ Precarga de {url}: HTTP {respuesta.status_code}")
+
+
+def crear_app():
+    """Fábrica de la aplicación para servidores WSGI"""
+    precargar(aplicacion)
+    # gunicorn.conf.py define INGESTA_EN_WORKERS=1 (la arranca post_fork)
+    if os.environ.get('INGESTA_EN_WORKERS') != '1':
+        iniciar_ingestor()
+    return aplicacion
+
+
+app = crear_app()